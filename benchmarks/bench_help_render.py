@@ -0,0 +1,124 @@
+"""Benchmark help rendering on deep and wide generated trees.
+
+Usage: python benchmarks/bench_help_render.py
+
+Prints, for a few tree shapes, the median wall time of a root ``--help``
+render (render cache cleared before each run) with the full tree expanded
+through the rich and the plain-text renderer, and with the default row
+budget (``help_budget``) folding deeper levels. ``cold`` is the first
+budgeted render in a fresh process, where nothing about the tree has been
+computed yet.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import io
+import statistics
+import subprocess
+import sys
+import time
+
+from treeparse import argument, cli, command, group, option
+from treeparse.utils.help_renderer import help_renderer
+from treeparse.utils.plain_renderer import plain_renderer
+
+
+def _cb(**kwargs):
+    """Generated command."""
+
+
+def make_tree(depth: int, width: int, commands: int) -> cli:
+    """A tree ``depth`` groups deep with ``width`` subgroups and ``commands`` commands per group."""
+
+    def make_group(level: int, index: int) -> group:
+        g = group(
+            name=f"g{level}-{index}",
+            help="Group help text",
+            options=[option(flags=[f"--level{level}"], arg_type=int, default=level, help="Level option")],
+        )
+        for i in range(commands):
+            g.commands.append(
+                command.model_construct(
+                    name=f"cmd{i}",
+                    help="Command help text that is long enough to wrap " * 2,
+                    callback=_cb,
+                    arguments=[argument(name="target", arg_type=str)],
+                    options=[
+                        option(flags=["--count", "-c"], arg_type=int, default=3, help="How many"),
+                        option(flags=["--mode"], arg_type=str, choices=["a", "b", "c"], help="Mode"),
+                    ],
+                    sort_key=i % 3,
+                )
+            )
+        if level < depth:
+            g.subgroups = [make_group(level + 1, j) for j in range(width)]
+        return g
+
+    app = cli(name="bench", help="Benchmark CLI")
+    app.subgroups = [make_group(1, j) for j in range(width)]
+    return app
+
+
+def count_nodes(node) -> int:
+    return 1 + sum(count_nodes(c) for c in getattr(node, "subgroups", []) + getattr(node, "commands", []))
+
+
+def time_render(app: cli, renderer, repeat: int = 5) -> float:
+    samples = []
+    for _ in range(repeat):
+        app._memo("help").clear()
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            renderer(app).render([])
+            samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+SHAPES = {
+    "deep (depth=7, width=2, 2 cmds)": (7, 2, 2),
+    "wide (depth=1, width=100, 10 cmds)": (1, 100, 10),
+    "bushy (depth=3, width=5, 5 cmds)": (3, 5, 5),
+    "10k (depth=2, width=10, 100 cmds)": (2, 10, 100),
+}
+
+
+def time_cold(shape: tuple[int, int, int], repeat: int = 3) -> float:
+    """Median of the first budgeted render, each in a new interpreter."""
+    samples = []
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, __file__, "--cold", *map(str, shape)], capture_output=True, text=True, check=True
+        ).stdout
+        samples.append(float(out))
+    return statistics.median(samples)
+
+
+def cold(shape: tuple[int, int, int]):
+    app = make_tree(*shape)
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        plain_renderer(app).render([])
+        elapsed = time.perf_counter() - start
+    print(elapsed)
+
+
+def main():
+    for label, shape in SHAPES.items():
+        cold_budget = time_cold(shape)
+        app = make_tree(*shape)
+        budget = time_render(app, plain_renderer)
+        app.help_budget = None
+        rich_full = time_render(app, help_renderer, repeat=3)
+        plain_full = time_render(app, plain_renderer, repeat=3)
+        print(
+            f"{label:36s} nodes={count_nodes(app):6d}  rich {rich_full * 1000:8.1f} ms  "
+            f"plain {plain_full * 1000:8.1f} ms  budgeted {budget * 1000:6.1f} ms  cold {cold_budget * 1000:6.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--cold"]:
+        cold(tuple(map(int, sys.argv[2:5])))
+    else:
+        main()
@@ -0,0 +1,102 @@
+"""Benchmark per-label styling cost of the rich help renderer on a 2k-option tree.
+
+Usage: python benchmarks/bench_help_styles.py
+
+Styles every label twice: once with style strings built per label
+(``"dim " + colors.group`` and friends, resolved again by rich for every
+span) and once with the ``Style`` objects compiled by
+``color_config.compiled()``. "Styling" is turning the already laid-out
+labels into rich ``Text`` and rendering that to styled segments; "render" is
+the whole ``--help`` output. Both are medians, for the root and for a command path
+(where ancestor rows are dimmed).
+"""
+
+from __future__ import annotations
+
+import contextlib
+import io
+import statistics
+import time
+
+from treeparse import argument, cli, command, group, option
+from treeparse.utils import help_layout
+from treeparse.utils.help_renderer import help_renderer
+
+
+class string_styles(help_renderer):
+    """The renderer as it was: style strings on every span."""
+
+    _styles = help_layout.help_layout._styles
+
+
+def _cb(**kwargs):
+    """Generated command."""
+
+
+def make_tree(groups: int = 20, commands: int = 20, options: int = 5) -> cli:
+    """``groups * commands * options`` options (2k by default) spread over commands in one level of groups."""
+    app = cli(name="styles", help="Styling benchmark", show_types=True, show_defaults=True)
+    for g in range(groups):
+        grp = group(name=f"g{g}", help="Group help")
+        for c in range(commands):
+            grp.commands.append(
+                command.model_construct(
+                    name=f"cmd{c}",
+                    help="Command help",
+                    callback=_cb,
+                    arguments=[argument(name="target", arg_type=str)],
+                    options=[
+                        option(flags=[f"--opt{o}"], arg_type=int, default=o, help="Option help") for o in range(options)
+                    ],
+                )
+            )
+        app.subgroups.append(grp)
+    return app
+
+
+def time_styling(app: cli, renderer_cls, path: list[str], repeat: int = 5) -> tuple[float, int]:
+    """Median time to turn every label into rich ``Text`` and resolve its styles, and the label count."""
+    renderer = renderer_cls(app)
+    console = renderer.console
+    effective_path, _, _ = renderer._header(path)
+    _, labels = renderer._labels(effective_path, False)
+    labels = list(labels)
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for spans in labels:
+            list(renderer._text(spans).render(console))
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples), len(labels)
+
+
+def time_render(app: cli, renderer_cls, path: list[str], repeat: int = 5) -> float:
+    samples = []
+    for _ in range(repeat):
+        app._memo("help").clear()
+        renderer = renderer_cls(app)
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            renderer.render(path)
+            samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    app = make_tree()
+    app.help_budget = None
+    app._resolve_version()
+    for title, path in (("root", []), ("command path", ["g0", "cmd0"])):
+        before, labels = time_styling(app, string_styles, path)
+        after, _ = time_styling(app, help_renderer, path)
+        print(
+            f"{title:13s} labels={labels:5d}  styling: strings {before / labels * 1e6:5.1f} us/label  "
+            f"compiled {after / labels * 1e6:5.1f} us/label"
+        )
+        before = time_render(app, string_styles, path)
+        after = time_render(app, help_renderer, path)
+        print(f"{'':28s} render:  strings {before * 1000:7.1f} ms        compiled {after * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
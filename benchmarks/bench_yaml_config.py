@@ -0,0 +1,87 @@
+"""Benchmark cli invocations that load a 1 MB YAML config.
+
+Usage: python benchmarks/bench_yaml_config.py
+
+Each invocation is a fresh interpreter running a one-command cli with
+``yml_config`` set. It prints the median wall time of an invocation that
+parses the file with PyYAML's pure-Python ``SafeLoader`` (as before), with
+libyaml's ``CSafeLoader`` (when PyYAML has it), and with ``cache_dir`` set so
+the parsed config is read back from its pickle.
+"""
+
+from __future__ import annotations
+
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import yaml
+
+CHILD = """
+import os
+import yaml
+from treeparse import cli, command, option
+from treeparse.utils import helpers
+
+mode, config, cache_dir = os.environ["BENCH_YAML"].split(os.pathsep)
+if mode == "pure":
+    helpers._SafeLoader = yaml.SafeLoader
+
+def show(level: int):
+    pass
+
+cli(
+    name="tool",
+    yml_config=config,
+    cache_dir=cache_dir if mode == "cached" else None,
+    commands=[command(name="show", callback=show, options=[option(flags=["--level"], arg_type=int, default=1)])],
+).run()
+"""
+
+
+def make_config(path: Path, target_bytes: int = 1 << 20) -> None:
+    """``level`` plus a ``shared`` section of nested service settings, about ``target_bytes`` long."""
+    services = {}
+    i = 0
+    text = ""
+    while len(text) < target_bytes:
+        for _ in range(200):
+            services[f"service-{i}"] = {
+                "host": f"host-{i}.example.com",
+                "port": 8000 + i % 1000,
+                "enabled": i % 3 != 0,
+                "tags": ["alpha", "beta", f"t{i % 17}"],
+                "limits": {"cpu": 0.5 + i % 4, "memory": f"{128 * (1 + i % 8)}Mi"},
+            }
+            i += 1
+        text = yaml.safe_dump({"level": 3, "shared": services})
+    path.write_text(text)
+
+
+def time_invocations(mode: str, config: Path, cache_dir: Path, repeat: int = 5) -> float:
+    env = {**os.environ, "BENCH_YAML": os.pathsep.join([mode, str(config), str(cache_dir)])}
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-W", "ignore", "-c", CHILD, "show"], check=True, env=env)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        config = Path(tmp) / "config.yml"
+        make_config(config)
+        cache_dir = Path(tmp) / "cache"
+        print(f"config: {config.stat().st_size / 1024:.0f} KiB")
+        modes = ["pure", "libyaml", "cached"] if hasattr(yaml, "CSafeLoader") else ["pure", "cached"]
+        for mode in modes:
+            print(f"{mode:8s} {time_invocations(mode, config, cache_dir) * 1000:8.1f} ms per invocation")
+
+
+if __name__ == "__main__":
+    main()
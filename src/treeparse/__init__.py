@@ -8,14 +8,17 @@ from .models.cli import cli
 from .models.command import command
 from .models.group import group
 from .models.option import option
+from .models.resource import resource
 from .testing import cli_result, cli_runner
 from .utils.color_config import color_config
+from .utils.result_cache import cache_config
 
 # Model rebuilds (forward-reference resolution) live in ``models/__init__.py``,
 # which runs first when the submodules above are imported.
 
 __all__ = [
     "argument",
+    "cache_config",
     "chain",
     "cli",
     "cli_result",
@@ -24,4 +27,5 @@ __all__ = [
     "command",
     "group",
     "option",
+    "resource",
 ]
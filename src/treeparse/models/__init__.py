@@ -9,14 +9,16 @@ from .cli import cli
 from .command import command
 from .group import group
 from .option import option
+from .resource import resource
 
 # Rebuild models to handle forward references
 argument.model_rebuild()
 option.model_rebuild()
+resource.model_rebuild()
 command.model_rebuild()
 chain.model_rebuild()
 group.model_rebuild()
 cli.model_rebuild()
 color_config.model_rebuild()
 
-__all__ = ["argument", "option", "command", "chain", "group", "cli", "color_config"]
+__all__ = ["argument", "option", "resource", "command", "chain", "group", "cli", "color_config"]
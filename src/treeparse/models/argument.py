@@ -4,10 +4,13 @@ from __future__ import annotations
 
 from typing import Any
 
-from pydantic import BaseModel
+from pydantic import field_validator
 
+from ..utils.choices import choice_index
+from ..utils.tracking import tracked_model
 
-class argument(BaseModel):
+
+class argument(tracked_model):
     """Positional argument model."""
 
     name: str
@@ -19,3 +22,8 @@ class argument(BaseModel):
     choices: list[Any] | None = None
     sort_key: int = 0
     show_type: bool = True
+
+    @field_validator("choices")
+    @classmethod
+    def index_choices(cls, v):
+        return None if v is None else choice_index(v)
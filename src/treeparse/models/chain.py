@@ -2,14 +2,16 @@
 
 from __future__ import annotations
 
-from pydantic import BaseModel, computed_field, model_validator
+from pydantic import computed_field, model_validator
 
+from ..utils.metadata import metadata_store
+from ..utils.tracking import tracked_model
 from .argument import argument
 from .command import command
 from .option import option
 
 
-class chain(BaseModel):
+class chain(tracked_model):
     """Chain model that aggregates commands."""
 
     name: str
@@ -56,10 +58,10 @@ class chain(BaseModel):
                 all_opts.append(opt)
         return all_opts
 
-    def validate(self):
+    def validate(self, injected: frozenset[str] = frozenset(), metadata: metadata_store | None = None):
         """Validate chained commands."""
         for cmd in self.chained_commands:
-            cmd.validate()
+            cmd.validate(injected, metadata)
         # Access effective to trigger any conflicts
         _ = self.effective_arguments
         _ = self.effective_options
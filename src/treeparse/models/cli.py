@@ -3,26 +3,49 @@
 from __future__ import annotations
 
 import argparse
+import atexit
+import hashlib
 import inspect
 import json
+import os
 import sys
-import warnings
+from collections import OrderedDict
+from contextlib import redirect_stdout
 from enum import EnumMeta
 from pathlib import Path
-from typing import Callable, List, Union, get_origin
+from typing import Any, Callable, List, Union, get_origin
 
-from pydantic import PrivateAttr, computed_field, model_validator
-from rich.console import Console
-from rich.syntax import Syntax
+from pydantic import Field, PrivateAttr, computed_field, model_validator
 
+from ..utils.choices import choice_index
 from ..utils.color_config import color_config, color_theme
-from ..utils.help_renderer import help_renderer
-from ..utils.helpers import load_yaml_config
+from ..utils.config_index import config_index
+from ..utils.config_layers import config_layers, config_overlay
+from ..utils.docs_export import docs_report, export_docs
+from ..utils.executor import map_processes, map_threads, process_executor
+from ..utils.fingerprint import fingerprint_memo, tree_fingerprint
+from ..utils.helpers import default_cache_dir, package_version
+from ..utils.metadata import metadata_store
+from ..utils.pager import pager_writer
+from ..utils.plain_renderer import plain_output, plain_renderer
+from ..utils.result_cache import result_cache, tee_writer
+from ..utils.search_index import search_hit, search_index
+from ..utils.spec import from_spec, to_spec
+from ..utils.structure_export import (
+    compact_dict,
+    compact_report,
+    export_compact,
+    stream_structure,
+    structure_json,
+    write_structure_json,
+)
+from ..utils.tracking import construction_site, revision, source_stamp
 from .argument import argument
 from .chain import chain
 from .command import _name_mismatch_error, _type_mismatch_error, command
 from .group import group
 from .option import option
+from .resource import close_instance, resource, resource_session
 
 
 def str2bool(v):
@@ -37,19 +60,75 @@ def str2bool(v):
         raise argparse.ArgumentTypeError("Boolean value expected.")
 
 
-def chain_runner(chain_obj: chain, **kwargs):
-    """Runner function for chain commands."""
+def chain_runner(chain_obj: chain, _call=None, **kwargs):
+    """Runner function for chain commands.
+
+    ``_call(sub_cmd, kwargs)`` replaces the direct callback call for each step;
+    the dispatcher uses it to inject resources.
+    """
     for sub_cmd in chain_obj.chained_commands:
-        _, sig = sub_cmd._callback_sig
-        sub_kwargs = {k: kwargs.get(k) for k in sig.parameters if k in kwargs}
+        if _call is not None:
+            _call(sub_cmd, kwargs)
+            continue
+        sub_kwargs = {k: kwargs.get(k) for k in sub_cmd._callback_meta().params if k in kwargs}
         sub_cmd.callback(**sub_kwargs)
 
 
+def _console():
+    """A fresh rich ``Console``; rich is imported on first use so plain help never loads it."""
+    from rich.console import Console
+
+    return Console()
+
+
+def _keep_open(_instance):
+    """Group setup hook results are owned by the hook, not closed by treeparse."""
+
+
+class _tracked_store(argparse._StoreAction):
+    """``store`` that records its dest in the parser's ``explicit`` set."""
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        parser.explicit.add(self.dest)
+        super().__call__(parser, namespace, values, option_string)
+
+
+class _tracked_store_true(argparse._StoreTrueAction):
+    """``store_true`` that records its dest in the parser's ``explicit`` set."""
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        parser.explicit.add(self.dest)
+        super().__call__(parser, namespace, values, option_string)
+
+
 class rich_argument_parser(argparse.ArgumentParser):
-    """Custom ArgumentParser with rich-formatted errors."""
+    """Custom ArgumentParser with rich-formatted errors.
+
+    ``choices_limit`` caps how many choices an invalid-choice error lists
+    (``cli.help_choices``). ``explicit`` collects the dests given on the
+    command line; subparsers share their parent's set.
+    """
+
+    def __init__(self, *args, choices_limit: int | None = None, explicit: set[str] | None = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.choices_limit = choices_limit
+        self.explicit = set() if explicit is None else explicit
+        self.register("action", None, _tracked_store)
+        self.register("action", "store", _tracked_store)
+        self.register("action", "store_true", _tracked_store_true)
+
+    def _check_value(self, action, value):
+        choices = action.choices
+        limit = self.choices_limit
+        if isinstance(choices, list) and limit is not None and len(choices) > limit and value not in choices:
+            shown = ", ".join(map(repr, choices[:limit]))
+            raise argparse.ArgumentError(
+                action, f"invalid choice: {value!r} (choose from {shown}, … (+{len(choices) - limit:,} more))"
+            )
+        super()._check_value(action, value)
 
     def error(self, message):
-        console = Console()
+        console = _console()
         if "invalid choice" in message:
             parts = message.split("invalid choice: ")
             if len(parts) > 1:
@@ -74,11 +153,56 @@ class cli(group):
     show_defaults: bool = True
     line_connect: bool = False
     yml_config: Path | None = None
+    """Option defaults by dest or dotted command path (see ``config_index``), applied when a command is dispatched.
+
+    Help shows each configured default with its source file."""
     callback: Callable[..., None] | None = None
+    """Command callback for a flat cli; otherwise the root setup hook (see ``group.callback``)."""
     version: str | None = None
+    cache_dir: Path | None = None
+    """Root directory for on-disk caches. Command result caches fall back to ``default_cache_dir()``."""
+    help_depth: int | None = Field(default=None, ge=1)
+    """Levels shown below the selected node in help; deeper groups are folded. ``--help-depth N`` overrides."""
+    help_budget: int | None = 500
+    """Row limit for help without a depth limit: the deepest levels that fit are shown, the rest folded."""
+    help_choices: int | None = Field(default=10, ge=1)
+    """Choices shown per argument/option in help; longer lists end in ``… (+N more)``. ``--help-choices`` lists all."""
+    help_pager: bool = True
+    """Page help that is taller than the terminal (``TREEPARSE_PAGER``/``PAGER``, else ``less -R``)."""
+    layered_config: bool = False
+    """Also read system, user, ``pyproject.toml``, project and ``$<NAME>_CONFIG`` config (see ``config_layers``)."""
+    envvar_prefix: str | None = None
+    """Read options not on the command line from ``<PREFIX>_<KEY>`` environment variables (see ``config_index``)."""
+    structure_version: str | None = None
+    """Identity of the tree in on-disk help/JSON/search cache keys. By default the stamps of the files the tree
+    was built from (see ``tracking.source_stamp``); set it when the tree depends on anything else."""
 
     _parser: argparse.ArgumentParser | None = PrivateAttr(default=None)
     _max_depth: int | None = PrivateAttr(default=None)
+    _fingerprint_memo: fingerprint_memo = PrivateAttr(default_factory=fingerprint_memo)
+    _metadata: metadata_store = PrivateAttr(default_factory=metadata_store)
+    _process_resources: dict = PrivateAttr(default_factory=dict)
+    _atexit_registered: bool = PrivateAttr(default=False)
+    _process_pool: process_executor | None = PrivateAttr(default=None)
+    _skip_validation: bool = PrivateAttr(default=False)
+    _config_index: config_index | None = PrivateAttr(default=None)
+    _config_overlay: config_overlay | None = PrivateAttr(default=None)
+    _envvar_options: bool = PrivateAttr(default=False)
+    _memos: dict[str, OrderedDict] = PrivateAttr(default_factory=dict)
+    _memo_revision: int | None = PrivateAttr(default=None)
+    _disk_key: str | None = PrivateAttr(default=None)
+    _built_at: str = PrivateAttr(default="")
+
+    def model_post_init(self, context: Any) -> None:
+        super().model_post_init(context)
+        self._built_at = "%s:%d" % construction_site()
+
+    def __getstate__(self) -> dict[str, Any]:
+        # Parser, pools, resources and memos belong to this process; a copy
+        # pickled to a worker starts without them.
+        state = super().__getstate__()
+        state["__pydantic_private__"] = {name: attr.get_default() for name, attr in self.__private_attributes__.items()}
+        return state
 
     @model_validator(mode="after")
     def set_colors_from_theme(self):
@@ -116,6 +240,74 @@ class cli(group):
         self._max_depth = recurse(self)
         return self._max_depth
 
+    def fingerprint(self) -> str:
+        """Stable content hash of the tree and display settings, for cache keys.
+
+        It covers names, help, flags, types, defaults, choices, ordering,
+        callback identities and docstrings, the theme and the help settings:
+        anything that changes ``--help`` or ``--json`` output changes it. The
+        same tree gives the same hash in every process.
+
+        Hashes of the subtrees below the root are memoized; the root's own
+        fields are re-read on every call. Assigning a field of any node,
+        option or argument, or modifying one of their lists, rehashes just
+        that node and its ancestors on the next call.
+        """
+        return tree_fingerprint(self, self._fingerprint_memo)
+
+    def invalidate_fingerprint(self, *nodes: group | command | chain) -> None:
+        """Rehash ``nodes`` and their ancestors on the next ``fingerprint()``; with no nodes, the whole tree.
+
+        Only needed for changes the models cannot see, such as a callback's
+        ``__doc__`` or a mutable ``default`` modified in place.
+        """
+        if nodes:
+            self._fingerprint_memo.invalidate(nodes)
+        else:
+            self._fingerprint_memo.clear()
+
+    def _memo(self, name: str) -> OrderedDict:
+        """This cli's in-memory cache ``name`` (rendered help, JSON, search index).
+
+        All of them are emptied once any tree model changed in place since
+        they were last used (``tracking.revision``), so their keys need not
+        identify the tree.
+        """
+        self._drop_stale_memos()
+        return self._memos.setdefault(name, OrderedDict())
+
+    def _drop_stale_memos(self):
+        current = revision()
+        if current != self._memo_revision:
+            if self._memo_revision is not None:
+                self._memos.clear()
+                self._disk_key = ""
+            self._memo_revision = current
+
+    def _disk_token(self) -> str | None:
+        """Identity of the tree for on-disk cache keys, found without walking it; None to skip disk caches.
+
+        It digests ``structure_version`` (else ``source_stamp()``) and where
+        the root was built. After an in-place change that follows the first
+        cached output, neither describes the tree, so disk caches are
+        skipped for the rest of the process.
+        """
+        self._drop_stale_memos()
+        if self._disk_key is None:
+            basis = self.structure_version if self.structure_version is not None else source_stamp()
+            payload = json.dumps([self.name, self._built_at, basis])
+            self._disk_key = hashlib.sha256(payload.encode()).hexdigest()
+        return self._disk_key or None
+
+    @property
+    def metadata(self) -> metadata_store:
+        """Docstring and signature metadata of every callback in the tree, introspected once each.
+
+        ``metadata.save(path)`` persists it; ``metadata.load(path)`` in a later
+        process lets help and JSON output skip ``inspect`` for known callbacks.
+        """
+        return self._metadata
+
     def _get_node_from_path(self, path: list[str]) -> group | command | chain | "cli":
         """Get node from path."""
         current: "cli" | group | command | chain = self
@@ -129,56 +321,161 @@ class cli(group):
             current = ch
         return current
 
-    def structure_dict(self):
-        """Return a dictionary representation of the CLI structure."""
-
-        def recurse(node: "cli" | group | command | chain, is_root: bool = True):
-            d = {"name": node.name, "help": node.help}
-            if hasattr(node, "sort_key"):
-                d["sort_key"] = node.sort_key
-            node_opts = node.options if hasattr(node, "options") else []
-            d["options"] = [
-                {
-                    **opt.model_dump(exclude={"arg_type"}),
-                    "arg_type": opt.arg_type.__name__,
-                    "choices": opt.choices,
-                }
-                for opt in sorted(node_opts, key=lambda x: x.sort_key)
-            ]
-            node_args = node.arguments if hasattr(node, "arguments") else []
-            d["arguments"] = [
-                {
-                    **arg.model_dump(exclude={"arg_type"}),
-                    "arg_type": arg.arg_type.__name__,
-                    "choices": arg.choices,
-                }
-                for arg in sorted(node_args, key=lambda x: x.sort_key)
-            ]
-            if isinstance(node, command) or (isinstance(node, cli) and node.is_flat and node.callback is not None):
-                d["type"] = "command"
-                d["callback"] = node.callback.__name__
-                d["docstring"] = inspect.getdoc(inspect.unwrap(node.callback)) or ""
-            elif isinstance(node, chain):
-                d["type"] = "chain"
-                d["chained"] = [recurse(c, False) for c in node.chained_commands]
-                parts = []
-                for cmd in node.chained_commands:
-                    doc = inspect.getdoc(inspect.unwrap(cmd.callback)) or ""
-                    if doc:
-                        parts.append({"command": cmd.name, "docstring": doc})
-                d["docstring"] = parts
+    def _structure_path(self, path: list[str]) -> tuple[list, list[argument], list[option]]:
+        """Nodes along ``path`` (root first) and the ancestor arguments/options the last one inherits.
+
+        Words after a command or chain are its positional values and are
+        ignored; a word naming no child of a group raises ValueError.
+        """
+        nodes: list = [self]
+        inherited_args: list[argument] = []
+        inherited_opts: list[option] = []
+        for p in path:
+            current = nodes[-1]
+            if not hasattr(current, "subgroups"):
+                break
+            child = next((c for c in current.subgroups + current.commands if c.display_name == p), None)
+            if child is None:
+                where = " ".join(n.display_name for n in nodes)
+                raise ValueError(f"no group or command '{p}' in '{where}'")
+            inherited_args = inherited_args + current.arguments
+            inherited_opts = [o for o in inherited_opts + current.options if o.inherit]
+            nodes.append(child)
+        return nodes, inherited_args, inherited_opts
+
+    @staticmethod
+    def _param_dicts(items: list[option] | list[argument]) -> list[dict]:
+        return [
+            {
+                **item.model_dump(exclude={"arg_type"}),
+                "arg_type": item.arg_type.__name__,
+                "choices": item.choices,
+            }
+            for item in sorted(items, key=lambda x: x.sort_key)
+        ]
+
+    def _structure_fields(self, node: "cli" | group | command | chain, is_root: bool) -> dict:
+        """Everything ``structure_dict`` exports for ``node`` except its children."""
+        d = {"name": node.name, "help": node.help}
+        if hasattr(node, "sort_key"):
+            d["sort_key"] = node.sort_key
+        d["options"] = self._param_dicts(node.options if hasattr(node, "options") else [])
+        d["arguments"] = self._param_dicts(node.arguments if hasattr(node, "arguments") else [])
+        if isinstance(node, command) or (isinstance(node, cli) and node.is_flat and node.callback is not None):
+            d["type"] = "command"
+            d["callback"] = node.callback.__name__
+            d["docstring"] = self._metadata.doc(node.callback)
+        elif isinstance(node, chain):
+            d["type"] = "chain"
+            d["chained"] = [self._structure_fields(c, False) for c in node.chained_commands]
+            parts = []
+            for cmd in node.chained_commands:
+                doc = self._metadata.doc(cmd.callback)
+                if doc:
+                    parts.append({"command": cmd.name, "docstring": doc})
+            d["docstring"] = parts
+        else:
+            if is_root:
+                d["type"] = "cli"
             else:
-                if is_root:
-                    d["type"] = "cli"
-                else:
-                    d["type"] = "group"
-            if hasattr(node, "subgroups"):
-                d["subgroups"] = [recurse(g, is_root=False) for g in sorted(node.subgroups, key=lambda x: x.sort_key)]
-            if hasattr(node, "commands"):
-                d["commands"] = [recurse(c, is_root=False) for c in sorted(node.commands, key=lambda x: x.sort_key)]
+                d["type"] = "group"
+        return d
+
+    @staticmethod
+    def _structure_children(node: "cli" | group | command | chain, level: int, depth: int | None) -> dict:
+        """``subgroups``/``commands`` (sorted nodes) of ``node``, or ``truncated`` at the depth limit."""
+        if not hasattr(node, "subgroups"):
+            return {}
+        if depth is not None and level >= depth:
+            return {"truncated": True} if node.subgroups or node.commands else {}
+        return {
+            "subgroups": sorted(node.subgroups, key=lambda x: x.sort_key),
+            "commands": sorted(node.commands, key=lambda x: x.sort_key),
+        }
+
+    def _structure_root(self, path: list[str] | None) -> tuple["cli" | group | command | chain, dict]:
+        """The node at ``path`` and the fields a scoped export adds to it (none at the root)."""
+        nodes, inherited_args, inherited_opts = self._structure_path(path or [])
+        if len(nodes) == 1:
+            return self, {}
+        return nodes[-1], {
+            "path": [n.display_name for n in nodes[1:]],
+            "inherited_arguments": self._param_dicts(inherited_args),
+            "inherited_options": self._param_dicts(inherited_opts),
+        }
+
+    def structure_dict(self, path: list[str] | None = None, depth: int | None = None):
+        """Return a dictionary representation of the CLI structure.
+
+        ``path`` selects a subtree; its root also lists the arguments and
+        options it inherits from its ancestors (``inherited_arguments``,
+        ``inherited_options``) and its ``path``. ``depth`` limits how many
+        levels below it are exported; groups at the limit are marked
+        ``truncated`` instead of listing their children.
+        """
+
+        def recurse(node: "cli" | group | command | chain, is_root: bool, level: int):
+            d = self._structure_fields(node, is_root)
+            for key, value in self._structure_children(node, level, depth).items():
+                d[key] = [recurse(c, False, level + 1) for c in value] if isinstance(value, list) else value
             return d
 
-        return recurse(self, is_root=True)
+        node, scope = self._structure_root(path)
+        return {**recurse(node, node is self, 0), **scope}
+
+    def write_json(
+        self, stream, path: list[str] | None = None, depth: int | None = None, indent: int | None = None
+    ) -> None:
+        """Write ``json.dumps(self.structure_dict(path, depth), indent=indent)`` to ``stream`` as it is produced.
+
+        One node is held at a time, so memory does not grow with the tree.
+        ``stream`` is any object with ``write(str)``.
+        """
+        stream_structure(self, stream.write, path, depth, indent)
+
+    def to_spec(self) -> dict:
+        """JSON-safe description of the whole tree for ``from_spec``.
+
+        Callbacks, setup hooks, resource factories and custom ``arg_type`` values
+        are recorded by import path (``module:qualname``), so each must be
+        importable under that name; lambdas and nested functions raise
+        ValueError. Callback docstrings and parameter names are included, as
+        is the resolved version.
+        """
+        return to_spec(self)
+
+    @classmethod
+    def from_spec(cls, source: str | Path | dict, validate: bool = False) -> "cli":
+        """Build a cli from a ``to_spec`` dict or a ``.json``/``.yml``/``.yaml`` file holding one.
+
+        Callbacks are bound lazily: each module is imported on the first call
+        of a callback from it, and help and ``--json`` are served from the
+        docstrings stored in the spec. Callbacks are not checked against their
+        arguments and options, as the spec was written from a validated tree;
+        ``validate=True`` imports them all up front and runs the usual checks.
+        """
+        return from_spec(cls, source, validate)
+
+    def compact_dict(self, path: list[str] | None = None, depth: int | None = None) -> dict:
+        """Token-efficient ``structure_dict``: no defaults or empty fields, repeated options shared.
+
+        This is the ``--json-compact`` output; see ``export_compact`` for a
+        chunked version that agents can load one top-level group at a time.
+        """
+        return compact_dict(self.structure_dict(path, depth))
+
+    def export_compact(self, directory: str | Path) -> compact_report:
+        """Write the compact structure to ``directory`` as ``index.json`` plus one chunk per top-level group.
+
+        The index holds the root and its top-level commands in full and
+        names each group's chunk file; a chunk holds that group's subtree
+        and the options it inherits. Chunks of groups that no longer exist
+        are removed. The report compares the size of each format.
+
+        Raises ``ValueError``, before writing anything, when a group would be
+        written to ``index.json`` or two groups to the same chunk file.
+        """
+        return export_compact(self, directory)
 
     def build_parser(self) -> argparse.ArgumentParser:
         """Build argparse parser from CLI structure (cached after first call).
@@ -187,9 +484,12 @@ class cli(group):
         """
         if self._parser is not None:
             return self._parser
-        self._validate()
+        if not self._skip_validation:
+            self._validate()
         max_depth = self.get_max_depth()
-        parser = rich_argument_parser(prog=self.display_name, description=self.help, add_help=False)
+        parser = rich_argument_parser(
+            prog=self.display_name, description=self.help, add_help=False, choices_limit=self.help_choices
+        )
         self._add_args_and_opts_to_parser(parser, self.arguments, self.options)
         if self.is_flat:
             if self.callback is not None:
@@ -219,12 +519,14 @@ class cli(group):
                 except KeyError:
                     raise ValueError(s)
 
-            return _enum_conv, list(arg_type)
+            return _enum_conv, choice_index(arg_type)
         return arg_type, None
 
     def _add_args_and_opts_to_parser(self, parser: argparse.ArgumentParser, args: list[argument], opts: list[option]):
         for opt in opts:
             dest = opt.get_dest()
+            if opt.envvar:
+                self._envvar_options = True
             if opt.flag:
                 parser.add_argument(*opt.flags, action="store_true", dest=dest, help=opt.help)
                 continue
@@ -237,9 +539,12 @@ class cli(group):
                 kwargs["nargs"] = opt.nargs
             if opt.choices is not None:
                 kwargs["choices"] = opt.choices
+                if self._choices_truncated(opt.choices):
+                    # argparse would otherwise spell out every choice in usage lines.
+                    kwargs["metavar"] = dest.upper()
             elif enum_choices is not None:
                 kwargs["choices"] = enum_choices
-            if opt.required:
+            if opt.required and not self._fillable(opt):
                 kwargs["required"] = True
             parser.add_argument(*opt.flags, **kwargs)
         for arg in args:
@@ -255,10 +560,15 @@ class cli(group):
                 kwargs["default"] = None
             if arg.choices is not None:
                 kwargs["choices"] = arg.choices
+                if self._choices_truncated(arg.choices):
+                    kwargs["metavar"] = arg.name
             elif enum_choices is not None:
                 kwargs["choices"] = enum_choices
             parser.add_argument(arg.name, **kwargs)
 
+    def _choices_truncated(self, choices: list) -> bool:
+        return self.help_choices is not None and len(choices) > self.help_choices
+
     def _build_subparser(
         self,
         parent_parser: argparse.ArgumentParser,
@@ -279,7 +589,13 @@ class cli(group):
         if children:
             subparsers = parent_parser.add_subparsers(dest=f"command_{depth}")
             for child in children:
-                child_parser = subparsers.add_parser(child.display_name, help=child.help, add_help=False)
+                child_parser = subparsers.add_parser(
+                    child.display_name,
+                    help=child.help,
+                    add_help=False,
+                    choices_limit=self.help_choices,
+                    explicit=parent_parser.explicit,
+                )
                 if isinstance(child, group):
                     self._add_args_and_opts_to_parser(
                         child_parser,
@@ -302,9 +618,24 @@ class cli(group):
                     )
                     if isinstance(child, command):
                         child_parser.set_defaults(func=child.callback)
+                        if child.cache is not None:
+                            self._add_cache_flags(child_parser)
+                        if child.map_over is not None:
+                            child_parser.add_argument(
+                                "--jobs", type=int, dest="_jobs", help=f"Parallel calls over {child.map_over}"
+                            )
                     else:
                         child_parser.set_defaults(func=chain_runner, chain_obj=child)
 
+    @staticmethod
+    def _add_cache_flags(parser: argparse.ArgumentParser):
+        parser.add_argument(
+            "--no-cache", action="store_true", dest="_no_cache", help="Bypass the result cache for this call"
+        )
+        parser.add_argument(
+            "--refresh", action="store_true", dest="_refresh_cache", help="Re-run and overwrite the cached result"
+        )
+
     def _validate(self):
         """Validate all commands in the CLI structure, considering inherited options and arguments."""
         if self.is_flat and self.callback is not None:
@@ -316,13 +647,14 @@ class cli(group):
                 arguments=self.arguments,
                 options=self.options,
             )
-            temp.validate()
+            temp.validate(frozenset(r.name for r in self.resources), self._metadata)
             return
 
         def recurse(
             node: "cli" | group | command | chain,
             inherited_args: list[argument] | None = None,
             inherited_opts: list[option] | None = None,
+            injected: frozenset[str] = frozenset(),
         ):
             inherited_args = inherited_args or []
             inherited_opts = inherited_opts or []
@@ -331,35 +663,42 @@ class cli(group):
                 inheritable_opts = [opt for opt in inherited_opts if opt.inherit]
                 effective_args = inherited_args + node.arguments
                 effective_opts = inheritable_opts + node.options
+                node._check_map_over()
                 provided = {}
                 for arg in effective_args:
                     dest = arg.dest or arg.name
                     arg_type = arg.arg_type
-                    if arg.nargs in ["*", "+"]:
+                    if arg.nargs in ["*", "+"] and dest != node.map_over:
                         arg_type = List[arg_type]
                     provided[dest] = arg_type
                 for opt in effective_opts:
                     dest = opt.get_dest()
                     opt_type = opt.arg_type
-                    if opt.nargs in ["*", "+"]:
+                    if opt.nargs in ["*", "+"] and dest != node.map_over:
                         opt_type = List[opt_type]
                     provided[dest] = opt_type
-                unwrapped_cb, sig = node._callback_sig
-                if inspect.iscoroutinefunction(unwrapped_cb):
+                meta = node._callback_meta(self._metadata)
+                if meta.is_async:
                     raise ValueError(
                         f"Callback for command '{node.name}' is async; treeparse does not support async callbacks"
                     )
-                param_names = set(sig.parameters.keys())
+                shadowed = injected & set(provided)
+                if shadowed:
+                    raise ValueError(
+                        f"command '{node.name}': resource name(s) {sorted(shadowed)} clash with argument/option dests"
+                    )
+                param_names = set(meta.params) - injected
+                sig = meta.signature
                 param_types = {
-                    k: v.annotation for k, v in sig.parameters.items() if v.annotation != inspect.Parameter.empty
+                    k: v.annotation
+                    for k, v in sig.parameters.items()
+                    if v.annotation != inspect.Parameter.empty and k not in injected
                 }
                 provided_names = set(provided.keys())
                 if param_names != provided_names:
                     missing = param_names - provided_names
                     extra = provided_names - param_names
-                    raise ValueError(
-                        _name_mismatch_error(node.name, unwrapped_cb.__name__, sig, provided, missing, extra)
-                    )
+                    raise ValueError(_name_mismatch_error(node.name, meta.name, sig, provided, missing, extra))
                 type_mismatches = []
                 for param, p_type in param_types.items():
                     cli_type = provided.get(param)
@@ -374,7 +713,7 @@ class cli(group):
                     elif cli_type != p_type:
                         type_mismatches.append((param, p_type, cli_type))
                 if type_mismatches:
-                    raise ValueError(_type_mismatch_error(node.name, unwrapped_cb.__name__, sig, type_mismatches))
+                    raise ValueError(_type_mismatch_error(node.name, meta.name, sig, type_mismatches))
                 # Check defaults against choices (only local)
                 for arg in node.arguments:
                     if arg.choices is not None and arg.default is not None:
@@ -403,56 +742,255 @@ class cli(group):
                                     f"Default value {opt.default} not in choices {opt.choices} for option '{opt.flags[0]}' in command '{node.name}'"  # noqa: E501
                                 )
             elif isinstance(node, chain):
-                node.validate()
+                node.validate(injected, self._metadata)
             else:
                 default = getattr(node, "default", None)
                 if default is not None and default not in {c.name for c in node.commands}:
                     raise ValueError(f"group '{node.name}': default '{default}' does not match any child command")
+                child_injected = injected | {r.name for r in node.resources}
+                if node.callback is not None:
+                    available = (
+                        child_injected
+                        | {a.dest or a.name for a in inherited_args + node.arguments}
+                        | {o.get_dest() for o in inherited_opts + node.options}
+                    )
+                    hook_params = set(self._metadata.get(node.callback).params)
+                    unknown = hook_params - available
+                    if unknown:
+                        raise ValueError(
+                            f"group '{node.name}': callback parameter(s) {sorted(unknown)} match no argument, "
+                            "option, resource or outer context"
+                        )
+                    child_injected = child_injected | {node.context_name}
                 for cmd in node.commands:
                     recurse(
                         cmd,
                         inherited_args + node.arguments,
                         inherited_opts + node.options,
+                        child_injected,
                     )
                 for grp in node.subgroups:
                     recurse(
                         grp,
                         inherited_args + node.arguments,
                         inherited_opts + node.options,
+                        child_injected,
                     )
 
         recurse(self, [], [])
 
-    def _apply_yaml_config(self, config: dict):
-        """Walk the full CLI tree and apply config overrides to all options by dest.
+    def _config_keys(self) -> config_index:
+        """Index of the config keys of this tree (built on first use)."""
+        if self._config_index is None:
+            self._config_index = config_index(self)
+        return self._config_index
 
-        Emits warnings for unrecognized config keys.
+    def _overlay(self) -> config_overlay | None:
+        """Config defaults of this invocation, read on demand; None without ``yml_config``/``layered_config``."""
+        if self._config_overlay is None and (self.yml_config is not None or self.layered_config):
+            self._config_overlay = config_overlay(self._config_keys(), config_layers(self), self.cache_dir)
+        return self._config_overlay
+
+    def _fillable(self, opt: option) -> bool:
+        """Whether ``opt`` can be set from the environment or config; ``_apply_config`` then enforces ``required``."""
+        return bool(opt.envvar) or self.envvar_prefix is not None or self.yml_config is not None or self.layered_config
+
+    def _uses_envvars(self) -> bool:
+        """Whether any option can be set from the environment (known once the parser is built)."""
+        return self.envvar_prefix is not None or self._envvar_options
+
+    def _envvar(self, opt: option) -> tuple[str, str] | None:
+        """``(value, name)`` of the first non-empty environment variable that sets ``opt``, or None."""
+        for name in self._config_keys().envvars.get(id(opt), ()):
+            value = os.environ.get(name)
+            if value:
+                return value, name
+        return None
+
+    def _envvar_value(self, parser: rich_argument_parser, opt: option, raw: str, name: str) -> Any:
+        """``raw`` converted like command-line values of ``opt``; whitespace separates the items of nargs options."""
+        convert = str2bool if opt.flag else self._resolve_arg_type(opt.arg_type)[0]
+        many = opt.nargs is not None and opt.nargs != "?"
+        try:
+            values = [convert(item) for item in (raw.split() if many else [raw])]
+        except (TypeError, ValueError, argparse.ArgumentTypeError):
+            values = None
+        if values is None or (opt.choices is not None and any(v not in opt.choices for v in values)):
+            parser.error(f"argument {opt.flags[0]}: invalid value {raw!r} in ${name}")
+        return values if many else values[0]
+
+    def _config_value(self, opt: option, value: Any, source: str) -> Any:
+        """``value`` from config ``source`` for ``opt``, with strings converted like command-line values.
+
+        The value (each item, for a list given to an nargs option) must be
+        one of the option's choices. A bad value is reported like a bad
+        default in the tree: an error and exit status 1.
         """
+        many = opt.nargs is not None and opt.nargs != "?" and isinstance(value, list)
+        items = value if many else [value]
+        if not opt.flag:
+            convert, _ = self._resolve_arg_type(opt.arg_type)
+            try:
+                items = [convert(item) if isinstance(item, str) else item for item in items]
+            except (TypeError, ValueError, argparse.ArgumentTypeError):
+                self._config_error(f"argument {opt.flags[0]}: invalid value {value!r} in config {source}")
+        if opt.choices is not None:
+            for item in items:
+                if item not in opt.choices:
+                    self._config_error(
+                        f"Config value {item} not in choices {list(opt.choices)} for option '{opt.flags[0]}' in {source}"  # noqa: E501
+                    )
+        return items if many else items[0]
 
-        seen_keys = set()
+    @staticmethod
+    def _config_error(message: str):
+        from rich.markup import escape
 
-        def walk(node):
-            if hasattr(node, "options"):
-                for opt in node.options:
-                    dest = opt.get_dest()
-                    if dest in config:
-                        opt.default = config[dest]
-                        seen_keys.add(dest)
-            if hasattr(node, "subgroups"):
-                for g in node.subgroups:
-                    walk(g)
-            if hasattr(node, "commands"):
-                for c in node.commands:
-                    walk(c)
-
-        walk(self)
-        for key in config:
-            if key not in seen_keys:
-                warnings.warn(
-                    f"treeparse YAML config: unrecognized key '{key}'",
-                    UserWarning,
-                    stacklevel=4,
-                )
+        _console().print(f"[bold red]Error:[/bold red] {escape(message)}", highlight=False)
+        sys.exit(1)
+
+    def _config_default(self, opt: option) -> tuple | None:
+        """``(value, source)`` the environment or config sets for ``opt`` where declared, for help; None if unset."""
+        if self._uses_envvars():
+            found = self._envvar(opt)
+            if found is not None:
+                value, name = found
+                return value, f"${name}"
+        overlay = self._overlay()
+        if overlay is None:
+            return None
+        index = self._config_keys()
+        declared = index.owners.get(id(opt))
+        return None if declared is None else overlay.lookup(declared, opt.get_dest())
+
+    def _config_token(self) -> tuple:
+        """Identity of the config files and option environment variables, for caches of output that shows defaults."""
+        overlay = self._overlay()
+        token = () if overlay is None else overlay.token()
+        if self._uses_envvars():
+            names = self._config_keys().envvar_names
+            token += (tuple(sorted((k, v) for k, v in os.environ.items() if k in names)),)
+        return token
+
+    def _apply_config(self, parser: rich_argument_parser, path: list[str], arg_dict: dict):
+        """Fill options on ``path`` that were not given on the command line from the environment or config.
+
+        An option's environment variable wins over config. Only the
+        variables of options on ``path`` are read, and values are looked up
+        per invocation, so neither the tree nor the parser changes; strings
+        are converted like command-line values. Required options that are
+        still unset afterwards are reported as argparse would.
+        """
+        overlay = self._overlay()
+        envvars = self._uses_envvars()
+        if overlay is None and not envvars:
+            return
+        dispatched = ".".join(path)
+        missing = []
+        for declared, opt in self._config_keys().path_options(path):
+            dest = opt.get_dest()
+            if dest in parser.explicit or dest not in arg_dict:
+                continue
+            if envvars:
+                found = self._envvar(opt)
+                if found is not None:
+                    arg_dict[dest] = self._envvar_value(parser, opt, *found)
+                    continue
+            found = None if overlay is None else overlay.lookup(declared, dest, dispatched)
+            if found is None:
+                if opt.required:
+                    missing.append("/".join(opt.flags))
+                continue
+            arg_dict[dest] = self._config_value(opt, *found)
+        if missing:
+            parser.error(f"the following arguments are required: {', '.join(missing)}")
+
+    # Help flags that take a value, as ``--flag VALUE`` or ``--flag=VALUE``.
+    _help_value_flags = ("--help-depth", "--help-search", "--help-choices", "--json-depth")
+
+    @staticmethod
+    def _positive_int(parser: argparse.ArgumentParser, flag: str, value: str | None) -> int | None:
+        """``value`` of a help flag as a positive integer (None when the flag is absent)."""
+        if value is None:
+            return None
+        if not value.isdigit() or int(value) < 1:
+            parser.error(f"argument {flag}: expected a positive integer, got '{value}'")
+        return int(value)
+
+    def _split_help_values(self, argv: list[str], parser: argparse.ArgumentParser) -> tuple[list[str], dict[str, str]]:
+        """Remove value-taking help flags from ``argv`` so their values are not read as a command path."""
+        rest: list[str] = []
+        values: dict[str, str] = {}
+        tokens = iter(argv)
+        for token in tokens:
+            flag, eq, value = token.partition("=")
+            if flag not in self._help_value_flags:
+                rest.append(token)
+                continue
+            if not eq:
+                value = next(tokens, None)
+                if value is None:
+                    parser.error(f"argument {flag}: expected one argument")
+            values[flag] = value
+        return rest, values
+
+    @staticmethod
+    def _argv_words(parser: argparse.ArgumentParser, argv: list[str], stop: list[str]) -> list[str]:
+        """Words of ``argv`` before any of ``stop``, leaving out option values and group arguments.
+
+        Options and a group's positional arguments are looked up in the
+        parser of the command reached so far, so ``--region eu deploy`` and
+        ``user 123 add`` (``user`` taking an ``id``) give ``deploy`` and
+        ``user add``, as parsing would.
+        """
+        words: list[str] = []
+        positionals = cli._group_positionals(parser)
+        i = 0
+        while i < len(argv) and argv[i] not in stop:
+            token = argv[i]
+            i += 1
+            if token.startswith("-"):
+                action = parser._option_string_actions.get(token)
+                if action is None or action.nargs == 0:
+                    continue
+                if action.nargs is None:
+                    i += 1
+                elif isinstance(action.nargs, int):
+                    i += action.nargs
+                else:  # "?", "*" or "+": as many values as follow, at most one for "?"
+                    taken = 0
+                    while i < len(argv) and not argv[i].startswith("-") and (action.nargs != "?" or not taken):
+                        i += 1
+                        taken += 1
+                continue
+            subparsers = next((a for a in parser._actions if isinstance(a, argparse._SubParsersAction)), None)
+            if positionals:
+                nargs = positionals[0]
+                if nargs is None or isinstance(nargs, int):
+                    # A required value: taken even when it names a child, as argparse would.
+                    if nargs is None or nargs <= 1:
+                        positionals.pop(0)
+                    else:
+                        positionals[0] = nargs - 1
+                    continue
+                if subparsers is None or token not in subparsers.choices:
+                    if nargs == "?":
+                        positionals.pop(0)
+                    continue
+                positionals.clear()
+            words.append(token)
+            if subparsers is not None and token in subparsers.choices:
+                parser = subparsers.choices[token]
+                positionals = cli._group_positionals(parser)
+        return words
+
+    @staticmethod
+    def _group_positionals(parser: argparse.ArgumentParser) -> list[int | str | None]:
+        """``nargs`` of each positional argument of a parser with subcommands; empty for a command's parser."""
+        actions = [a for a in parser._actions if not a.option_strings]
+        if not any(isinstance(a, argparse._SubParsersAction) for a in actions):
+            return []
+        return [a.nargs for a in actions if not isinstance(a, argparse._SubParsersAction)]
 
     def _apply_group_defaults(self, argv: list[str]) -> list[str]:
         """Rewrite argv so groups with a ``default`` route to it.
@@ -486,19 +1024,19 @@ class cli(group):
 
     def run(self):
         """Run the CLI."""
-        console = Console()
-        # Load YAML config before building parser so defaults take effect
-        if self.yml_config:
-            config = load_yaml_config(str(self.yml_config))
-            self._apply_yaml_config(config)
-            # Invalidate parser cache so new defaults are picked up
-            self._parser = None
-            self._max_depth = None
+        # Config files are looked up afresh for every invocation.
+        self._config_overlay = None
         try:
             parser = self.build_parser()
         except ValueError as e:
-            console.print(f"[bold red]Error:[/bold red] {e}", highlight=False)
+            _console().print(f"[bold red]Error:[/bold red] {e}", highlight=False)
             sys.exit(1)
+        overlay = self._overlay()
+        if overlay is not None:
+            try:
+                overlay.check()
+            except ValueError as e:
+                self._config_error(str(e))
         # Handle special flags
         argv = sys.argv[1:]
         version_flags = ["--version", "-V"]
@@ -506,39 +1044,55 @@ class cli(group):
         if has_version:
             v = self._resolve_version()
             if v:
-                console.print(v)
+                _console().print(v)
             sys.exit(0)
+        argv, help_values = self._split_help_values(argv, parser)
+        depth = self._positive_int(parser, "--help-depth", help_values.get("--help-depth"))
+        json_depth = self._positive_int(parser, "--json-depth", help_values.get("--json-depth"))
+        search = help_values.get("--help-search")
+        choices_of = help_values.get("--help-choices")
         help_flags = ["--help", "-h"]
-        json_flags = ["--json", "-j"]
+        json_flags = ["--json", "-j", "--json-compact"]
         verbose_help_flags = ["--hv"]
-        has_help = any(a in help_flags for a in argv)
-        has_json = any(a in json_flags for a in argv)
+        has_help = any(a in help_flags for a in argv) or any(v is not None for v in (depth, search, choices_of))
+        has_json = any(a in json_flags for a in argv) or json_depth is not None
         has_verbose_help = any(a in verbose_help_flags for a in argv)
         if has_help or has_json or has_verbose_help:
             if has_json:
-                structure = self.structure_dict()
-                json_str = json.dumps(structure, indent=2)
+                console = _console()
+                path = self._argv_words(parser, argv, json_flags)
+                try:
+                    # Positional values after a command are not part of the path.
+                    nodes = self._structure_path(path)[0]
+                except ValueError as e:
+                    parser.error(f"argument --json: {e}")
+                path = [n.display_name for n in nodes[1:]]
+                compact = "--json-compact" in argv
                 # Highlighted JSON for a human at a TTY; raw JSON when piped or
                 # redirected. rich's Syntax soft-wraps and pads each line to the
                 # console width, which injects stray newlines/spaces and corrupts
                 # the JSON for `jq` and other consumers (notably past ~8 KB).
                 if console.is_terminal:
-                    syntax = Syntax(json_str, "json", theme="monokai", line_numbers=False)
+                    from rich.syntax import Syntax
+
+                    data = structure_json(self, self.cache_dir, path, json_depth, compact=compact)
+                    syntax = Syntax(data.decode("utf-8").rstrip("\n"), "json", theme="monokai", line_numbers=False)
                     console.print(syntax)
                 else:
-                    print(json_str)
+                    write_structure_json(self, sys.stdout, self.cache_dir, path, json_depth, compact=compact)
             else:
-                path = []
-                stop_flags = help_flags + verbose_help_flags
-                for a in argv:
-                    if a in stop_flags:
-                        break
-                    if not a.startswith("-"):
-                        path.append(a)
-                self.print_help(path, verbose=has_verbose_help)
+                path = self._argv_words(parser, argv, help_flags + verbose_help_flags)
+                if choices_of is not None:
+                    try:
+                        self.print_choices(path, choices_of)
+                    except ValueError as e:
+                        parser.error(f"argument --help-choices: {e}")
+                else:
+                    self.print_help(path, verbose=has_verbose_help, depth=depth, search=search)
             sys.exit(0)
         # Normal parsing
         argv = self._apply_group_defaults(argv)
+        parser.explicit.clear()
         try:
             args = parser.parse_args(argv)
         except SystemExit:
@@ -584,22 +1138,9 @@ class cli(group):
         if isinstance(current, (command, chain)):
             for node in path_nodes[:-1]:
                 effective_opts.extend([opt for opt in node.options if opt.inherit])
-        # Collect all options from the CLI
-        all_options = []
-
-        def collect_opts(node):
-            if hasattr(node, "options"):
-                all_options.extend(node.options)
-            if hasattr(node, "subgroups"):
-                for g in node.subgroups:
-                    collect_opts(g)
-            if hasattr(node, "commands"):
-                for c in node.commands:
-                    collect_opts(c)
-
-        collect_opts(self)
+        # Only parsers along the path contributed to ``args``.
         provided_names = set()
-        for opt in all_options:
+        for opt in effective_opts:
             provided_names.add(opt.get_dest())
         for arg in effective_args:
             provided_names.add(arg.dest or arg.name)
@@ -608,21 +1149,235 @@ class cli(group):
             for k, v in vars(args).items()
             if not k.startswith("command_") and k not in ("func", "chain_obj") and k in provided_names
         }
-        if hasattr(args, "chain_obj"):
-            args.func(args.chain_obj, **arg_dict)
-        else:
-            args.func(**arg_dict)
+        try:
+            self._apply_config(parser, path, arg_dict)
+        except SystemExit:
+            # Same status as the command-line errors parse_args reports.
+            sys.exit(1)
+        self._dispatch(current, path, args, arg_dict)
+
+    def _dispatch(self, node, path: list[str], args: argparse.Namespace, arg_dict: dict):
+        """Invoke the callback selected by the parsed ``args``, running setup hooks and injecting resources."""
+        declared, hooks = self._path_resources(path)
+        if any(r.scope == "process" for r in declared.values()):
+            self._register_atexit()
+        session = resource_session(declared, arg_dict, self._process_resources, self._metadata)
+        try:
+            session.acquire(hooks)
+            if hasattr(args, "chain_obj"):
+                args.func(
+                    args.chain_obj,
+                    _call=lambda step, kwargs: self._call(step.callback, step, kwargs, session, path + [step.name]),
+                    **arg_dict,
+                )
+            elif isinstance(node, command) and node.cache is not None:
+                self._invoke_cached(
+                    node,
+                    path,
+                    arg_dict,
+                    session,
+                    no_cache=getattr(args, "_no_cache", False),
+                    refresh=getattr(args, "_refresh_cache", False),
+                    jobs=getattr(args, "_jobs", None),
+                )
+            else:
+                self._call(args.func, node, arg_dict, session, path, jobs=getattr(args, "_jobs", None))
+        finally:
+            session.close()
+
+    def _path_groups(self, path: list[str]) -> list[group]:
+        """The root and every group along ``path``, outermost first."""
+        groups = [self]
+        node = self
+        for p in path:
+            if not hasattr(node, "subgroups"):
+                break
+            node = next((c for c in node.subgroups + node.commands if c.display_name == p), None)
+            if not isinstance(node, group):
+                break
+            groups.append(node)
+        return groups
+
+    def _path_resources(self, path: list[str]) -> tuple[dict[str, resource], list[str]]:
+        """Resources and setup hooks visible along ``path``; deeper declarations win.
+
+        Setup hooks are registered as chain-scoped resources so they run at most
+        once per dispatch; their names are returned in path order.
+        """
+        declared: dict[str, resource] = {}
+        hooks: list[str] = []
+        for g in self._path_groups(path):
+            declared.update((r.name, r) for r in g.resources)
+            if g.callback is not None and not (g is self and self.is_flat):
+                declared[g.context_name] = resource(
+                    name=g.context_name, factory=g.callback, scope="chain", close=_keep_open
+                )
+                hooks.append(g.context_name)
+        return declared, hooks
+
+    def _callback_params(self, callback) -> tuple[str, ...]:
+        return self._metadata.get(callback).params
+
+    def _call(
+        self,
+        callback,
+        node,
+        kwargs: dict,
+        session: resource_session,
+        path: list[str],
+        jobs: int | None = None,
+    ):
+        """Call ``callback`` with the kwargs it declares plus injected resources.
+
+        ``path`` addresses the callback for process-pool workers; ``jobs``
+        overrides the command's fan-out concurrency.
+        """
+        params = self._callback_params(callback)
+        call_kwargs = {k: kwargs[k] for k in params if k in kwargs}
+        injected, created = session.acquire([k for k in params if k not in call_kwargs])
+        try:
+            in_process = isinstance(node, command) and node.executor == "process"
+            if isinstance(node, command) and node.map_over is not None:
+                items = call_kwargs.pop(node.map_over) or []
+                jobs = max(1, jobs or node.jobs or os.cpu_count() or 1)
+                if in_process:
+                    return map_processes(
+                        self._executor(), path, {**call_kwargs, **injected}, node.map_over, items, jobs
+                    )
+                return map_threads(callback, {**call_kwargs, **injected}, node.map_over, items, jobs)
+            if in_process:
+                return self._executor().run(path, {**call_kwargs, **injected})
+            return callback(**call_kwargs, **injected)
+        finally:
+            session.release(created)
+
+    def _executor(self) -> process_executor:
+        """The cli's worker pool, created on first use and shut down by ``close()``."""
+        if self._process_pool is None:
+            self._process_pool = process_executor(self)
+            self._register_atexit()
+        return self._process_pool
+
+    def _register_atexit(self):
+        if not self._atexit_registered:
+            atexit.register(self.close)
+            self._atexit_registered = True
+
+    def _invoke_cached(
+        self,
+        node: command,
+        path: list[str],
+        kwargs: dict,
+        session: resource_session,
+        no_cache: bool,
+        refresh: bool,
+        jobs: int | None = None,
+    ):
+        """Run ``node`` through its result cache, replaying stdout on a hit."""
+        if no_cache:
+            return self._call(node.callback, node, kwargs, session, path, jobs)
+        store = result_cache(node.cache, self.cache_dir or default_cache_dir(), [self.name] + path, node.callback)
+        params = self._metadata.get(node.callback).params
+        key = store.key({k: v for k, v in kwargs.items() if k in params})
+        if not refresh:
+            entry = store.get(key)
+            if entry is not None:
+                sys.stdout.write(entry["stdout"])
+                return entry["value"]
+        tee = tee_writer(sys.stdout)
+        with redirect_stdout(tee):
+            value = self._call(node.callback, node, kwargs, session, path, jobs)
+        store.put(key, value, tee.getvalue())
+        return value
+
+    def close(self):
+        """Close process-scoped resources and shut down the worker pool."""
+        if self._process_pool is not None:
+            self._process_pool.shutdown()
+            self._process_pool = None
+        instances = list(self._process_resources.values())
+        self._process_resources.clear()
+        for res, instance in reversed(instances):
+            close_instance(res, instance)
 
     def _resolve_version(self) -> str | None:
+        """``version``, else the installed version of the distribution named like the cli (see ``package_version``)."""
         if self.version is not None:
             return self.version
-        try:
-            from importlib.metadata import version as _pkg_version
+        return package_version(self.name, self.cache_dir)
 
-            return _pkg_version(self.name)
-        except Exception:
-            return None
+    def export_docs(
+        self, directory: str | Path, formats: tuple[str, ...] = ("markdown", "man"), jobs: int | None = None
+    ) -> docs_report:
+        """Write a Markdown and/or man page for every node of the tree to ``directory``, in one pass.
+
+        A manifest in ``directory`` records a content fingerprint per page, so
+        later exports only rewrite pages whose node changed and delete pages
+        of removed nodes. Large exports are spread over up to ``jobs`` worker
+        processes (default: CPU count), one top-level subtree at a time.
+        Raises ``ValueError``, before writing anything, when two nodes would
+        be written to the same page (``a-b c`` and ``a b-c``).
+        """
+        return export_docs(self, directory, formats, jobs)
+
+    def search(self, query: str, path: list[str] | None = None) -> list[search_hit]:
+        """Groups, commands and chains (under ``path``) matching every word of ``query``.
+
+        Words match by prefix against display names, help text, callback
+        docstrings, option flags/help and argument names/help. The inverted
+        index is built once per tree, kept in memory and, when ``cache_dir``
+        is set, cached under ``<cache_dir>/search``.
+        """
+        index = search_index.for_tree(self, self.cache_dir)
+        return index.search(query, within=path)
+
+    def print_help(self, path: list[str], verbose: bool = False, depth: int | None = None, search: str | None = None):
+        """Print custom tree help: plain text for pipes and ``NO_COLOR``, rich styling otherwise.
 
-    def print_help(self, path: list[str], verbose: bool = False):
-        """Print custom tree help."""
-        help_renderer(self).render(path, verbose=verbose)
+        ``depth`` limits the levels expanded below the selected node; ``search``
+        prunes the tree to nodes matching it (see ``search()``).
+        """
+        if plain_output():
+            plain_renderer(self).render(path, verbose=verbose, depth=depth, search=search)
+            return
+        from ..utils.help_renderer import help_renderer
+
+        help_renderer(self).render(path, verbose=verbose, depth=depth, search=search)
+
+    def print_choices(self, path: list[str], name: str):
+        """Print every choice of option ``name`` (any of its flags) or argument ``name`` visible at ``path``.
+
+        One value per line, unstyled, so the full list can be piped or searched
+        even when help truncates it. Raises ValueError when nothing at ``path``
+        by that name has choices.
+        """
+        nodes = [self]
+        for p in path:
+            children = nodes[-1].subgroups + nodes[-1].commands if hasattr(nodes[-1], "subgroups") else []
+            child = next((c for c in children if c.display_name == p), None)
+            if child is None:
+                break
+            nodes.append(child)
+        choices = None
+        for node in reversed(nodes):
+            opts = node.options if hasattr(node, "options") else node.effective_options
+            args = node.arguments if hasattr(node, "arguments") else node.effective_arguments
+            item = next((o for o in opts if name in o.flags), None) or next(
+                (a for a in args if name in (a.name, a.name.upper(), a.dest)), None
+            )
+            if item is not None:
+                _, enum_choices = self._resolve_arg_type(item.arg_type)
+                if item.choices is not None:
+                    choices = [str(c) for c in item.choices]
+                elif enum_choices is not None:
+                    choices = [m.name for m in enum_choices]
+                break
+        if choices is None:
+            where = " ".join([self.display_name] + [n.display_name for n in nodes[1:]])
+            raise ValueError(f"no option or argument '{name}' with choices in '{where}'")
+        out = pager_writer(sys.stdout, enabled=self.help_pager)
+        try:
+            for value in choices:
+                out.write(value + "\n")
+        finally:
+            out.close()
@@ -3,10 +3,13 @@
 from __future__ import annotations
 
 import inspect
-from typing import Any, Callable, List, Union, get_origin
+from typing import Callable, List, Literal, Union, get_origin
 
-from pydantic import BaseModel, Field, PrivateAttr, computed_field
+from pydantic import Field, PrivateAttr, computed_field, field_validator
 
+from ..utils.metadata import callback_meta, metadata_store
+from ..utils.result_cache import cache_config
+from ..utils.tracking import tracked_model
 from .argument import argument
 from .option import option
 
@@ -76,7 +79,7 @@ def _type_mismatch_error(
     return "\n".join(lines)
 
 
-class command(BaseModel):
+class command(tracked_model):
     """command model."""
 
     name: str
@@ -85,16 +88,37 @@ class command(BaseModel):
     arguments: list[argument] = Field(default_factory=list)
     options: list[option] = Field(default_factory=list)
     sort_key: int = 0
-
-    _unwrapped_cb: Any = PrivateAttr(default=None)
-    _sig: Any = PrivateAttr(default=None)
-
-    @property
-    def _callback_sig(self):
-        if self._unwrapped_cb is None:
-            self._unwrapped_cb = inspect.unwrap(self.callback)
-            self._sig = inspect.signature(self._unwrapped_cb)
-        return self._unwrapped_cb, self._sig
+    cache: cache_config | None = None
+    """Memoize the callback's return value and stdout on disk. ``True`` uses
+    the default ``cache_config()``; the parser gains ``--no-cache`` and ``--refresh``."""
+    executor: Literal["inline", "process"] = "inline"
+    """``"process"`` runs the callback in the cli's reusable worker pool; kwargs,
+    injected values and the return value must be picklable."""
+    map_over: str | None = None
+    """Dest of an ``nargs="*"``/``"+"`` argument or option to fan out over: the
+    callback receives one element per call, run concurrently (threads, or the
+    worker pool with ``executor="process"``); the parser gains ``--jobs``."""
+    jobs: int | None = None
+    """Default fan-out concurrency; ``None`` means ``os.cpu_count()``."""
+
+    _meta: callback_meta | None = PrivateAttr(default=None)
+
+    @field_validator("cache", mode="before")
+    @classmethod
+    def coerce_cache(cls, v):
+        if v is True:
+            return cache_config()
+        if v is False:
+            return None
+        return v
+
+    def _callback_meta(self, metadata: metadata_store | None = None) -> callback_meta:
+        """Introspection results for ``callback``, from the tree's ``metadata`` store when given."""
+        if metadata is not None:
+            return metadata.get(self.callback)
+        if self._meta is None:
+            self._meta = callback_meta(self.callback, inspect.unwrap(self.callback), None)
+        return self._meta
 
     @computed_field
     @property
@@ -112,31 +136,55 @@ class command(BaseModel):
     def effective_options(self) -> list[option]:
         return self.options
 
-    def validate(self):
-        """Validate that callback parameters match defined arguments and options in name and type."""
-        unwrapped, sig = self._callback_sig
-        if inspect.iscoroutinefunction(unwrapped):
+    def _check_map_over(self):
+        """Ensure ``map_over`` names a list-valued argument/option of this command."""
+        if self.map_over is None:
+            return
+        for item in self.arguments + self.options:
+            dest = item.get_dest() if isinstance(item, option) else (item.dest or item.name)
+            if dest == self.map_over:
+                if item.nargs in ("*", "+"):
+                    return
+                break
+        raise ValueError(
+            f"command '{self.name}': map_over='{self.map_over}' must name an argument or option with nargs '*' or '+'"
+        )
+
+    def validate(self, injected: frozenset[str] = frozenset(), metadata: metadata_store | None = None):
+        """Validate that callback parameters match defined arguments and options in name and type.
+
+        Parameter names in ``injected`` (resources) are supplied by the dispatcher
+        and excluded from matching.
+        """
+        meta = self._callback_meta(metadata)
+        if meta.is_async:
             raise ValueError(f"Callback for command '{self.name}' is async; treeparse does not support async callbacks")
-        param_names = set(sig.parameters.keys())
-        param_types = {k: v.annotation for k, v in sig.parameters.items() if v.annotation != inspect.Parameter.empty}
+        param_names = set(meta.params) - injected
+        sig = meta.signature
+        param_types = {
+            k: v.annotation
+            for k, v in sig.parameters.items()
+            if v.annotation != inspect.Parameter.empty and k not in injected
+        }
+        self._check_map_over()
         provided = {}
         for arg in self.arguments:
             dest = arg.dest or arg.name
             arg_type = arg.arg_type
-            if arg.nargs in ["*", "+"]:
+            if arg.nargs in ["*", "+"] and dest != self.map_over:
                 arg_type = List[arg_type]
             provided[dest] = arg_type
         for opt in self.options:
             dest = opt.get_dest()
             opt_type = opt.arg_type
-            if opt.nargs in ["*", "+"]:
+            if opt.nargs in ["*", "+"] and dest != self.map_over:
                 opt_type = List[opt_type]
             provided[dest] = opt_type
         provided_names = set(provided.keys())
         if param_names != provided_names:
             missing = param_names - provided_names
             extra = provided_names - param_names
-            raise ValueError(_name_mismatch_error(self.name, unwrapped.__name__, sig, provided, missing, extra))
+            raise ValueError(_name_mismatch_error(self.name, meta.name, sig, provided, missing, extra))
         # Check types
         type_mismatches = []
         for param, p_type in param_types.items():
@@ -152,7 +200,7 @@ class command(BaseModel):
             if cli_type != p_type:
                 type_mismatches.append((param, p_type, cli_type))
         if type_mismatches:
-            raise ValueError(_type_mismatch_error(self.name, unwrapped.__name__, sig, type_mismatches))
+            raise ValueError(_type_mismatch_error(self.name, meta.name, sig, type_mismatches))
         # Check defaults against choices
         for arg in self.arguments:
             if arg.choices is not None and arg.default is not None:
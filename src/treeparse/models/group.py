@@ -2,15 +2,19 @@
 
 from __future__ import annotations
 
-from pydantic import BaseModel, Field
+from typing import Any, Callable
 
+from pydantic import Field
+
+from ..utils.tracking import tracked_model
 from .argument import argument
 from .chain import chain
 from .command import command
 from .option import option
+from .resource import resource
 
 
-class group(BaseModel):
+class group(tracked_model):
     """group model."""
 
     name: str
@@ -24,8 +28,20 @@ class group(BaseModel):
     default: str | None = None
     """Name of a direct child command to route to when the next token is not a
     known subcommand (or is missing / an option flag). None disables routing."""
+    resources: list[resource] = Field(default_factory=list)
+    """Factories injected by parameter name into every callback below this group."""
+    callback: Callable[..., Any] | None = None
+    """Setup hook run once per dispatch through this group. Its parameters are
+    filled like a resource factory; its return value is injected into
+    descendant callbacks (and nested hooks) under ``context_name``."""
+    context: str | None = None
 
     @property
     def display_name(self) -> str:
         """Get display name."""
         return self.name
+
+    @property
+    def context_name(self) -> str:
+        """Parameter name the setup hook's result is injected under."""
+        return self.context or self.name.replace("-", "_")
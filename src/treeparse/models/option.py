@@ -4,10 +4,13 @@ from __future__ import annotations
 
 from typing import Any
 
-from pydantic import BaseModel, model_validator
+from pydantic import field_validator, model_validator
 
+from ..utils.choices import choice_index
+from ..utils.tracking import tracked_model
 
-class option(BaseModel):
+
+class option(tracked_model):
     """option model."""
 
     flags: list[str]
@@ -21,6 +24,13 @@ class option(BaseModel):
     required: bool = False
     inherit: bool = True
     flag: bool = False
+    envvar: str | None = None
+    """Environment variable read when the option is not on the command line; wins over config files."""
+
+    @field_validator("choices")
+    @classmethod
+    def index_choices(cls, v):
+        return None if v is None else choice_index(v)
 
     @model_validator(mode="after")
     def check_required_default_contradiction(self):
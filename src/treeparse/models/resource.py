@@ -0,0 +1,104 @@
+"""Resource model: shared objects injected into callbacks by parameter name."""
+
+from __future__ import annotations
+
+from typing import Any, Callable, Literal
+
+from pydantic import BaseModel
+
+from ..utils.metadata import metadata_store
+
+
+class resource(BaseModel):
+    """Factory-backed object injected into callbacks by parameter name.
+
+    ``scope`` controls reuse: ``"invocation"`` builds a fresh instance for
+    every callback call, ``"chain"`` shares one instance across all steps of a
+    single dispatch, and ``"process"`` keeps it on the cli until ``close()``
+    (or interpreter exit). Factory parameters are filled from parsed
+    arguments/options or other resources of the same name.
+    """
+
+    name: str
+    factory: Callable[..., Any]
+    scope: Literal["invocation", "chain", "process"] = "invocation"
+    close: Callable[[Any], None] | None = None
+    """Called with the instance on release; defaults to ``instance.close()`` when present."""
+
+
+def close_instance(res: resource, instance: Any):
+    """Release ``instance`` using the resource's ``close`` hook or its own ``close()``."""
+    if res.close is not None:
+        res.close(instance)
+        return
+    closer = getattr(instance, "close", None)
+    if callable(closer):
+        closer()
+
+
+class resource_session:
+    """Resolves declared resources for one dispatch and closes what it opened.
+
+    ``process_instances`` is owned by the cli and outlives the session, as does
+    ``metadata``, the tree's store that factory signatures are read from.
+    """
+
+    def __init__(
+        self,
+        declared: dict[str, resource],
+        kwargs: dict[str, Any],
+        process_instances: dict,
+        metadata: metadata_store | None = None,
+    ):
+        self._declared = declared
+        self._metadata = metadata_store() if metadata is None else metadata
+        self._kwargs = kwargs
+        self._process = process_instances
+        self._chain: dict[str, Any] = {}
+        self._chain_order: list[tuple[resource, Any]] = []
+
+    @property
+    def names(self) -> set[str]:
+        return set(self._declared)
+
+    def acquire(self, names) -> tuple[dict[str, Any], list[tuple[resource, Any]]]:
+        """Return instances for the declared ``names`` and the invocation-scoped ones created."""
+        created: list[tuple[resource, Any]] = []
+        values = {n: self._get(n, created) for n in names if n in self._declared}
+        return values, created
+
+    def release(self, created: list[tuple[resource, Any]]):
+        for res, instance in reversed(created):
+            close_instance(res, instance)
+
+    def close(self):
+        """Close chain-scoped instances in reverse creation order."""
+        self.release(self._chain_order)
+        self._chain.clear()
+        self._chain_order = []
+
+    def _get(self, name: str, created: list):
+        res = self._declared[name]
+        if res.scope == "process":
+            key = id(res)
+            if key not in self._process:
+                self._process[key] = (res, self._create(res, created))
+            return self._process[key][1]
+        if res.scope == "chain":
+            if name not in self._chain:
+                instance = self._create(res, created)
+                self._chain[name] = instance
+                self._chain_order.append((res, instance))
+            return self._chain[name]
+        instance = self._create(res, created)
+        created.append((res, instance))
+        return instance
+
+    def _create(self, res: resource, created: list):
+        kwargs = {}
+        for p in self._metadata.get(res.factory).params:
+            if p in self._declared and p != res.name:
+                kwargs[p] = self._get(p, created)
+            elif p in self._kwargs:
+                kwargs[p] = self._kwargs[p]
+        return res.factory(**kwargs)
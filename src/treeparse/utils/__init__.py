@@ -3,6 +3,20 @@
 from __future__ import annotations
 
 from .color_config import color_config
-from .helpers import load_yaml_config
+from .docs_export import docs_report
+from .helpers import default_cache_dir, load_yaml_config
+from .metadata import metadata_store
+from .result_cache import cache_config
+from .search_index import search_hit
+from .structure_export import compact_report
 
-__all__ = ["color_config", "load_yaml_config"]
+__all__ = [
+    "cache_config",
+    "color_config",
+    "compact_report",
+    "default_cache_dir",
+    "docs_report",
+    "load_yaml_config",
+    "metadata_store",
+    "search_hit",
+]
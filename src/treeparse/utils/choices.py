@@ -0,0 +1,52 @@
+"""Choice lists with hashed membership tests and truncated help display."""
+
+from __future__ import annotations
+
+from typing import Any, Iterable
+
+from .tracking import tracked_list
+
+_UNHASHABLE = frozenset()
+
+
+class choice_index(tracked_list):
+    """A ``choices`` list whose ``in`` test is a set lookup; iteration keeps the given order.
+
+    argparse checks every parsed value with ``value in choices``, which is a
+    linear scan on a plain list. The set is built on the first lookup and
+    dropped whenever the list is modified. Choices that are not hashable fall
+    back to the list scan.
+    """
+
+    __slots__ = ("_members",)
+
+    def __init__(self, values: Iterable[Any] = ()):
+        super().__init__(values)
+        self._members: frozenset | None = None
+
+    def __contains__(self, value) -> bool:
+        members = getattr(self, "_members", None)
+        if members is None:
+            try:
+                members = frozenset(self)
+            except TypeError:
+                members = _UNHASHABLE
+            self._members = members
+        if members is _UNHASHABLE and len(self):
+            return list.__contains__(self, value)
+        try:
+            return value in members
+        except TypeError:
+            return list.__contains__(self, value)
+
+    def _changed(self):
+        self._members = None
+        super()._changed()
+
+
+def format_choices(choices: list[Any], limit: int | None) -> str:
+    """``a|b|c`` for help; past ``limit`` values, ``a|b|c|… (+4,997 more)``."""
+    if limit is None or len(choices) <= limit:
+        return "|".join(map(str, choices))
+    shown = "|".join(map(str, choices[:limit]))
+    return f"{shown}|… (+{len(choices) - limit:,} more)"
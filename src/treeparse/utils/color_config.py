@@ -3,8 +3,16 @@
 from __future__ import annotations
 
 from enum import Enum
+from functools import lru_cache
+from typing import TYPE_CHECKING
 
-from pydantic import BaseModel
+from .tracking import tracked_model
+
+if TYPE_CHECKING:
+    from rich.style import Style
+
+# Styles the help tree uses besides the configurable roles.
+FIXED_STYLES = {"marker": "dim", "docstring": "dim italic", "default": "bold dim white"}
 
 
 class color_theme(Enum):
@@ -17,7 +25,7 @@ class color_theme(Enum):
     TOKYO_NIGHT = "tokyo_night"
 
 
-class color_config(BaseModel):
+class color_config(tracked_model):
     """Color configuration for help output."""
 
     app: str = "bold bright_cyan"
@@ -32,6 +40,15 @@ class color_config(BaseModel):
     connector: str = "rgb(45,45,45)"
     guide: str = "rgb(45,45,45)"
 
+    def style_strings(self) -> tuple[dict[str, str], dict[str, str]]:
+        """Style string per role (plus ``FIXED_STYLES``), normal and dimmed."""
+        normal = {**self.model_dump(), **FIXED_STYLES}
+        return normal, {k: "dim " + v for k, v in normal.items()}
+
+    def compiled(self) -> tuple[dict[str, "Style"], dict[str, "Style"]]:
+        """``style_strings`` as parsed rich ``Style`` objects, built once per distinct palette."""
+        return _compile(tuple(self.model_dump().items()))
+
     @classmethod
     def from_theme(cls, theme: color_theme):
         if theme == color_theme.DEFAULT:
@@ -133,3 +150,23 @@ class color_config(BaseModel):
                 connector="rgb(73,72,62)",  # #49483e — dark monokai line
                 guide="rgb(73,72,62)",
             )
+
+
+@lru_cache(maxsize=32)
+def _compile(items: tuple[tuple[str, str], ...]) -> tuple[dict[str, "Style"], dict[str, "Style"]]:
+    from rich.default_styles import DEFAULT_STYLES
+    from rich.errors import StyleSyntaxError
+    from rich.style import Style
+
+    def resolve(definition: str) -> Style:
+        # What rich's Text rendering does with a style string on a default
+        # console: a theme name, else a parsed style, else no style at all.
+        if definition in DEFAULT_STYLES:
+            return DEFAULT_STYLES[definition]
+        try:
+            return Style.parse(definition)
+        except StyleSyntaxError:
+            return Style.null()
+
+    roles = (*items, *FIXED_STYLES.items())
+    return {k: resolve(v) for k, v in roles}, {k: resolve("dim " + v) for k, v in roles}
@@ -0,0 +1,128 @@
+"""Index of config keys (option dests, optionally scoped by command path) over a cli tree."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+from ..models.chain import chain
+from ..models.option import option
+
+if TYPE_CHECKING:
+    from ..models.cli import cli
+
+
+class config_index:
+    """Where each config key can apply, built in one walk of the tree.
+
+    A key is an option dest (``level``), applying to every option with that
+    dest, or a dest scoped by the dotted path of display names of a node
+    (``user.manage.set-role.level``), applying to options with that dest
+    declared on, inherited by or declared below that node. Chain steps are
+    addressed under their chain (``ops.all.build.count``). The most
+    specific key found for an option wins.
+
+    The environment variables that can set each option are worked out in
+    the same walk: its ``envvar``, else, with ``envvar_prefix``, one per key,
+    uppercased with dots and dashes as underscores
+    (``APP_USER_MANAGE_SET_ROLE_LEVEL``, ..., ``APP_LEVEL``).
+    """
+
+    def __init__(self, root: "cli"):
+        # Dotted path -> node; the root is "".
+        self.nodes: dict[str, Any] = {}
+        # Dest -> dotted paths of the nodes declaring an option with it.
+        self.dests: dict[str, list[str]] = {}
+        # id(option) -> dotted path of the node declaring it (the first, if shared).
+        self.owners: dict[int, str] = {}
+        # id(option) -> environment variables that can set it, most specific first.
+        self.envvars: dict[int, tuple[str, ...]] = {}
+        # Every name in ``envvars``.
+        self.envvar_names: set[str] = set()
+        self._prefix = root.envvar_prefix
+        self._walk(root, "")
+
+    def _walk(self, node, path: str) -> None:
+        self.nodes[path] = node
+        for opt in getattr(node, "options", []):
+            dest = opt.get_dest()
+            self.dests.setdefault(dest, []).append(path)
+            if id(opt) not in self.owners:
+                self.owners[id(opt)] = path
+                names = self._envvars_for(path, opt.envvar, dest)
+                if names:
+                    self.envvars[id(opt)] = names
+                    self.envvar_names.update(names)
+        children = node.chained_commands if isinstance(node, chain) else getattr(node, "subgroups", [])
+        for child in [*children, *getattr(node, "commands", [])]:
+            self._walk(child, f"{path}.{child.display_name}" if path else child.display_name)
+
+    def flatten(self, config: dict[str, Any]) -> dict[str, Any]:
+        """``config`` with mappings under node names (``user: {manage: {level: 3}}``) as dotted keys."""
+        flat: dict[str, Any] = {}
+
+        def visit(mapping: dict[str, Any], prefix: str) -> None:
+            for key, value in mapping.items():
+                path = f"{prefix}.{key}" if prefix else str(key)
+                if isinstance(value, dict) and path in self.nodes:
+                    visit(value, path)
+                else:
+                    flat[path] = value
+
+        visit(config, "")
+        return flat
+
+    def path_options(self, path: list[str]) -> list[tuple[str, option]]:
+        """Options that can be given on the way to the node at ``path``, with the dotted path declaring each."""
+        found: list[tuple[str, option]] = []
+        dotted = ""
+        for i in range(len(path) + 1):
+            if i:
+                dotted = f"{dotted}.{path[i - 1]}" if dotted else path[i - 1]
+            node = self.nodes.get(dotted)
+            if node is None:
+                break
+            found.extend((dotted, opt) for opt in getattr(node, "options", []))
+            if isinstance(node, chain):
+                for step in node.chained_commands:
+                    step_path = f"{dotted}.{step.display_name}" if dotted else step.display_name
+                    found.extend((step_path, opt) for opt in step.options)
+        return found
+
+    def keys_for(self, declared: str, dest: str, dispatched: str | None = None) -> list[str]:
+        """Keys that can set ``dest`` declared at ``declared``, most specific first.
+
+        With ``dispatched`` (the invoked node), keys scoped to it and the
+        nodes between it and ``declared`` come first; chain steps are looked
+        up from themselves.
+        """
+        scope = dispatched if dispatched is not None and len(declared) <= len(dispatched) else declared
+        keys = []
+        while scope:
+            keys.append(f"{scope}.{dest}")
+            scope = scope.rpartition(".")[0]
+        keys.append(dest)
+        return keys
+
+    def _envvars_for(self, declared: str, envvar: str | None, dest: str) -> tuple[str, ...]:
+        if envvar:
+            return (envvar,)
+        if self._prefix is None:
+            return ()
+        keys = self.keys_for(declared, dest)
+        return tuple(f"{self._prefix}_{key.upper().replace('.', '_').replace('-', '_')}" for key in keys)
+
+    def is_known(self, key: str) -> bool:
+        """Whether ``key`` could apply to some option of the tree."""
+        scope, _, dest = key.rpartition(".")
+        if scope and scope not in self.nodes:
+            return False
+        return any(_related(scope, d) for d in self.dests.get(dest, ()))
+
+
+def _related(scope: str, declared: str) -> bool:
+    """Whether an option declared at ``declared`` is visible at or below ``scope``."""
+    if not scope or not declared:
+        return True
+    if len(declared) <= len(scope):
+        return scope == declared or scope.startswith(declared + ".")
+    return declared.startswith(scope + ".")
@@ -0,0 +1,171 @@
+"""Layered config sources, read on demand into a per-invocation overlay of option defaults."""
+
+from __future__ import annotations
+
+import os
+import sys
+import warnings
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import yaml
+
+from .config_index import config_index
+from .helpers import load_yaml_config
+
+if TYPE_CHECKING:
+    from ..models.cli import cli
+
+
+class config_layer:
+    """One config file; ``table`` selects ``[tool.<name>]`` of a ``pyproject.toml``.
+
+    ``label`` names the source in help and warnings. A missing file reads as
+    empty unless it is ``required``.
+    """
+
+    def __init__(self, label: str, path: Path, table: str | None = None, required: bool = False):
+        self.label = label
+        self.path = path
+        self.table = table
+        self.required = required
+
+    def stamp(self) -> tuple | None:
+        """What identifies this file's content: path, mtime and size (None when it does not exist)."""
+        try:
+            st = self.path.stat()
+        except OSError:
+            return None
+        return (str(self.path), st.st_mtime_ns, st.st_size)
+
+    def read(self, cache_dir: Path | None) -> dict[str, Any]:
+        """The parsed file; ValueError when a ``required`` one cannot be read or parsed.
+
+        Other files that cannot be read or parsed are skipped with a warning,
+        so a broken file found by the directory search does not stop the cli.
+        """
+        try:
+            if self.table is None:
+                if not self.required and not self.path.is_file():
+                    return {}
+                data = load_yaml_config(str(self.path), cache_dir)
+            else:
+                data = _read_tool_table(self.path, self.table)
+        except (OSError, ValueError, yaml.YAMLError) as e:
+            reason = " ".join(str(e).split())
+            if self.required:
+                raise ValueError(f"cannot read config {self.label}: {reason}") from None
+            warnings.warn(f"treeparse config: skipped {self.label}: {reason}", UserWarning, stacklevel=2)
+            return {}
+        return data if isinstance(data, dict) else {}
+
+
+def _read_tool_table(path: Path, name: str) -> dict[str, Any]:
+    if sys.version_info >= (3, 11):
+        import tomllib
+    else:
+        import tomli as tomllib
+    with open(path, "rb") as f:
+        return tomllib.load(f).get("tool", {}).get(name, {})
+
+
+def _nearest(start: Path, *names: str) -> Path | None:
+    """The first of ``names`` found in ``start`` or its closest ancestor directory."""
+    for directory in (start, *start.parents):
+        for name in names:
+            candidate = directory / name
+            if candidate.is_file():
+                return candidate
+    return None
+
+
+def env_name(root: "cli", suffix: str) -> str:
+    """``<NAME>_<SUFFIX>`` for the cli name, uppercased with dashes as underscores."""
+    return f"{root.name.upper().replace('-', '_')}_{suffix}"
+
+
+def config_layers(root: "cli", cwd: Path | None = None) -> list[config_layer]:
+    """The config files of ``root``, lowest precedence first.
+
+    ``yml_config`` always; with ``layered_config`` also, in order,
+    ``/etc/<name>/config.yml``, ``$XDG_CONFIG_HOME/<name>/config.yml``
+    (``~/.config``), ``[tool.<name>]`` of the nearest ``pyproject.toml``, the
+    nearest ``.<name>.yml`` (both looked up from ``cwd`` towards the
+    filesystem root) and the file named by ``$<NAME>_CONFIG``.
+    """
+    layers = []
+    if root.yml_config is not None:
+        layers.append(config_layer(str(root.yml_config), Path(root.yml_config), required=True))
+    if not root.layered_config:
+        return layers
+    name = root.name
+    layers.append(config_layer(f"/etc/{name}/config.yml", Path("/etc") / name / "config.yml"))
+    xdg = os.environ.get("XDG_CONFIG_HOME")
+    user = (Path(xdg) if xdg else Path.home() / ".config") / name / "config.yml"
+    layers.append(config_layer(str(user), user))
+    cwd = Path.cwd() if cwd is None else cwd
+    pyproject = _nearest(cwd, "pyproject.toml")
+    if pyproject is not None:
+        layers.append(config_layer(f"{pyproject} [tool.{name}]", pyproject, table=name))
+    project = _nearest(cwd, f".{name}.yml", f".{name}.yaml")
+    if project is not None:
+        layers.append(config_layer(str(project), project))
+    var = env_name(root, "CONFIG")
+    if os.environ.get(var):
+        path = Path(os.environ[var])
+        layers.append(config_layer(f"{path} (${var})", path, required=True))
+    return layers
+
+
+class config_overlay:
+    """Option defaults from config layers for one invocation; the tree itself is never changed.
+
+    Each layer is read the first time a lookup reaches it, so layers below
+    one that already sets every requested option are never parsed; keys
+    no option can use are reported as a layer is read. A
+    higher layer wins over a lower one; within a layer, the most specific
+    key wins (see ``config_index``).
+    """
+
+    def __init__(self, index: config_index, layers: list[config_layer], cache_dir: Path | None = None):
+        self._index = index
+        self._layers = layers[::-1]
+        self._cache_dir = cache_dir
+        self._flat: list[dict[str, Any] | None] = [None] * len(self._layers)
+
+    def __bool__(self) -> bool:
+        return bool(self._layers)
+
+    def _values(self, i: int) -> dict[str, Any]:
+        flat = self._flat[i]
+        if flat is None:
+            layer = self._layers[i]
+            flat = self._flat[i] = self._index.flatten(layer.read(self._cache_dir))
+            for key in flat:
+                if not self._index.is_known(key):
+                    warnings.warn(
+                        f"treeparse config: unrecognized key '{key}' in {layer.label}",
+                        UserWarning,
+                        stacklevel=2,
+                    )
+        return flat
+
+    def check(self) -> None:
+        """Read the files named explicitly (``required`` layers), so their unknown keys are always reported."""
+        for i, layer in enumerate(self._layers):
+            if layer.required:
+                self._values(i)
+
+    def lookup(self, declared: str, dest: str, dispatched: str | None = None) -> tuple[Any, str] | None:
+        """``(value, source label)`` for ``dest`` declared at ``declared``, or None when no layer sets it."""
+        keys = self._index.keys_for(declared, dest, dispatched)
+        for i, layer in enumerate(self._layers):
+            values = self._values(i)
+            for key in keys:
+                if key in values:
+                    return values[key], layer.label
+        return None
+
+    def token(self) -> tuple:
+        """Stat of every layer, for cache keys of output that shows config defaults."""
+        return tuple(layer.stamp() for layer in self._layers)
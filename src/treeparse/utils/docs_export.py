@@ -0,0 +1,281 @@
+"""Export a cli tree to Markdown and man pages, rewriting only pages whose content changed."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from pydantic import BaseModel
+
+from .choices import format_choices
+from .executor import mp_context
+from .helpers import atomic_write_bytes
+
+if TYPE_CHECKING:
+    from ..models.cli import cli
+
+FORMATS = ("markdown", "man")
+MANIFEST = ".treeparse-docs.json"
+# Bump when the page layout changes so existing exports are regenerated.
+_LAYOUT_VERSION = 1
+# Below this many pages to write, worker start-up costs more than it saves.
+_PARALLEL_MIN = 64
+
+
+class docs_report(BaseModel):
+    """Outcome of ``cli.export_docs``: file names relative to the export directory."""
+
+    written: list[str]
+    unchanged: int
+    removed: list[str]
+
+
+def _item_data(item, limit: int | None) -> dict[str, Any]:
+    d = {
+        "type": getattr(item.arg_type, "__name__", str(item.arg_type)),
+        "help": item.help,
+        "choices": None if item.choices is None else format_choices(item.choices, limit),
+        "default": None if item.default is None else str(item.default),
+        "nargs": None if item.nargs is None else str(item.nargs),
+    }
+    if hasattr(item, "flags"):
+        d.update(flags=item.sorted_flags, flag=item.flag, required=item.required, metavar=item.get_dest().upper())
+    else:
+        d["name"] = item.name
+    return d
+
+
+def page_data(root: "cli") -> list[dict[str, Any]]:
+    """Everything each page shows, one dict per node in help order (JSON-safe, picklable)."""
+    pages: list[dict[str, Any]] = []
+    version = root._resolve_version()
+    limit = root.help_choices
+
+    def visit(node, path: list[str], inherited_args: list, inherited_opts: list):
+        kind = "cli" if node is root else type(node).__name__
+        if kind in ("command", "chain"):
+            args, opts = node.effective_arguments, node.effective_options
+        else:
+            args = inherited_args + node.arguments
+            opts = [o for o in inherited_opts if o.inherit] + node.options
+        children = (
+            sorted(node.subgroups + node.commands, key=lambda c: c.sort_key) if hasattr(node, "subgroups") else []
+        )
+        doc = ""
+        if kind == "command" or (kind == "cli" and root.is_flat and root.callback is not None):
+            doc = root.metadata.doc(node.callback)
+        pages.append(
+            {
+                "app": root.display_name,
+                "version": version,
+                "path": path,
+                "kind": kind,
+                "help": node.help,
+                "docstring": doc,
+                "arguments": [_item_data(a, limit) for a in args],
+                "options": [_item_data(o, limit) for o in sorted(opts, key=lambda o: o.sort_key)],
+                "children": [{"name": c.display_name, "kind": type(c).__name__, "help": c.help} for c in children],
+                "steps": [
+                    {"name": s.name, "help": s.help, "docstring": root.metadata.doc(s.callback)}
+                    for s in getattr(node, "chained_commands", [])
+                ],
+            }
+        )
+        for child in children:
+            if hasattr(child, "subgroups"):
+                visit(child, path + [child.display_name], args, opts)
+            else:
+                visit(child, path + [child.display_name], [], [])
+
+    visit(root, [], [], [])
+    return pages
+
+
+def page_name(data: dict[str, Any], fmt: str) -> str:
+    stem = "-".join([data["app"], *data["path"]]).replace(os.sep, "_").replace(" ", "_")
+    return f"{stem}.md" if fmt == "markdown" else f"{stem}.1"
+
+
+def _fingerprint(data: dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()
+
+
+def _synopsis(data: dict[str, Any]) -> tuple[str, list[str]]:
+    """The command words and the parameter placeholders after them."""
+    words = " ".join([data["app"], *data["path"]])
+    parts = []
+    if data["options"]:
+        parts.append("[OPTIONS]")
+    for arg in data["arguments"]:
+        name = arg["name"].upper()
+        parts.append(f"[{name}...]" if arg["nargs"] == "*" else f"{name}..." if arg["nargs"] == "+" else name)
+    if data["children"]:
+        parts.append("COMMAND")
+    return words, parts
+
+
+def _option_label(opt: dict[str, Any]) -> str:
+    return ", ".join(opt["flags"]) + ("" if opt["flag"] else f" {opt['metavar']}")
+
+
+def _details(item: dict[str, Any]) -> str:
+    extras = []
+    if item["choices"] is not None:
+        extras.append(f"one of: {item['choices']}")
+    if item["default"] is not None and not item.get("flag"):
+        extras.append(f"default: {item['default']}")
+    if item.get("required"):
+        extras.append("required")
+    return "; ".join(extras)
+
+
+def _md_cell(text: str) -> str:
+    return text.replace("|", "\\|").replace("\n", " ")
+
+
+def render_markdown(data: dict[str, Any]) -> str:
+    words, parts = _synopsis(data)
+    lines = [f"# {words}", ""]
+    if data["help"]:
+        lines += [data["help"], ""]
+    if data["docstring"]:
+        lines += [data["docstring"], ""]
+    lines += ["## Usage", "", "```", " ".join([words, *parts]), "```", ""]
+    if data["arguments"]:
+        lines += ["## Arguments", "", "| Name | Type | Description |", "| --- | --- | --- |"]
+        for arg in data["arguments"]:
+            text = " ".join(t for t in (arg["help"], f"({_details(arg)})" if _details(arg) else "") if t)
+            lines.append(f"| `{arg['name'].upper()}` | {arg['type']} | {_md_cell(text)} |")
+        lines.append("")
+    if data["options"]:
+        lines += ["## Options", "", "| Option | Type | Description |", "| --- | --- | --- |"]
+        for opt in data["options"]:
+            text = " ".join(t for t in (opt["help"], f"({_details(opt)})" if _details(opt) else "") if t)
+            kind = "flag" if opt["flag"] else opt["type"]
+            lines.append(f"| `{_md_cell(_option_label(opt))}` | {kind} | {_md_cell(text)} |")
+        lines.append("")
+    if data["children"]:
+        lines += ["## Commands", ""]
+        for child in data["children"]:
+            link = page_name({"app": data["app"], "path": [*data["path"], child["name"]]}, "markdown")
+            lines.append(f"- [`{child['name']}`]({link})" + (f" — {child['help']}" if child["help"] else ""))
+        lines.append("")
+    if data["steps"]:
+        lines += ["## Steps", ""]
+        for i, step in enumerate(data["steps"], 1):
+            lines.append(f"{i}. `{step['name']}`" + (f" — {step['help']}" if step["help"] else ""))
+            if step["docstring"]:
+                lines += ["", *(f"   {line}" if line else "" for line in step["docstring"].splitlines())]
+        lines.append("")
+    return "\n".join(lines)
+
+
+def _roff(text: str) -> str:
+    """Escape ``text`` for roff: backslashes, hyphens, and leading control characters."""
+    text = text.replace("\\", "\\e").replace("-", "\\-")
+    return "\n".join(("\\&" + line) if line[:1] in (".", "'") else line for line in text.splitlines())
+
+
+def render_man(data: dict[str, Any]) -> str:
+    words, parts = _synopsis(data)
+    title = page_name(data, "man")[:-2]
+    source = f"{data['app']} {data['version']}" if data["version"] else data["app"]
+    lines = [f'.TH "{title.upper()}" "1" "" "{_roff(source)}" "{_roff(data["app"])} manual"', ".SH NAME"]
+    lines.append(_roff(title) + (f" \\- {_roff(data['help'])}" if data["help"] else ""))
+    lines += [".SH SYNOPSIS", f".B {_roff(words)}"]
+    if parts:
+        lines.append(_roff(" ".join(parts)))
+    if data["docstring"] or data["help"]:
+        lines += [".SH DESCRIPTION", _roff(data["docstring"] or data["help"])]
+    for section, items in (("ARGUMENTS", data["arguments"]), ("OPTIONS", data["options"])):
+        if not items:
+            continue
+        lines.append(f".SH {section}")
+        for item in items:
+            label = _option_label(item) if "flags" in item else item["name"].upper()
+            lines += [".TP", f".B {_roff(label)}"]
+            text = " ".join(t for t in (item["help"], f"({_details(item)})" if _details(item) else "") if t)
+            if text:
+                lines.append(_roff(text))
+    if data["children"]:
+        lines.append(".SH COMMANDS")
+        for child in data["children"]:
+            lines += [".TP", f".B {_roff(child['name'])}"]
+            if child["help"]:
+                lines.append(_roff(child["help"]))
+    if data["steps"]:
+        lines.append(".SH STEPS")
+        for step in data["steps"]:
+            lines += [".TP", f".B {_roff(step['name'])}"]
+            text = "\n".join(t for t in (step["help"], step["docstring"]) if t)
+            if text:
+                lines.append(_roff(text))
+    paths = ([data["path"][:-1]] if data["path"] else []) + [[*data["path"], c["name"]] for c in data["children"]]
+    related = [page_name({"app": data["app"], "path": p}, "man")[:-2] for p in paths]
+    if related:
+        lines += [".SH SEE ALSO", ", ".join(f"\\fB{_roff(r)}\\fR(1)" for r in related)]
+    return "\n".join(lines) + "\n"
+
+
+_RENDERERS = {"markdown": render_markdown, "man": render_man}
+
+
+def _write_pages(directory: str, pages: list[tuple[str, str, dict[str, Any]]]) -> list[str]:
+    """Render and write ``(format, name, data)`` pages; runs in worker processes too."""
+    for fmt, name, data in pages:
+        atomic_write_bytes(Path(directory) / name, _RENDERERS[fmt](data).encode("utf-8"))
+    return [name for _, name, _ in pages]
+
+
+def export_docs(
+    root: "cli", directory: str | Path, formats: tuple[str, ...] = FORMATS, jobs: int | None = None
+) -> docs_report:
+    """Write one page per node and format to ``directory``; see ``cli.export_docs``."""
+    unknown = set(formats) - set(FORMATS)
+    if unknown:
+        raise ValueError(f"unknown docs format(s) {sorted(unknown)}; expected {list(FORMATS)}")
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    manifest_path = directory / MANIFEST
+    try:
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        previous = manifest["pages"] if manifest["version"] == _LAYOUT_VERSION else {}
+    except (OSError, ValueError, KeyError):
+        previous = {}
+    existing = set(os.listdir(directory))
+    current: dict[str, str] = {}
+    # Page name -> path of the node it documents, to catch names two nodes map to.
+    owners: dict[str, list[str]] = {}
+    # Pending pages grouped by top-level subtree, the unit of parallel work.
+    pending: dict[str, list[tuple[str, str, dict[str, Any]]]] = {}
+    for data in page_data(root):
+        fingerprint = _fingerprint(data)
+        for fmt in formats:
+            name = page_name(data, fmt)
+            other = owners.setdefault(name, data["path"])
+            if other != data["path"]:
+                a, b = (" ".join([data["app"], *p]) for p in (other, data["path"]))
+                raise ValueError(f"docs pages of '{a}' and '{b}' would both be written to {name}; rename one of them")
+            current[name] = fingerprint
+            if previous.get(name) != fingerprint or name not in existing:
+                pending.setdefault(data["path"][0] if data["path"] else "", []).append((fmt, name, data))
+    total = sum(len(pages) for pages in pending.values())
+    jobs = jobs or os.cpu_count() or 1
+    written: list[str] = []
+    if jobs > 1 and len(pending) > 1 and total >= _PARALLEL_MIN:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(pending)), mp_context=mp_context()) as pool:
+            for names in pool.map(_write_pages, [str(directory)] * len(pending), pending.values()):
+                written.extend(names)
+    else:
+        for pages in pending.values():
+            written.extend(_write_pages(str(directory), pages))
+    removed = sorted(name for name in previous if name not in current)
+    for name in removed:
+        (directory / name).unlink(missing_ok=True)
+    manifest = {"version": _LAYOUT_VERSION, "pages": current}
+    atomic_write_bytes(manifest_path, json.dumps(manifest, indent=2, sort_keys=True).encode("utf-8"))
+    return docs_report(written=sorted(written), unchanged=len(current) - total, removed=removed)
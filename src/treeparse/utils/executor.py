@@ -0,0 +1,225 @@
+"""Process-pool execution of command callbacks."""
+
+from __future__ import annotations
+
+import io
+import multiprocessing
+import queue
+import sys
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import redirect_stdout
+from typing import TYPE_CHECKING, Any, Callable
+
+if TYPE_CHECKING:
+    from ..models.cli import cli
+
+# Worker-side state, set once per worker process by ``_init_worker``.
+_worker_root: "cli" | None = None
+_worker_queue: Any = None
+
+
+def _init_worker(root: "cli", out_queue):
+    global _worker_root, _worker_queue
+    _worker_root = root
+    _worker_queue = out_queue
+
+
+class _queue_writer(io.TextIOBase):
+    """stdout replacement that ships each write back to the parent process."""
+
+    def __init__(self, out_queue, task_id: int):
+        self._queue = out_queue
+        self._task_id = task_id
+
+    def write(self, s: str) -> int:
+        if s:
+            self._queue.put((self._task_id, s))
+        return len(s)
+
+
+def resolve_callback(root: "cli", path: list[str]) -> Callable[..., Any]:
+    """Find the callback at ``path``; a trailing token under a chain names a step."""
+    node = root
+    for p in path:
+        if hasattr(node, "chained_commands"):
+            return next(c for c in node.chained_commands if c.name == p).callback
+        node = next(c for c in node.subgroups + node.commands if c.display_name == p)
+    return node.callback
+
+
+def _run_in_worker(task_id: int, path: list[str], kwargs: dict[str, Any]):
+    try:
+        callback = resolve_callback(_worker_root, path)
+        with redirect_stdout(_queue_writer(_worker_queue, task_id)):
+            try:
+                return ("ok", callback(**kwargs))
+            except SystemExit as e:
+                return ("exit", e.code)
+    finally:
+        _worker_queue.put((task_id, None))
+
+
+def mp_context():
+    """Multiprocessing context for worker pools.
+
+    On Linux, a single-threaded process forks, so workers inherit the built
+    tree including callbacks that are not importable by name (closures,
+    ``__main__`` functions). Forking a threaded process can deadlock, so it
+    uses ``forkserver`` instead; other platforms use their default method.
+    Both pickle the tree, which then has to hold importable callbacks.
+    """
+    if sys.platform.startswith("linux"):
+        return multiprocessing.get_context("fork" if threading.active_count() == 1 else "forkserver")
+    return multiprocessing.get_context()
+
+
+class process_executor:
+    """Reusable ``ProcessPoolExecutor`` whose workers are preloaded with a cli tree.
+
+    Callbacks are addressed by command path, so only kwargs and return values
+    cross the process boundary. stdout written in a worker is streamed back
+    through a queue and replayed in the parent as it arrives.
+    """
+
+    def __init__(self, root: "cli", max_workers: int | None = None):
+        ctx = mp_context()
+        self._queue = ctx.Queue()
+        self._pool = ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=ctx,
+            initializer=_init_worker,
+            initargs=(root, self._queue),
+        )
+        self._next_id = 0
+        self._buffers: dict[int, list[str]] = {}
+        self._finished: set[int] = set()
+
+    def submit(self, path: list[str], kwargs: dict[str, Any]) -> tuple[int, Future]:
+        task_id = self._next_id
+        self._next_id += 1
+        return task_id, self._pool.submit(_run_in_worker, task_id, list(path), kwargs)
+
+    def wait(self, task_id: int, future: Future, write: Callable[[str], Any]) -> Any:
+        """Stream ``task_id``'s output to ``write`` until it finishes; return its value.
+
+        Output of other tasks read meanwhile is buffered for their own ``wait``.
+        A ``SystemExit`` in the worker is re-raised here with the same code.
+        """
+        while True:
+            for chunk in self._buffers.pop(task_id, ()):
+                write(chunk)
+            if task_id in self._finished:
+                self._finished.discard(task_id)
+                break
+            try:
+                tid, chunk = self._queue.get(timeout=0.05)
+            except queue.Empty:
+                if future.done() and isinstance(future.exception(), BrokenProcessPool):
+                    break
+                continue
+            if chunk is None:
+                self._finished.add(tid)
+            elif tid == task_id:
+                write(chunk)
+            else:
+                self._buffers.setdefault(tid, []).append(chunk)
+        status, value = future.result()
+        if status == "exit":
+            raise SystemExit(value)
+        return value
+
+    def run(self, path: list[str], kwargs: dict[str, Any]) -> Any:
+        task_id, future = self.submit(path, kwargs)
+        return self.wait(task_id, future, lambda s: sys.stdout.write(s))
+
+    def shutdown(self):
+        self._pool.shutdown(wait=True)
+        self._queue.close()
+
+
+class _thread_router(io.TextIOBase):
+    """stdout replacement that sends each thread's writes to its own buffer."""
+
+    def __init__(self, fallback):
+        self.fallback = fallback
+        self.local = threading.local()
+
+    def write(self, s: str) -> int:
+        buffer = getattr(self.local, "buffer", None)
+        return (buffer if buffer is not None else self.fallback).write(s)
+
+    def flush(self):
+        self.fallback.flush()
+
+
+def _collect(outcomes: list[tuple[str, Any]]) -> list[Any]:
+    """Aggregate per-item outcomes: first exception wins, then first non-zero exit code."""
+    for status, value in outcomes:
+        if status == "error":
+            raise value
+    for status, value in outcomes:
+        if status == "exit" and value not in (0, None):
+            raise SystemExit(value)
+    return [value if status == "ok" else None for status, value in outcomes]
+
+
+def map_threads(
+    callback: Callable[..., Any], kwargs: dict[str, Any], dest: str, items: list[Any], jobs: int
+) -> list[Any]:
+    """Call ``callback`` once per item on up to ``jobs`` threads.
+
+    Each call's stdout is buffered and written in input order as soon as all
+    earlier items have finished.
+    """
+    router = _thread_router(sys.stdout)
+
+    def run_one(item):
+        buffer = io.StringIO()
+        router.local.buffer = buffer
+        try:
+            outcome = ("ok", callback(**{**kwargs, dest: item}))
+        except SystemExit as e:
+            outcome = ("exit", e.code)
+        except Exception as e:
+            outcome = ("error", e)
+        finally:
+            router.local.buffer = None
+        return outcome, buffer.getvalue()
+
+    outcomes = []
+    with redirect_stdout(router), ThreadPoolExecutor(max_workers=jobs) as pool:
+        for future in [pool.submit(run_one, item) for item in items]:
+            outcome, output = future.result()
+            router.fallback.write(output)
+            outcomes.append(outcome)
+    return _collect(outcomes)
+
+
+def map_processes(
+    executor: process_executor, path: list[str], kwargs: dict[str, Any], dest: str, items: list[Any], jobs: int
+) -> list[Any]:
+    """Like ``map_threads`` but on ``executor``'s workers, keeping at most ``jobs`` in flight."""
+    pending: deque = deque()
+    remaining = iter(items)
+
+    def submit_next():
+        for item in remaining:
+            pending.append(executor.submit(path, {**kwargs, dest: item}))
+            return
+
+    for _ in range(jobs):
+        submit_next()
+    outcomes = []
+    while pending:
+        task_id, future = pending.popleft()
+        try:
+            outcomes.append(("ok", executor.wait(task_id, future, lambda s: sys.stdout.write(s))))
+        except SystemExit as e:
+            outcomes.append(("exit", e.code))
+        except Exception as e:
+            outcomes.append(("error", e))
+        submit_next()
+    return _collect(outcomes)
@@ -0,0 +1,165 @@
+"""Content hashing of cli trees for cache keys."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from typing import Any
+
+from .metadata import metadata_store
+from .tracking import watch
+
+
+def _type_id(t: Any) -> str:
+    module = getattr(t, "__module__", "")
+    name = getattr(t, "__qualname__", None) or getattr(t, "__name__", None) or repr(t)
+    return f"{module}:{name}"
+
+
+def _callback_id(cb: Any, metadata: metadata_store) -> list[str]:
+    meta = metadata.get(cb)
+    return [_type_id(meta.unwrapped), meta.doc]
+
+
+def _param_payload(item) -> dict[str, Any]:
+    d = item.model_dump(exclude={"arg_type", "choices", "default"})
+    d["arg_type"] = _type_id(item.arg_type)
+    d["choices"] = None if item.choices is None else [repr(c) for c in item.choices]
+    d["default"] = repr(item.default)
+    return d
+
+
+def _local_payload(node, metadata: metadata_store) -> dict[str, Any]:
+    """Everything about ``node`` that help/JSON output can show, except its children."""
+    # Field lookups rather than hasattr: a missing attribute is slow on pydantic models.
+    fields = type(node).model_fields
+    d: dict[str, Any] = {"kind": type(node).__name__, "name": node.name, "help": node.help}
+    for field in ("sort_key", "fold", "default", "context", "map_over", "executor", "jobs"):
+        if field in fields:
+            d[field] = getattr(node, field)
+    d["options"] = [_param_payload(o) for o in node.options] if "options" in fields else []
+    d["arguments"] = [_param_payload(a) for a in node.arguments] if "arguments" in fields else []
+    if "callback" in fields and node.callback is not None:
+        d["callback"] = _callback_id(node.callback, metadata)
+    return d
+
+
+def _children(node) -> dict[str, list]:
+    fields = type(node).model_fields
+    if "chained_commands" in fields:
+        return {"chained": node.chained_commands}
+    if "subgroups" in fields:
+        return {"subgroups": node.subgroups, "commands": node.commands}
+    return {}
+
+
+def _digest(payload: dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=repr).encode()).hexdigest()
+
+
+class fingerprint_memo:
+    """Content hashes of the subtrees below a cli root, each computed once.
+
+    A node's hash covers its own fields and its children's hashes, so after
+    an in-place change only the changed node and its ancestors need
+    rehashing. Once it has hashed anything, the memo watches the tracked
+    models (``tracking.watch``): assigning a field of a node, option or
+    argument, or modifying one of their lists, invalidates the hashes that
+    contain it. Entries hold their node, so ids stay unique while cached.
+    """
+
+    def __init__(self):
+        self._hashes: dict[int, tuple[Any, str]] = {}
+        # Owner id per part id; a set of them for parts shared by several owners.
+        self._parents: dict[int, int | set[int]] = {}
+        self._watching = False
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+    def subtree(self, node, metadata: metadata_store) -> str:
+        """Hash of ``node`` and everything below it."""
+        entry = self._hashes.get(id(node))
+        if entry is not None:
+            return entry[1]
+        digest = _digest(self._payload(node, metadata))
+        self._hashes[id(node)] = (node, digest)
+        return digest
+
+    def root(self, root, metadata: metadata_store) -> str:
+        """Hash of ``root`` re-read from its own fields, with its children's memoized hashes."""
+        return _digest(self._payload(root, metadata))
+
+    def _payload(self, node, metadata: metadata_store) -> dict[str, Any]:
+        if not self._watching:
+            watch(self)
+            self._watching = True
+        d = _local_payload(node, metadata)
+        fields = type(node).model_fields
+        for field in ("options", "arguments"):
+            if field in fields:
+                params = getattr(node, field)
+                self._link(node, params)
+                self._link(node, (params,))
+                for param in params:
+                    self._link(param, (param.__dict__.get("flags"), param.choices))
+        for key, children in _children(node).items():
+            d[key] = [self.subtree(c, metadata) for c in children]
+            self._link(node, children)
+            self._link(node, (children,))
+        return d
+
+    def _link(self, owner, parts) -> None:
+        """Record that a change to any of ``parts`` changes ``owner``."""
+        parents = self._parents
+        owner_id = id(owner)
+        for part in parts:
+            if part is None:
+                continue
+            found = parents.setdefault(id(part), owner_id)
+            if found != owner_id:
+                if type(found) is set:
+                    found.add(owner_id)
+                else:
+                    parents[id(part)] = {found, owner_id}
+
+    def invalidate(self, objects) -> None:
+        """Forget the hashes of ``objects`` (nodes, parameters or their lists) and of every subtree containing them."""
+        pending = [id(o) for o in objects]
+        while pending:
+            key = pending.pop()
+            self._hashes.pop(key, None)
+            found = self._parents.pop(key, None)
+            if type(found) is set:
+                pending.extend(found)
+            elif found is not None:
+                pending.append(found)
+
+    def clear(self) -> None:
+        self._hashes.clear()
+        self._parents.clear()
+
+
+def tree_fingerprint(root, memo: fingerprint_memo | None = None) -> str:
+    """Stable sha256 over the tree structure and the root's display settings.
+
+    Subtree hashes are taken from ``memo`` when given; the root's own
+    fields and settings are always re-read.
+    """
+    memo = fingerprint_memo() if memo is None else memo
+    payload = {
+        "tree": memo.root(root, root.metadata),
+        "settings": {
+            "max_width": root.max_width,
+            "theme": root.theme.value,
+            "colors": root.colors.model_dump(),
+            "show_types": root.show_types,
+            "show_defaults": root.show_defaults,
+            "line_connect": root.line_connect,
+            "version": root.version,
+            "help_depth": root.help_depth,
+            "help_budget": root.help_budget,
+            "help_choices": root.help_choices,
+        },
+    }
+    return _digest(payload)
@@ -0,0 +1,580 @@
+"""Help layout shared by the rich and plain-text help renderers (no rich imports)."""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import sys
+import unicodedata
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Iterator
+
+from ..models.chain import chain
+from ..models.command import command
+from ..models.group import group
+from .choices import format_choices
+from .helpers import atomic_write_bytes
+from .pager import pager_writer
+
+if TYPE_CHECKING:
+    from ..models.cli import cli
+
+# A label is a list of ``(text, style)`` spans; ``style`` is a rich style
+# string or ``Style`` ("" for unstyled) that the plain renderer ignores.
+span_list = list[tuple[str, Any]]
+
+
+def _format_default(value) -> str:
+    """Render a default value for help, abbreviating the home directory as ``~``.
+
+    Keeps help output portable and avoids leaking the user's home path when a
+    default points at a directory under ``$HOME``.
+    """
+    text = str(value)
+    home = os.path.expanduser("~")
+    if home and home != os.sep and (text == home or text.startswith(home + os.sep)):
+        return "~" + text[len(home) :]
+    return text
+
+
+_markup_tag = re.compile(r"((\\*)\[([a-z#/@][^[]*?)])")
+
+
+def strip_markup(markup: str) -> str:
+    """Return the text rich would display for console ``markup``.
+
+    Tags are dropped and ``\\[`` escapes resolved exactly as rich does;
+    ``:emoji:`` codes are left as written.
+    """
+    pieces = []
+    position = 0
+    for match in _markup_tag.finditer(markup):
+        full_text, escapes, _ = match.groups()
+        start, end = match.span()
+        if start > position:
+            pieces.append(markup[position:start])
+        if escapes:
+            backslashes, escaped = divmod(len(escapes), 2)
+            if backslashes:
+                pieces.append("\\" * backslashes)
+            if escaped:
+                pieces.append(full_text[len(escapes) :])
+                position = end
+                continue
+        position = end
+    if position < len(markup):
+        pieces.append(markup[position:])
+    return "".join(p.replace("\\[", "[") for p in pieces)
+
+
+_markup_escapable = re.compile(r"(\\*)(\[[a-z#/@][^[]*?])")
+
+
+def escape_markup(text: str) -> str:
+    """Escape ``text`` for use inside console markup, as ``rich.markup.escape`` does."""
+    text = _markup_escapable.sub(lambda m: f"{m.group(1)}{m.group(1)}\\{m.group(2)}", text)
+    if text.endswith("\\") and not text.endswith("\\\\"):
+        return text + "\\"
+    return text
+
+
+@lru_cache(maxsize=4096)
+def _char_cells(ch: str) -> int:
+    code = ord(ch)
+    if code < 32 or 0x7F <= code < 0xA0:
+        return 0
+    if unicodedata.category(ch) in ("Mn", "Me", "Mc", "Cf", "Zl", "Zp"):
+        return 0
+    # Hangul jamo vowels/finals and emoji skin-tone modifiers join the preceding character.
+    if 0x1160 <= code <= 0x11FF or 0xD7B0 <= code <= 0xD7FF or 0x1F3FB <= code <= 0x1F3FF:
+        return 0
+    return 2 if unicodedata.east_asian_width(ch) in ("W", "F") else 1
+
+
+def cell_len(text: str) -> int:
+    """Terminal cells needed to display ``text`` (wide East Asian characters take two)."""
+    if text.isascii() and text.isprintable():
+        return len(text)
+    return sum(map(_char_cells, text))
+
+
+# Rendered help text per cli (``cli._memo("help")``), keyed by ``help_layout._cache_key``; bounded LRU.
+_RENDER_CACHE_SIZE = 128
+
+
+class _node_layout:
+    """Measurements of one node, computed once per render and reused for its label."""
+
+    __slots__ = ("args_str", "name_len", "options", "children")
+
+
+class _option_layout:
+    """Flag and type/choices text of one option plus its column width."""
+
+    __slots__ = ("flags_str", "detail", "width")
+
+
+class help_layout(ABC):
+    """Backend-independent part of tree help rendering.
+
+    Rendering is one layout pass over the visible nodes (measuring column
+    widths and recording rows in tree order) followed by label construction
+    from the recorded rows, so each node is measured and sorted once. Labels
+    are built as ``(text, style)`` spans; subclasses turn them into output
+    via ``_render`` and identify their output flavour via ``_output_key``.
+    """
+
+    def __init__(self, root_cli: "cli"):
+        self._root = root_cli
+        self._verbose = False
+        self._normal: dict[str, Any] = {}
+        self._dim: dict[str, Any] = {}
+        self._depth: int | None = None
+        self._auto_depth: int | None = None
+        self._search: str | None = None
+        self._hits: list | None = None
+        self._node_layouts: dict[int, _node_layout] = {}
+        self._option_layouts: dict[int, _option_layout] = {}
+
+    _cell_len = staticmethod(cell_len)
+
+    @abstractmethod
+    def _output_key(self) -> tuple:
+        """What distinguishes this backend's output in the render cache key."""
+
+    @abstractmethod
+    def _render(self, path: list[str], verbose: bool) -> Iterator[str]:
+        """Help for ``path`` as chunks of output text."""
+
+    def _styles(self) -> tuple[dict, dict]:
+        """Span style per ``color_config`` role, normal and dimmed (for ancestor rows)."""
+        return self._root.colors.style_strings()
+
+    def _get_docstring(self, node) -> str:
+        """Return cleaned docstring from a command or chain's callbacks."""
+        if isinstance(node, command):
+            return self._root.metadata.doc(node.callback)
+        if isinstance(node, chain):
+            parts = []
+            for cmd in node.chained_commands:
+                doc = self._root.metadata.doc(cmd.callback)
+                if doc:
+                    parts.append(f"[{cmd.name}] {doc}")
+            return "\n".join(parts)
+        return ""
+
+    def _cache_key(self, path: list[str], verbose: bool) -> tuple:
+        """Everything the rendered text depends on besides the tree, including the output flavour."""
+        root_cli = self._root
+        return (
+            tuple(path),
+            verbose,
+            root_cli.max_width,
+            root_cli.theme.value,
+            root_cli.line_connect,
+            root_cli.show_types,
+            root_cli.show_defaults,
+            self._depth if self._depth is not None else root_cli.help_depth,
+            root_cli.help_budget,
+            self._search,
+            self._output_key(),
+            os.path.expanduser("~"),
+            root_cli._resolve_version(),
+            root_cli._config_token(),
+        )
+
+    def render(self, path: list[str], verbose: bool = False, depth: int | None = None, search: str | None = None):
+        """Write help for ``path`` to stdout, reusing a cached rendering when the key matches.
+
+        ``depth`` limits how many levels below the selected node are expanded
+        (default: ``cli.help_depth``, else whatever fits ``cli.help_budget``).
+        Renderings are kept in memory by the root and, when ``cache_dir``
+        is set on it, under ``<cache_dir>/help`` (keyed by
+        ``cli._disk_token()``, so the tree is not walked for the key). With ``search``, only nodes matching
+        it (and their ancestors) are shown. A fresh rendering is written chunk
+        by chunk as it is produced, through a pager when it outgrows the
+        terminal.
+        """
+        root_cli = self._root
+        self._depth = depth
+        self._search = search
+        out = pager_writer(sys.stdout, enabled=root_cli.help_pager)
+        key = self._cache_key(path, verbose)
+        memory = root_cli._memo("help")
+        text = memory.get(key)
+        token = None if root_cli.cache_dir is None else root_cli._disk_token()
+        disk_path = None
+        if token is not None:
+            digest = hashlib.sha256(repr((token, key)).encode()).hexdigest()
+            disk_path = root_cli.cache_dir / "help" / f"{digest}.txt"
+        if text is None and disk_path is not None and disk_path.exists():
+            text = disk_path.read_text(encoding="utf-8")
+        try:
+            if text is None:
+                chunks = []
+                for chunk in self._render(path, verbose):
+                    out.write(chunk)
+                    chunks.append(chunk)
+                text = "".join(chunks)
+                if disk_path is not None:
+                    atomic_write_bytes(disk_path, text.encode("utf-8"))
+            else:
+                out.write(text)
+        finally:
+            out.close()
+        memory[key] = text
+        memory.move_to_end(key)
+        while len(memory) > _RENDER_CACHE_SIZE:
+            memory.popitem(last=False)
+
+    def _header(self, path: list[str]) -> tuple[list[str], str, str]:
+        """Resolve ``path`` and return the effective path plus the usage and description markup."""
+        root_cli = self._root
+        # Find the deepest valid command path
+        current = root_cli
+        consumed = 0
+        for i, p in enumerate(path):
+            if not hasattr(current, "subgroups"):
+                if isinstance(current, command) and consumed < len(path):
+                    break
+                raise ValueError(f"Path not found: {path}")
+            children = current.subgroups + current.commands
+            ch = next((c for c in children if c.display_name == p), None)
+            if ch is None:
+                break
+            current = ch
+            consumed = i + 1
+        effective_path = path[:consumed]
+        path_str = " ".join(effective_path)
+        if path_str:
+            path_str += " "
+        if consumed < len(path):
+            path_str += "[ARGS...] "
+        version_hint = ", --version, -V" if root_cli._resolve_version() else ""
+        usage = (
+            f"[bold]Usage: {root_cli.display_name} {path_str}... "
+            f"[rgb(45,45,45)] (--json, -j, --help, -h, --hv{version_hint})"
+        )
+        description = (
+            f"[{root_cli.colors.requested_help}]Description: {current.help}[/{root_cli.colors.requested_help}]"
+        )
+        return effective_path, usage, description
+
+    def _labels(self, effective_path: list[str], verbose: bool) -> tuple[list[int], Iterator[span_list]]:
+        """Lay out the tree; return each row's parent row (-1 for the root) and its labels, built lazily."""
+        self._verbose = verbose
+        self._normal, self._dim = self._styles()
+        limit = self._depth if self._depth is not None else self._root.help_depth
+        self._auto_depth = None
+        self._hits = None
+        if self._search is not None:
+            self._hits = self._root.search(self._search, effective_path)
+            rows, max_start = self._layout(effective_path, matched={tuple(h.path) for h in self._hits})
+        else:
+            if limit is None and self._root.help_budget is not None:
+                limit = self._auto_depth = self._budget_depth(effective_path)
+            rows, max_start = self._layout(effective_path, limit)
+
+        def labels() -> Iterator[span_list]:
+            yield self._get_root_label(max_start, 0, True)
+            for kind, item, _, depth, on_path, is_ancestor in rows:
+                if kind == "option":
+                    yield self._get_option_label(item, max_start, depth, is_ancestor)
+                elif kind == "folded":
+                    yield self._get_folded_label(item, max_start, depth, is_ancestor)
+                else:
+                    yield self._get_label(item, max_start, on_path, depth, is_ancestor)
+
+        return [-1] + [row[2] for row in rows], labels()
+
+    def _node_layout(self, node) -> _node_layout:
+        layout = self._node_layouts.get(id(node))
+        if layout is None:
+            layout = _node_layout()
+            args_list = node.arguments if hasattr(node, "arguments") else node.effective_arguments
+            layout.args_str = " ".join(
+                self._format_arg_part(arg) for arg in sorted(args_list, key=lambda x: x.sort_key)
+            )
+            layout.name_len = len(f"{node.display_name} {layout.args_str}".rstrip())
+            opts = node.options if hasattr(node, "options") else node.effective_options
+            layout.options = sorted(opts, key=lambda x: x.sort_key)
+            if isinstance(node, (command, chain)):
+                layout.children = None
+            else:
+                layout.children = sorted(node.subgroups + node.commands, key=lambda x: x.sort_key)
+            self._node_layouts[id(node)] = layout
+        return layout
+
+    def _option_layout(self, opt) -> _option_layout:
+        layout = self._option_layouts.get(id(opt))
+        if layout is None:
+            layout = _option_layout()
+            layout.flags_str = ", ".join(opt.sorted_flags)
+            layout.detail = ""
+            if self._root.show_types and not opt.flag:
+                layout.detail = f": {opt.arg_type.__name__}"
+            if opt.choices is not None:
+                layout.detail += f" ({format_choices(opt.choices, self._root.help_choices)})"
+            layout.width = len(layout.flags_str) + len(layout.detail)
+            self._option_layouts[id(opt)] = layout
+        return layout
+
+    def _footer(self) -> str | None:
+        """Markup for a note after the tree: search result count, or that the row budget folded levels."""
+        if self._hits is not None:
+            count = len(self._hits)
+            return f"[dim]{count} {'match' if count == 1 else 'matches'} for '{escape_markup(self._search)}'[/dim]"
+        if self._auto_depth is None:
+            return None
+        levels = "level" if self._auto_depth == 1 else "levels"
+        return (
+            f"[dim]Showing {self._auto_depth} {levels}; deeper groups are folded to fit "
+            f"{self._root.help_budget} rows. Use --help-depth N or '<group> --help' for more.[/dim]"
+        )
+
+    def _budget_depth(self, effective_path: list[str]) -> int | None:
+        """Deepest level below the selected node whose rows fit ``help_budget``; None if all fit.
+
+        Counts level by level without sorting or measuring, and stops at the
+        first level over budget, so huge trees are never walked in full. At
+        least one level is always shown.
+        """
+        node = self._root
+        for name in effective_path:
+            node = next(c for c in node.subgroups + node.commands if c.display_name == name)
+        if not hasattr(node, "subgroups"):
+            return None
+        budget = self._root.help_budget
+        total = len(node.options)
+        frontier = node.subgroups + node.commands
+        group_options = 0
+        level = 1
+        while frontier:
+            # Groups on the previous level are expanded now, so their options show too.
+            total += group_options + len(frontier)
+            expanded = []
+            for child in frontier:
+                if isinstance(child, group):
+                    if not child.fold:
+                        expanded.append(child)
+                else:
+                    total += len(child.options if hasattr(child, "options") else child.effective_options)
+            if total > budget:
+                return max(1, level - 1)
+            group_options = sum(len(g.options) for g in expanded)
+            frontier = [c for g in expanded for c in g.subgroups + g.commands]
+            level += 1
+        return None
+
+    def _layout(
+        self, effective_path: list[str], limit: int | None = None, matched: set[tuple[str, ...]] | None = None
+    ) -> tuple[list[tuple], int]:
+        """Walk the visible tree once, returning label rows in tree order and the help column.
+
+        Each row is ``(kind, item, parent_row, depth, on_path, is_ancestor)``
+        where ``parent_row`` indexes the rows with 0 standing for the root.
+        Groups ``limit`` levels below the selected node are shown folded.
+        With ``matched`` (search results), only those paths and their
+        ancestors are shown, and only matched nodes list their options.
+        """
+        rows: list[tuple] = []
+        selected_depth = len(effective_path)
+        max_start = 0
+        visible = None
+        if matched is not None:
+            visible = {path[:i] for path in matched for i in range(1, len(path) + 1)}
+
+        def visit(node, index: int, on_path: bool, remaining_path: list[str], depth: int, node_path: tuple):
+            nonlocal max_start
+            layout = self._node_layout(node)
+            max_start = max(max_start, depth * 4 + layout.name_len)
+            is_ancestor = depth < selected_depth
+            if matched is None or node_path in matched:
+                for opt in layout.options:
+                    max_start = max(max_start, (depth + 1) * 4 + self._option_layout(opt).width)
+                    rows.append(("option", opt, index, depth + 1, False, is_ancestor))
+            if layout.children is None:
+                return
+            if on_path and remaining_path:
+                child = next((c for c in layout.children if c.display_name == remaining_path[0]), None)
+                if child is not None:
+                    rows.append(("node", child, index, depth + 1, True, depth + 1 < selected_depth))
+                    visit(child, len(rows), True, remaining_path[1:], depth + 1, node_path + (child.display_name,))
+                return
+            for child in layout.children:
+                child_path = node_path + (child.display_name,)
+                if visible is not None:
+                    if child_path in visible:
+                        hit = child_path in matched
+                        rows.append(("node", child, index, depth + 1, hit, not hit))
+                        visit(child, len(rows), False, [], depth + 1, child_path)
+                elif isinstance(child, group) and (
+                    child.fold or (limit is not None and depth + 1 - selected_depth >= limit)
+                ):
+                    max_start = max(max_start, (depth + 1) * 4 + len(f"{child.display_name} [...]"))
+                    rows.append(("folded", child, index, depth + 1, False, False))
+                else:
+                    rows.append(("node", child, index, depth + 1, False, False))
+                    visit(child, len(rows), False, [], depth + 1, child_path)
+
+        visit(self._root, 0, True, effective_path, 0, ())
+        return rows, max_start
+
+    def _format_arg_part(self, arg) -> str:
+        root_cli = self._root
+        is_optional = arg.nargs in ("?", "*")
+        inner = arg.name.upper()
+        extras = []
+        if root_cli.show_types and arg.show_type:
+            extras.append(arg.arg_type.__name__)
+        if arg.choices is not None:
+            extras.append(f"({format_choices(arg.choices, root_cli.help_choices)})")
+        if extras:
+            inner += f", {' '.join(extras)}"
+        if is_optional:
+            if root_cli.show_defaults and arg.default is not None:
+                inner += f"={_format_default(arg.default)}"
+            return f"[{inner}]"
+        return f"<{inner}>"
+
+    def _wrap_help(self, help: str, width: int) -> list[str]:
+        if width <= 0:
+            width = 20
+        lines = []
+        current = []
+        current_len = 0
+        words = help.split()
+        for word in words:
+            word_len = len(word)
+            if current and current_len + 1 + word_len > width:
+                lines.append(" ".join(current))
+                current = [word]
+                current_len = word_len
+            else:
+                if current:
+                    current_len += 1
+                current.append(word)
+                current_len += word_len
+        if current:
+            lines.append(" ".join(current))
+        return lines
+
+    def _append_help(self, label: span_list, help: str, max_start: int, name_len: int, padding: int, help_style: Any):
+        """Append wrapped ``help`` after a name of ``name_len`` cells padded to the help column."""
+        root_cli = self._root
+        help_lines = self._wrap_help(help, root_cli.max_width - (max_start + 1))
+        if root_cli.line_connect:
+            label.append(("─" * (padding + 1), self._normal["connector"]))
+        else:
+            label.append((" " * padding, ""))
+            label.append((" ", ""))
+        label.append((help_lines[0], help_style))
+        for hl in help_lines[1:]:
+            label.append(("\n", ""))
+            label.append((" " * (name_len + padding + 1), ""))
+            label.append((hl, help_style))
+
+    def _span_len(self, label: span_list) -> int:
+        return self._cell_len("".join(text for text, _ in label))
+
+    def _get_root_label(self, max_start: int, depth: int, is_ancestor: bool) -> span_list:
+        root_cli = self._root
+        styles = self._dim if is_ancestor else self._normal
+        help_style = styles["normal_help"]
+        label: span_list = [(root_cli.display_name, styles["app"])]
+        args_str = self._node_layout(root_cli).args_str
+        if args_str:
+            label.append((" ", ""))
+            label.append((args_str, styles["argument"]))
+        name_len = self._span_len(label)
+        padding = max_start - depth * 4 - name_len
+        if root_cli.help:
+            self._append_help(label, root_cli.help, max_start, name_len, padding, help_style)
+        else:
+            label.append((" " * padding, ""))
+        return label
+
+    def _get_label(self, node, max_start: int, on_path: bool, depth: int, is_ancestor: bool) -> span_list:
+        node_type = type(node).__name__
+        styles = self._dim if is_ancestor else self._normal
+        help_style = styles["requested_help" if on_path else "normal_help"]
+        name_style = styles["group" if node_type == "group" else "command"]
+        arg_style = styles["argument"]
+        label: span_list = [(node.display_name, name_style)]
+        args_str = self._node_layout(node).args_str
+        if args_str:
+            label.append((" ", ""))
+            label.append((args_str, arg_style))
+        name_len = self._span_len(label)
+        padding = max_start - depth * 4 - name_len
+        doc = self._get_docstring(node)
+        has_doc = bool(doc)
+        help_text = node.help
+        if getattr(node, "default", None):
+            help_text = (help_text + " " if help_text else "") + f"(default: {node.default})"
+        if help_text:
+            self._append_help(label, help_text, max_start, name_len, padding, help_style)
+        else:
+            label.append((" " * padding, ""))
+        if has_doc and not self._verbose:
+            label.append((" ▼", self._normal["marker"]))
+        if self._verbose and has_doc:
+            # Determine if this node will render children below the docstring.
+            # When it does, draw │ at position 0 of each continuation line so
+            # the vertical connector is preserved through the docstring block.
+            if node_type in ("command", "chain"):
+                has_rendered_children = bool(node.effective_options)
+            else:
+                opts = node.options if hasattr(node, "options") else []
+                has_rendered_children = bool(opts) or bool(
+                    getattr(node, "subgroups", None) or getattr(node, "commands", None)
+                )
+            for line in doc.splitlines():
+                if line.strip():
+                    label.append(("\n", ""))
+                    if has_rendered_children:
+                        label.append(("│", self._normal["guide"]))
+                        label.append((" " * (name_len + padding) + line, self._normal["docstring"]))
+                    else:
+                        label.append((" " * (name_len + padding + 1) + line, self._normal["docstring"]))
+        return label
+
+    def _get_folded_label(self, node, max_start: int, depth: int, is_ancestor: bool) -> span_list:
+        styles = self._dim if is_ancestor else self._normal
+        label: span_list = [(f"{node.display_name} [...]", styles["group"])]
+        name_len = self._span_len(label)
+        padding = max_start - depth * 4 - name_len
+        if node.help:
+            self._append_help(label, node.help, max_start, name_len, padding, styles["normal_help"])
+        else:
+            label.append((" " * padding, ""))
+        return label
+
+    def _get_option_label(self, opt, max_start: int, depth: int, is_ancestor: bool) -> span_list:
+        root_cli = self._root
+        styles = self._dim if is_ancestor else self._normal
+        layout = self._option_layout(opt)
+        label: span_list = [(layout.flags_str, styles["option"]), (layout.detail, self._normal["type_color"])]
+        name_len = self._span_len(label)
+        padding = max_start - depth * 4 - name_len
+        if opt.help:
+            self._append_help(label, opt.help, max_start, name_len, padding, styles["option_help"])
+        else:
+            label.append((" " * padding, ""))
+        effective_default = False if (opt.flag and opt.default is None) else opt.default
+        configured = root_cli._config_default(opt) if root_cli.show_defaults else None
+        if configured is not None:
+            value, source = configured
+            default_str = f" (default: {_format_default(value)}, from {_format_default(source)})"
+            if not opt.help:
+                label.append((" ", ""))
+            label.append((default_str, self._normal["default"]))
+        elif root_cli.show_defaults and effective_default is not None:
+            # Defaults have always been passed through rich markup.
+            default_str = strip_markup(f" (default: {_format_default(effective_default)})")
+            if not opt.help:
+                label.append((" ", ""))
+            label.append((default_str, self._normal["default"]))
+        return label
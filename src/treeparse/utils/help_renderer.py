@@ -2,419 +2,83 @@
 
 from __future__ import annotations
 
-import inspect
-import os
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Iterator
 
-from rich.console import Console
+from rich.cells import cell_len
+from rich.console import Console, RenderableType
+from rich.segment import Segment, Segments
 from rich.text import Text
 from rich.tree import Tree
 
-from ..models.chain import chain
-from ..models.command import command
-from ..models.group import group
+from .help_layout import _format_default, help_layout, span_list
 
 if TYPE_CHECKING:
     from ..models.cli import cli
 
+__all__ = ["_format_default", "help_renderer"]
 
-def _format_default(value) -> str:
-    """Render a default value for help, abbreviating the home directory as ``~``.
+# Tree rows captured and yielded together while the rich tree renders.
+_ROW_BATCH = 64
 
-    Keeps help output portable and avoids leaking the user's home path when a
-    default points at a directory under ``$HOME``.
-    """
-    text = str(value)
-    home = os.path.expanduser("~")
-    if home and home != os.sep and (text == home or text.startswith(home + os.sep)):
-        return "~" + text[len(home) :]
-    return text
 
+class help_renderer(help_layout):
+    """Renders styled tree help through a rich ``Console`` and ``Tree``."""
 
-class help_renderer:
-    """Renders rich tree help for a cli node."""
+    _cell_len = staticmethod(cell_len)
 
     def __init__(self, root_cli: "cli"):
-        self._root = root_cli
-        self._verbose = False
-
-    def _get_docstring(self, node) -> str:
-        """Return cleaned docstring from a command or chain's callbacks."""
-        if isinstance(node, command):
-            cb = inspect.unwrap(node.callback)
-            return inspect.getdoc(cb) or ""
-        if isinstance(node, chain):
-            parts = []
-            for cmd in node.chained_commands:
-                doc = inspect.getdoc(inspect.unwrap(cmd.callback)) or ""
-                if doc:
-                    parts.append(f"[{cmd.name}] {doc}")
-            return "\n".join(parts)
-        return ""
-
-    def render(self, path: list[str], verbose: bool = False):
-        self._verbose = verbose
-        root_cli = self._root
-        # Find the deepest valid command path
-        current = root_cli
-        consumed = 0
-        for i, p in enumerate(path):
-            if not hasattr(current, "subgroups"):
-                if isinstance(current, command) and consumed < len(path):
-                    break
-                raise ValueError(f"Path not found: {path}")
-            children = current.subgroups + current.commands
-            ch = next((c for c in children if c.display_name == p), None)
-            if ch is None:
-                break
-            current = ch
-            consumed = i + 1
-        effective_path = path[:consumed]
-        path_str = " ".join(effective_path)
-        if path_str:
-            path_str += " "
-        if consumed < len(path):
-            path_str += "[ARGS...] "
-        version_hint = ", --version, -V" if root_cli._resolve_version() else ""
-        usage = (
-            f"[bold]Usage: {root_cli.display_name} {path_str}... "
-            f"[rgb(45,45,45)] (--json, -j, --help, -h, --hv{version_hint})"
-        )
-        console = Console(width=root_cli.max_width)
-        console.print(usage)
-        console.print(
-            f"[{root_cli.colors.requested_help}]Description: {current.help}[/{root_cli.colors.requested_help}]"
-        )
-        max_start = self._compute_max_start(effective_path)
-        selected_depth = len(effective_path)
-        root_label = self._get_root_label(max_start, 0, True)
-        tree = Tree(root_label, guide_style=root_cli.colors.guide)
-        self._add_children(tree, root_cli, True, effective_path, max_start, 0, selected_depth)
-        console.print(tree)
-
-    def _compute_max_start(self, effective_path: list[str]) -> int:
-        root_cli = self._root
-        max_start = 0
-
-        def collect_recurse(node, on_path: bool, remaining_path: list[str], depth: int):
-            nonlocal max_start
-            name_len = len(self._get_name_part(node))
-            prefix_len = depth * 4
-            max_start = max(max_start, prefix_len + name_len)
-            opts = node.options if hasattr(node, "options") else node.effective_options
-            opts_sorted = sorted(opts, key=lambda x: x.sort_key)
-            for opt in opts_sorted:
-                opt_name = ", ".join(opt.sorted_flags)
-                opt_len = len(opt_name)
-                if root_cli.show_types and not opt.flag:
-                    type_name = opt.arg_type.__name__
-                    opt_len += len(f": {type_name}")
-                if opt.choices is not None:
-                    choices_str = f" ({'|'.join(map(str, opt.choices))})"
-                    opt_len += len(choices_str)
-                opt_prefix = (depth + 1) * 4
-                max_start = max(max_start, opt_prefix + opt_len)
-            if type(node).__name__ in ("command", "chain"):
-                return
-            children = sorted(
-                (node.subgroups + node.commands) if hasattr(node, "subgroups") else [],
-                key=lambda x: x.sort_key,
-            )
-            if on_path and remaining_path:
-                next_name = remaining_path[0]
-                for child in children:
-                    if child.display_name == next_name:
-                        collect_recurse(child, True, remaining_path[1:], depth + 1)
-                        break
-            else:
-                for child in children:
-                    if isinstance(child, group) and child.fold:
-                        folded_name = f"{child.display_name} [...]"
-                        name_len = len(folded_name)
-                        prefix_len = (depth + 1) * 4
-                        max_start = max(max_start, prefix_len + name_len)
-                    else:
-                        collect_recurse(child, False, [], depth + 1)
-
-        collect_recurse(root_cli, True, effective_path, 0)
-        return max_start
-
-    def _format_arg_part(self, arg) -> str:
-        root_cli = self._root
-        is_optional = arg.nargs in ("?", "*")
-        inner = arg.name.upper()
-        extras = []
-        if root_cli.show_types and arg.show_type:
-            extras.append(arg.arg_type.__name__)
-        if arg.choices is not None:
-            extras.append(f"({'|'.join(map(str, arg.choices))})")
-        if extras:
-            inner += f", {' '.join(extras)}"
-        if is_optional:
-            if root_cli.show_defaults and arg.default is not None:
-                inner += f"={_format_default(arg.default)}"
-            return f"[{inner}]"
-        return f"<{inner}>"
-
-    def _get_name_part(self, node) -> str:
-        args_list = node.arguments if hasattr(node, "arguments") else node.effective_arguments
-        args_parts = [self._format_arg_part(arg) for arg in sorted(args_list, key=lambda x: x.sort_key)]
-        args_str = " ".join(args_parts)
-        return f"{node.display_name} {args_str}".rstrip()
-
-    def _wrap_help(self, help: str, width: int) -> list[str]:
-        if width <= 0:
-            width = 20
-        lines = []
-        current = []
-        current_len = 0
-        words = help.split()
-        for word in words:
-            word_len = len(word)
-            if current and current_len + 1 + word_len > width:
-                lines.append(" ".join(current))
-                current = [word]
-                current_len = word_len
-            else:
-                if current:
-                    current_len += 1
-                current.append(word)
-                current_len += word_len
-        if current:
-            lines.append(" ".join(current))
-        return lines
-
-    def _get_root_label(self, max_start: int, depth: int, is_ancestor: bool) -> Text:
-        root_cli = self._root
-        style = "dim " + root_cli.colors.app if is_ancestor else root_cli.colors.app
-        help_style = "dim " + root_cli.colors.normal_help if is_ancestor else root_cli.colors.normal_help
-        label = Text()
-        label.append(root_cli.display_name, style=style)
-        args_parts = [self._format_arg_part(arg) for arg in sorted(root_cli.arguments, key=lambda x: x.sort_key)]
-        args_str = " ".join(args_parts)
-        if args_str:
-            label.append(" ")
-            label.append(
-                args_str,
-                style="dim " + root_cli.colors.argument if is_ancestor else root_cli.colors.argument,
-            )
-        name_len = label.cell_len
-        prefix_len = depth * 4
-        padding = max_start - prefix_len - name_len
-        if root_cli.help:
-            help_lines = self._wrap_help(root_cli.help, root_cli.max_width - (max_start + 1))
-            if root_cli.line_connect:
-                label.append(Text("─" * (padding + 1), style=root_cli.colors.connector))
-                label.append(help_lines[0], style=help_style)
-                for hl in help_lines[1:]:
-                    label.append("\n")
-                    label.append(" " * (name_len + padding + 1))
-                    label.append(hl, style=help_style)
-            else:
-                label.append(" " * padding)
-                label.append(" ")
-                label.append(help_lines[0], style=help_style)
-                for hl in help_lines[1:]:
-                    label.append("\n")
-                    label.append(" " * (name_len + padding + 1))
-                    label.append(hl, style=help_style)
-        else:
-            label.append(" " * padding)
-        return label
-
-    def _get_label(self, node, max_start: int, on_path: bool, depth: int, is_ancestor: bool) -> Text:
-        root_cli = self._root
-        node_type = type(node).__name__
-        base_help_style = root_cli.colors.requested_help if on_path else root_cli.colors.normal_help
-        help_style = "dim " + base_help_style if is_ancestor else base_help_style
-        name_style = (
-            "dim " + root_cli.colors.group
-            if is_ancestor and node_type == "group"
-            else root_cli.colors.group
-            if node_type == "group"
-            else "dim " + root_cli.colors.command
-            if is_ancestor
-            else root_cli.colors.command
-        )
-        arg_style = "dim " + root_cli.colors.argument if is_ancestor else root_cli.colors.argument
-        label = Text()
-        label.append(node.display_name, style=name_style)
-        args_list = node.arguments if node_type == "group" else node.effective_arguments
-        args_parts = [self._format_arg_part(arg) for arg in sorted(args_list, key=lambda x: x.sort_key)]
-        args_str = " ".join(args_parts)
-        if args_str:
-            label.append(" ")
-            label.append(args_str, style=arg_style)
-        name_len = label.cell_len
-        prefix_len = depth * 4
-        padding = max_start - prefix_len - name_len
-        doc = self._get_docstring(node)
-        has_doc = bool(doc)
-        help_text = node.help
-        if getattr(node, "default", None):
-            help_text = (help_text + " " if help_text else "") + f"(default: {node.default})"
-        if help_text:
-            help_lines = self._wrap_help(help_text, root_cli.max_width - (max_start + 1))
-            if root_cli.line_connect:
-                label.append(Text("─" * (padding + 1), style=root_cli.colors.connector))
-                label.append(help_lines[0], style=help_style)
-                for hl in help_lines[1:]:
-                    label.append("\n")
-                    label.append(" " * (name_len + padding + 1))
-                    label.append(hl, style=help_style)
-            else:
-                label.append(" " * padding)
-                label.append(" ")
-                label.append(help_lines[0], style=help_style)
-                for hl in help_lines[1:]:
-                    label.append("\n")
-                    label.append(" " * (name_len + padding + 1))
-                    label.append(hl, style=help_style)
-            if has_doc and not self._verbose:
-                label.append(" ▼", style="dim")
-        else:
-            label.append(" " * padding)
-            if has_doc and not self._verbose:
-                label.append(" ▼", style="dim")
-        if self._verbose and has_doc:
-            # Determine if this node will render children below the docstring.
-            # When it does, draw │ at position 0 of each continuation line so
-            # the vertical connector is preserved through the docstring block.
-            if node_type in ("command", "chain"):
-                has_rendered_children = bool(node.effective_options)
+        super().__init__(root_cli)
+        self._console: Console | None = None
+
+    @property
+    def console(self) -> Console:
+        if self._console is None:
+            self._console = Console(width=self._root.max_width)
+        return self._console
+
+    def _output_key(self) -> tuple:
+        return ("rich", self.console.is_terminal, self.console.color_system)
+
+    def _styles(self) -> tuple[dict, dict]:
+        return self._root.colors.compiled()
+
+    def _render(self, path: list[str], verbose: bool) -> Iterator[str]:
+        console = self.console
+        effective_path, usage, description = self._header(path)
+        yield self._capture(usage)
+        yield self._capture(description)
+        parents, labels = self._labels(effective_path, verbose)
+        branches: list[Tree] = []
+        for parent, spans in zip(parents, labels):
+            label = self._text(spans)
+            if parent < 0:
+                branches.append(Tree(label, guide_style=self._normal["guide"]))
             else:
-                opts = node.options if hasattr(node, "options") else []
-                has_rendered_children = bool(opts) or bool(
-                    getattr(node, "subgroups", None) or getattr(node, "commands", None)
-                )
-            for line in doc.splitlines():
-                if line.strip():
-                    label.append("\n")
-                    if has_rendered_children:
-                        label.append("│", style=root_cli.colors.guide)
-                        label.append(" " * (name_len + padding) + line, style="dim italic")
-                    else:
-                        label.append(" " * (name_len + padding + 1) + line, style="dim italic")
-        return label
-
-    def _get_folded_label(self, node, max_start: int, depth: int, is_ancestor: bool) -> Text:
-        root_cli = self._root
-        name_style = "dim " + root_cli.colors.group if is_ancestor else root_cli.colors.group
-        help_style = "dim " + root_cli.colors.normal_help if is_ancestor else root_cli.colors.normal_help
+                branches.append(branches[parent].add(label))
+        # rich renders the tree row by row, so batches go out as they are laid out.
+        batch: list[Segment] = []
+        rows = 0
+        for segment in console.render(branches[0], console.options):
+            batch.append(segment)
+            if segment.text == "\n":
+                rows += 1
+                if rows == _ROW_BATCH:
+                    yield self._capture(Segments(batch), end="")
+                    batch, rows = [], 0
+        if batch:
+            yield self._capture(Segments(batch), end="")
+        footer = self._footer()
+        if footer is not None:
+            yield self._capture(footer)
+
+    def _capture(self, renderable: RenderableType, end: str = "\n") -> str:
+        with self.console.capture() as capture:
+            self.console.print(renderable, end=end)
+        return capture.get()
+
+    @staticmethod
+    def _text(spans: span_list) -> Text:
         label = Text()
-        label.append(f"{node.display_name} [...]", style=name_style)
-        name_len = label.cell_len
-        prefix_len = depth * 4
-        padding = max_start - prefix_len - name_len
-        if node.help:
-            help_lines = self._wrap_help(node.help, root_cli.max_width - (max_start + 1))
-            if root_cli.line_connect:
-                label.append(Text("─" * (padding + 1), style=root_cli.colors.connector))
-                label.append(help_lines[0], style=help_style)
-                for hl in help_lines[1:]:
-                    label.append("\n")
-                    label.append(" " * (name_len + padding + 1))
-                    label.append(hl, style=help_style)
-            else:
-                label.append(" " * padding)
-                label.append(" ")
-                label.append(help_lines[0], style=help_style)
-                for hl in help_lines[1:]:
-                    label.append("\n")
-                    label.append(" " * (name_len + padding + 1))
-                    label.append(hl, style=help_style)
-        else:
-            label.append(" " * padding)
+        for text, style in spans:
+            label.append(text, style=style)
         return label
-
-    def _get_option_label(self, opt, max_start: int, depth: int, is_ancestor: bool) -> Text:
-        root_cli = self._root
-        option_style = "dim " + root_cli.colors.option if is_ancestor else root_cli.colors.option
-        option_help_style = "dim " + root_cli.colors.option_help if is_ancestor else root_cli.colors.option_help
-        default_style = "bold dim white"
-        label = Text()
-        flags_str = ", ".join(opt.sorted_flags)
-        label.append(flags_str, style=option_style)
-        type_part = ""
-        if root_cli.show_types and not opt.flag:
-            type_name = opt.arg_type.__name__
-            type_part = f": {type_name}"
-        choices_part = ""
-        if opt.choices is not None:
-            choices_part = f" ({'|'.join(map(str, opt.choices))})"
-        label.append(type_part + choices_part, style=root_cli.colors.type_color)
-        name_len = label.cell_len
-        prefix_len = depth * 4
-        padding = max_start - prefix_len - name_len
-        if opt.help:
-            help_lines = self._wrap_help(opt.help, root_cli.max_width - (max_start + 1))
-            if root_cli.line_connect:
-                label.append(Text("─" * (padding + 1), style=root_cli.colors.connector))
-                label.append(help_lines[0], style=option_help_style)
-                for hl in help_lines[1:]:
-                    label.append("\n")
-                    label.append(" " * (name_len + padding + 1))
-                    label.append(hl, style=option_help_style)
-            else:
-                label.append(" " * padding)
-                label.append(" ")
-                label.append(help_lines[0], style=option_help_style)
-                for hl in help_lines[1:]:
-                    label.append("\n")
-                    label.append(" " * (name_len + padding + 1))
-                    label.append(hl, style=option_help_style)
-        else:
-            label.append(" " * padding)
-        effective_default = False if (opt.flag and opt.default is None) else opt.default
-        if root_cli.show_defaults and effective_default is not None:
-            default_str = f" (default: {_format_default(effective_default)})"
-            if opt.help:
-                label.append(Text.from_markup(f"[{default_style}]{default_str}[/{default_style}]"))
-            else:
-                label.append(" ")
-                label.append(Text.from_markup(f"[{default_style}]{default_str}[/{default_style}]"))
-        return label
-
-    def _add_children(
-        self,
-        current_tree: Tree,
-        node,
-        on_path: bool,
-        remaining_path: list[str],
-        max_start: int,
-        depth: int,
-        selected_depth: int,
-    ):
-        is_ancestor = depth < selected_depth
-        opts = node.options if hasattr(node, "options") else node.effective_options
-        opts_sorted = sorted(opts, key=lambda x: x.sort_key)
-        for opt in opts_sorted:
-            opt_label = self._get_option_label(opt, max_start, depth + 1, is_ancestor)
-            current_tree.add(opt_label)
-        node_type = type(node).__name__
-        if node_type in ("command", "chain"):
-            return
-        children = sorted(
-            (node.subgroups + node.commands) if hasattr(node, "subgroups") else [],
-            key=lambda x: x.sort_key,
-        )
-        if on_path and remaining_path:
-            next_name = remaining_path[0]
-            for child in children:
-                if child.display_name == next_name:
-                    child_is_ancestor = (depth + 1) < selected_depth
-                    child_label = self._get_label(child, max_start, True, depth + 1, child_is_ancestor)
-                    child_tree = current_tree.add(child_label)
-                    self._add_children(
-                        child_tree, child, True, remaining_path[1:], max_start, depth + 1, selected_depth
-                    )
-                    break
-        else:
-            for child in children:
-                if isinstance(child, group) and child.fold:
-                    folded_label = self._get_folded_label(child, max_start, depth + 1, False)
-                    current_tree.add(folded_label)
-                else:
-                    child_label = self._get_label(child, max_start, False, depth + 1, False)
-                    child_tree = current_tree.add(child_label)
-                    self._add_children(child_tree, child, False, [], max_start, depth + 1, selected_depth)
@@ -2,16 +2,146 @@
 
 from __future__ import annotations
 
+import hashlib
+import json
+import os
+import pickle
+import re
+import sys
+import tempfile
 from pathlib import Path
 from typing import Any
 
 import yaml
 
+# libyaml's loader when PyYAML was built with it; same results as ``yaml.SafeLoader``, several times faster.
+_SafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
 
-def load_yaml_config(config_path: str) -> dict[str, Any]:
-    """Load YAML configuration file."""
+# Per-process parsed configs, by resolved path: ``(mtime_ns, size, data)``.
+_configs: dict[str, tuple[int, int, Any]] = {}
+
+
+def load_yaml_config(config_path: str, cache_dir: Path | None = None) -> dict[str, Any]:
+    """Load YAML configuration file.
+
+    The parsed result is kept for the rest of the process and, with
+    ``cache_dir``, pickled under ``<cache_dir>/config``; both are keyed by
+    the file's path, mtime and size, so an edited file is parsed again.
+    Callers share the returned dict and must not modify it.
+    """
     path = Path(config_path)
-    if not path.exists():
-        raise FileNotFoundError(f"Config file not found: {config_path}")
-    with open(path, "r") as f:
-        return yaml.safe_load(f) or {}
+    try:
+        st = path.stat()
+    except OSError:
+        raise FileNotFoundError(f"Config file not found: {config_path}") from None
+    key = str(path.resolve())
+    stamp = (st.st_mtime_ns, st.st_size)
+    cached = _configs.get(key)
+    if cached is not None and cached[:2] == stamp:
+        return cached[2]
+    disk_path = None
+    if cache_dir is not None:
+        disk_path = Path(cache_dir) / "config" / f"{hashlib.sha256(key.encode()).hexdigest()}.pickle"
+        try:
+            cached = pickle.loads(disk_path.read_bytes())
+        except Exception:
+            cached = None
+        if isinstance(cached, tuple) and cached[:2] == stamp:
+            _configs[key] = cached
+            return cached[2]
+    with open(path, "rb") as f:
+        data = yaml.load(f, Loader=_SafeLoader) or {}
+    _configs[key] = (*stamp, data)
+    if disk_path is not None:
+        atomic_write_bytes(disk_path, pickle.dumps(_configs[key], protocol=pickle.HIGHEST_PROTOCOL))
+    return data
+
+
+def default_cache_dir() -> Path:
+    """Return the per-user treeparse cache directory.
+
+    Honours ``TREEPARSE_CACHE_DIR`` first, then ``XDG_CACHE_HOME``, and falls
+    back to ``~/.cache/treeparse``. The directory is not created here.
+    """
+    override = os.environ.get("TREEPARSE_CACHE_DIR")
+    if override:
+        return Path(override)
+    xdg = os.environ.get("XDG_CACHE_HOME")
+    base = Path(xdg) if xdg else Path.home() / ".cache"
+    return base / "treeparse"
+
+
+def atomic_write_bytes(path: Path, data: bytes) -> None:
+    """Write ``data`` to ``path`` via a temp file + rename.
+
+    Concurrent readers see either the old or the new file, never a partial one.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+# Per-process answers of ``package_version``, by distribution name.
+_versions: dict[str, str | None] = {}
+
+
+def _site_stamp() -> list:
+    """The ``site-packages``/``dist-packages`` entries of ``sys.path`` with their mtimes.
+
+    Distributions are installed as ``*.dist-info`` directories in these, so
+    installing or removing one changes its directory's mtime. Other entries
+    (the working and script directories) change all the time and are left out.
+    """
+    stamp = []
+    for entry in sys.path:
+        if os.path.basename(entry.rstrip(os.sep)) not in ("site-packages", "dist-packages"):
+            continue
+        try:
+            stamp.append([entry, os.stat(entry).st_mtime_ns])
+        except OSError:
+            stamp.append([entry, None])
+    return stamp
+
+
+def package_version(name: str, cache_dir: Path | None = None) -> str | None:
+    """Installed version of the distribution ``name``, or None if it is not installed.
+
+    ``importlib.metadata`` scans every ``sys.path`` entry, so the answer is
+    kept for the rest of the process and, with ``cache_dir``, recorded in
+    ``<cache_dir>/version/<name>.json`` together with the site directories'
+    mtimes; later processes reuse it without scanning while those match, and
+    a rescan overwrites the record.
+    """
+    if name in _versions:
+        return _versions[name]
+    disk_path = None
+    if cache_dir is not None:
+        stamp = _site_stamp()
+        disk_path = Path(cache_dir) / "version" / f"{re.sub(r'[^A-Za-z0-9._-]', '_', name)}.json"
+        try:
+            record = json.loads(disk_path.read_text(encoding="utf-8"))
+            if record["name"] == name and record["stamp"] == stamp:
+                _versions[name] = record["version"]
+                return _versions[name]
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+    try:
+        from importlib.metadata import version as _pkg_version
+
+        found = _pkg_version(name)
+    except Exception:
+        found = None
+    _versions[name] = found
+    if disk_path is not None:
+        record = {"name": name, "version": found, "stamp": stamp}
+        atomic_write_bytes(disk_path, json.dumps(record).encode("utf-8"))
+    return found
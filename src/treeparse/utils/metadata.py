@@ -0,0 +1,164 @@
+"""Per-callback introspection results, computed once and shareable across processes."""
+
+from __future__ import annotations
+
+import importlib
+import inspect
+import json
+from pathlib import Path
+from typing import Any, Callable
+
+from .helpers import atomic_write_bytes
+from .tracking import register_file
+
+
+def callback_key(unwrapped: Any) -> str | None:
+    """``module:qualname`` of a callback, or None when it does not identify one function.
+
+    Lambdas and functions defined inside other functions share qualnames
+    between distinct objects, so they are never looked up by key.
+    """
+    qualname = getattr(unwrapped, "__qualname__", None)
+    if qualname is None or "<" in qualname:
+        return None
+    return f"{getattr(unwrapped, '__module__', '')}:{qualname}"
+
+
+def import_path(obj: Any) -> str:
+    """``module:qualname`` under which ``obj`` can be imported; ValueError when there is none."""
+    key = callback_key(obj)
+    if key is None or key.startswith(":"):
+        raise ValueError(f"{obj!r} has no import path (lambdas and nested functions cannot be referenced)")
+    try:
+        found = resolve_import_path(key)
+    except (ImportError, AttributeError):
+        found = None
+    if found is not obj:
+        raise ValueError(f"{obj!r} is not importable as {key!r}")
+    return key
+
+
+def resolve_import_path(path: str) -> Any:
+    """Import the object named by ``module:qualname``."""
+    module, _, qualname = path.partition(":")
+    obj = importlib.import_module(module)
+    for part in qualname.split("."):
+        obj = getattr(obj, part)
+    return obj
+
+
+class lazy_callback:
+    """Stand-in for the callable at an import path, imported on its first call.
+
+    It carries the target's ``__module__``/``__qualname__``, so a
+    ``metadata_store`` seeded with the target's entry answers for it
+    without importing anything.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.__module__, _, self.__qualname__ = path.partition(":")
+        self.__name__ = self.__qualname__.rpartition(".")[2]
+        self._target: Callable[..., Any] | None = None
+
+    def resolve(self) -> Callable[..., Any]:
+        if self._target is None:
+            self._target = resolve_import_path(self.path)
+        return self._target
+
+    def __call__(self, *args, **kwargs):
+        return self.resolve()(*args, **kwargs)
+
+    def __reduce__(self):
+        return (lazy_callback, (self.path,))
+
+    def __repr__(self) -> str:
+        return f"lazy_callback({self.path!r})"
+
+
+class callback_meta:
+    """Docstring, name and parameter summary of one callback.
+
+    ``signature`` (with annotations, for validation) is computed on first
+    access only; everything else can come from a persisted store.
+    """
+
+    __slots__ = ("callback", "unwrapped", "key", "name", "doc", "params", "is_async", "_signature")
+
+    def __init__(self, callback: Callable[..., Any], unwrapped: Any, key: str | None, data: dict | None = None):
+        self.callback = callback
+        self.unwrapped = unwrapped
+        self.key = key
+        self._signature: inspect.Signature | None = None
+        if data is None:
+            self._signature = inspect.signature(unwrapped)
+            data = {
+                "name": getattr(unwrapped, "__name__", type(unwrapped).__name__),
+                "doc": inspect.getdoc(unwrapped) or "",
+                "params": list(self._signature.parameters),
+                "is_async": inspect.iscoroutinefunction(unwrapped),
+            }
+        self.name: str = data["name"]
+        self.doc: str = data["doc"]
+        self.params: tuple[str, ...] = tuple(data["params"])
+        self.is_async: bool = data["is_async"]
+
+    @property
+    def signature(self) -> inspect.Signature:
+        if self._signature is None:
+            target = self.unwrapped
+            if isinstance(target, lazy_callback):
+                target = inspect.unwrap(target.resolve())
+            self._signature = inspect.signature(target)
+        return self._signature
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"name": self.name, "doc": self.doc, "params": list(self.params), "is_async": self.is_async}
+
+
+class metadata_store:
+    """Callback metadata keyed by callback object, shared by every node that uses the callback.
+
+    ``save``/``load`` persist entries by ``module:qualname``; a loaded entry
+    answers for a callback with the same key without calling
+    ``inspect.getdoc`` or ``inspect.signature``.
+    """
+
+    def __init__(self):
+        self._entries: dict[int, callback_meta] = {}
+        self._seeds: dict[str, dict[str, Any]] = {}
+
+    def get(self, callback: Callable[..., Any]) -> callback_meta:
+        meta = self._entries.get(id(callback))
+        if meta is None:
+            unwrapped = inspect.unwrap(callback)
+            key = callback_key(unwrapped)
+            seed = self._seeds.get(key) if key else None
+            if seed is None and isinstance(unwrapped, lazy_callback):
+                unwrapped = inspect.unwrap(unwrapped.resolve())
+            meta = callback_meta(callback, unwrapped, key, seed)
+            # The entry holds ``callback``, so its id stays unique while cached.
+            self._entries[id(callback)] = meta
+        return meta
+
+    def doc(self, callback: Callable[..., Any] | None) -> str:
+        return "" if callback is None else self.get(callback).doc
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def to_dict(self) -> dict[str, dict[str, Any]]:
+        data = dict(self._seeds)
+        data.update((m.key, m.to_dict()) for m in self._entries.values() if m.key is not None)
+        return data
+
+    def update(self, data: dict[str, dict[str, Any]]):
+        """Add persisted entries; callbacks already introspected keep their live metadata."""
+        self._seeds.update(data)
+
+    def save(self, path: str | Path):
+        atomic_write_bytes(Path(path), json.dumps(self.to_dict(), sort_keys=True).encode("utf-8"))
+
+    def load(self, path: str | Path):
+        register_file(path)
+        self.update(json.loads(Path(path).read_text(encoding="utf-8")))
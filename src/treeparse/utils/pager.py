@@ -0,0 +1,99 @@
+"""Send long help output through a pager when writing to a terminal."""
+
+from __future__ import annotations
+
+import os
+import shlex
+import shutil
+import subprocess
+
+
+def pager_command() -> list[str] | None:
+    """The pager to use: ``TREEPARSE_PAGER``, then ``PAGER``, then ``less -R`` if installed.
+
+    An empty value or ``cat`` disables paging.
+    """
+    command = os.environ.get("TREEPARSE_PAGER", os.environ.get("PAGER"))
+    if command is None:
+        return ["less", "-R"] if shutil.which("less") else None
+    args = shlex.split(command)
+    if not args or args[0] == "cat":
+        return None
+    return args
+
+
+class pager_writer:
+    """Text writer that passes output through, or pipes it into a pager once it outgrows the terminal.
+
+    Output is held back only until it is known to exceed the terminal height;
+    shorter output is written to ``stream`` unchanged. Writing to a stream that
+    is not a TTY, or with ``enabled=False``, never buffers.
+    """
+
+    def __init__(self, stream, enabled: bool = True):
+        self._stream = stream
+        self._buffer: list[str] = []
+        self._lines = 0
+        self._proc: subprocess.Popen | None = None
+        self._closed = False
+        self._command = pager_command() if enabled and _isatty(stream) else None
+        self._height = shutil.get_terminal_size().lines
+
+    def write(self, text: str):
+        if self._closed:
+            return
+        if self._proc is not None:
+            self._pipe(text)
+        elif self._command is None:
+            self._stream.write(text)
+        else:
+            self._buffer.append(text)
+            self._lines += text.count("\n")
+            if self._lines >= self._height:
+                self._start()
+
+    def close(self):
+        """Flush held-back output, or wait for the user to leave the pager."""
+        if self._proc is not None:
+            try:
+                self._proc.stdin.close()
+            except OSError:
+                pass
+            self._proc.wait()
+            self._proc = None
+        elif self._buffer:
+            self._stream.write("".join(self._buffer))
+        self._buffer = []
+        self._closed = True
+        self._stream.flush()
+
+    def _start(self):
+        try:
+            self._proc = subprocess.Popen(
+                self._command,
+                stdin=subprocess.PIPE,
+                text=True,
+                encoding=getattr(self._stream, "encoding", None) or "utf-8",
+                errors="replace",
+            )
+        except OSError:
+            # No usable pager: fall back to writing straight through.
+            self._command = None
+            self._stream.write("".join(self._buffer))
+        else:
+            self._pipe("".join(self._buffer))
+        self._buffer = []
+
+    def _pipe(self, text: str):
+        try:
+            self._proc.stdin.write(text)
+        except OSError:
+            # The user quit the pager early; drop the rest of the output.
+            self._closed = True
+
+
+def _isatty(stream) -> bool:
+    try:
+        return stream.isatty()
+    except (AttributeError, ValueError):
+        return False
@@ -0,0 +1,194 @@
+"""Plain-text help renderer: rich's non-terminal tree layout without importing rich."""
+
+from __future__ import annotations
+
+import os
+import re
+import sys
+from typing import TYPE_CHECKING, Iterator
+
+from .help_layout import _char_cells, cell_len, help_layout, strip_markup
+
+if TYPE_CHECKING:
+    from ..models.cli import cli
+
+# rich.tree.Tree guide sets, indexed by SPACE, CONTINUE, FORK, END.
+_GUIDES = (
+    ("    ", "│   ", "├── ", "└── "),
+    ("    ", "┃   ", "┣━━ ", "┗━━ "),
+    ("    ", "║   ", "╠══ ", "╚══ "),
+)
+_ASCII_GUIDES = ("    ", "|   ", "+-- ", "`-- ")
+_SPACE, _CONTINUE, _FORK, _END = range(4)
+
+_word = re.compile(r"\s*\S+\s*")
+_trailing_space = re.compile(r"\s+$")
+
+
+def plain_output(stream=None) -> bool:
+    """True when help on ``stream`` (default stdout) should be plain text.
+
+    Mirrors rich's own terminal detection: ``NO_COLOR`` always selects plain
+    text, ``FORCE_COLOR`` always selects rich, and otherwise plain text is used
+    whenever the stream is not a TTY.
+    """
+    if "NO_COLOR" in os.environ:
+        return True
+    if "FORCE_COLOR" in os.environ:
+        return False
+    stream = sys.stdout if stream is None else stream
+    try:
+        return not stream.isatty()
+    except (AttributeError, ValueError):
+        return True
+
+
+def _chop_cells(text: str, width: int) -> list[str]:
+    lines: list[list[str]] = [[]]
+    total = 0
+    for ch in text:
+        cells = _char_cells(ch)
+        if total + cells > width:
+            lines.append([ch])
+            total = cells
+        else:
+            lines[-1].append(ch)
+            total += cells
+    return ["".join(line) for line in lines]
+
+
+def _set_cell_size(text: str, total: int) -> str:
+    """Crop ``text`` to ``total`` cells, replacing a split wide character with a space."""
+    if total <= 0:
+        return ""
+    out = []
+    used = 0
+    for ch in text:
+        cells = _char_cells(ch)
+        if used + cells > total:
+            if cells == 2 and used + 1 == total:
+                out.append(" ")
+            break
+        out.append(ch)
+        used += cells
+    return "".join(out)
+
+
+def _expand_tabs(line: str, tab_size: int = 8) -> str:
+    parts = []
+    position = 0
+    for part in re.split(r"(?<=\t)", line):
+        if part.endswith("\t"):
+            part = part[:-1] + " "
+            position += cell_len(part)
+            remainder = position % tab_size
+            if remainder:
+                part += " " * (tab_size - remainder)
+                position += tab_size - remainder
+        else:
+            position += cell_len(part)
+        parts.append(part)
+    return "".join(parts)
+
+
+def wrap(text: str, width: int) -> list[str]:
+    """Split ``text`` into lines of at most ``width`` cells the way rich's ``Text.wrap`` does.
+
+    Words move to the next line when they do not fit, over-long words are
+    folded, and trailing whitespace is dropped only where it overflows.
+    """
+    lines = []
+    for line in text.split("\n"):
+        if "\t" in line:
+            line = _expand_tabs(line)
+        breaks = []
+        offset = 0
+        for match in _word.finditer(line):
+            start, word = match.start(), match.group(0)
+            word_len = cell_len(word.rstrip())
+            if width - offset >= word_len:
+                offset += cell_len(word)
+            elif word_len > width:
+                folded = _chop_cells(word, width)
+                for i, piece in enumerate(folded):
+                    if start:
+                        breaks.append(start)
+                    if i == len(folded) - 1:
+                        offset = cell_len(piece)
+                    else:
+                        start += len(piece)
+            elif offset and start:
+                breaks.append(start)
+                offset = cell_len(word)
+        bounds = [0, *breaks, len(line)]
+        for start, end in zip(bounds, bounds[1:]):
+            piece = line[start:end]
+            if len(piece) > width:
+                trailing = _trailing_space.search(piece)
+                if trailing is not None:
+                    piece = piece[: len(piece) - min(len(trailing.group(0)), len(piece) - width)]
+            if cell_len(piece) > width:
+                piece = _set_cell_size(piece, width)
+            lines.append(piece)
+    return lines
+
+
+class plain_renderer(help_layout):
+    """Renders tree help as plain text, streaming it line by line.
+
+    The output is the same text rich prints for the help tree on a
+    non-terminal console: identical guides, padding and word wrapping, with
+    styles omitted. Console markup in the usage and description lines is
+    stripped; ``:emoji:`` codes there are kept verbatim.
+    """
+
+    def __init__(self, root_cli: "cli"):
+        super().__init__(root_cli)
+        encoding = (getattr(sys.stdout, "encoding", None) or "utf-8").lower()
+        self._ascii_only = not encoding.startswith("utf")
+
+    def _output_key(self) -> tuple:
+        return ("plain", self._ascii_only)
+
+    def _guides(self) -> tuple[str, str, str, str]:
+        if self._ascii_only:
+            return _ASCII_GUIDES
+        words = self._root.colors.guide.split()
+        for heavy, names in ((1, ("bold", "b")), (2, ("underline2", "uu"))):
+            for i, w in enumerate(words):
+                if w in names and (i == 0 or words[i - 1] != "not"):
+                    return _GUIDES[heavy]
+        return _GUIDES[0]
+
+    def _render(self, path: list[str], verbose: bool) -> Iterator[str]:
+        width = self._root.max_width
+        effective_path, usage, description = self._header(path)
+        for markup in (usage, description):
+            for line in wrap(strip_markup(markup), width):
+                yield line + "\n"
+        guides = self._guides()
+        parents, labels = self._labels(effective_path, verbose)
+        # Whether each row is the last child of its parent decides its guide.
+        last_child = {parent: row for row, parent in enumerate(parents)}
+        # Per row: the guides its own children repeat for the ancestor levels.
+        # Like rich, the root's children carry no guide for the root itself.
+        inherited: list[str] = []
+        for row, (parent, spans) in enumerate(zip(parents, labels)):
+            if parent < 0:
+                prefix = continuation = ""
+            else:
+                last = last_child[parent] == row
+                prefix = inherited[parent] + guides[_END if last else _FORK]
+                continuation = inherited[parent] + guides[_SPACE if last else _CONTINUE]
+            inherited.append(continuation)
+            label_width = width - cell_len(prefix)
+            if label_width < 1:
+                # rich renders nothing at all for a label with no room left.
+                continue
+            text = "".join(t for t, _ in spans)
+            for i, line in enumerate(wrap(text, label_width)):
+                yield (prefix if i == 0 else continuation) + line + "\n"
+        footer = self._footer()
+        if footer is not None:
+            for line in wrap(strip_markup(footer), width):
+                yield line + "\n"
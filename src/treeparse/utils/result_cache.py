@@ -0,0 +1,192 @@
+"""On-disk memoization of command results."""
+
+from __future__ import annotations
+
+import hashlib
+import inspect
+import io
+import os
+import pickle
+import time
+import types
+from pathlib import Path
+from typing import Any
+
+from pydantic import BaseModel, Field
+
+from .helpers import atomic_write_bytes
+from .metadata import lazy_callback
+
+
+class cache_config(BaseModel):
+    """Result cache settings for a ``command(cache=...)``.
+
+    ``files`` names argument/option dests whose values are file paths; the
+    content of those files is hashed into the key so edits invalidate entries.
+    """
+
+    ttl: float | None = None
+    max_entries: int | None = 256
+    max_bytes: int | None = 64 * 1024 * 1024
+    files: list[str] = Field(default_factory=list)
+    directory: Path | None = None
+
+
+class tee_writer(io.TextIOBase):
+    """Text stream that forwards writes to ``stream`` and records a copy."""
+
+    def __init__(self, stream):
+        self._stream = stream
+        self._buffer = io.StringIO()
+
+    def write(self, s: str) -> int:
+        self._stream.write(s)
+        self._buffer.write(s)
+        return len(s)
+
+    def flush(self):
+        self._stream.flush()
+
+    def getvalue(self) -> str:
+        return self._buffer.getvalue()
+
+
+def _file_digest(value: Any) -> Any:
+    """Content hash for a path value (or each path in a list)."""
+    if isinstance(value, (list, tuple)):
+        return [_file_digest(v) for v in value]
+    if value is None:
+        return None
+    h = hashlib.sha256()
+    try:
+        with open(value, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+    except OSError:
+        return None
+    return h.hexdigest()
+
+
+def _code_digest(code: types.CodeType) -> str:
+    """Hash of bytecode, constants and names (nested code objects included), but not line numbers."""
+    h = hashlib.sha256()
+
+    def visit(c: types.CodeType) -> None:
+        h.update(c.co_code)
+        h.update(repr(c.co_names).encode())
+        for const in c.co_consts:
+            if isinstance(const, types.CodeType):
+                visit(const)
+            elif isinstance(const, frozenset):
+                # Set order depends on string hashing, which varies between processes.
+                h.update(repr(sorted(map(repr, const))).encode())
+            else:
+                h.update(repr(const).encode())
+
+    visit(code)
+    return h.hexdigest()
+
+
+def callback_identity(callback: Any) -> str:
+    """``module:qualname`` of ``callback`` plus a hash of its code, so edits invalidate cached results."""
+    if isinstance(callback, lazy_callback):
+        callback = callback.resolve()
+    target = inspect.unwrap(callback)
+    code = getattr(target, "__code__", None) or getattr(getattr(target, "__call__", None), "__code__", None)
+    qualname = getattr(target, "__qualname__", type(target).__qualname__)
+    return f"{getattr(target, '__module__', '')}:{qualname}:{'' if code is None else _code_digest(code)}"
+
+
+class result_cache:
+    """LRU + size-bounded store of pickled ``(value, stdout)`` entries.
+
+    Entries live in one directory per command path. Recency is tracked with
+    file mtimes, so eviction needs a directory listing but no index file.
+    """
+
+    def __init__(self, config: cache_config, root: Path, path: list[str], callback: Any = None):
+        self.config = config
+        path_hash = hashlib.sha256("\0".join(path).encode()).hexdigest()[:16]
+        self.directory = Path(config.directory or root) / "results" / path_hash
+        self._path = list(path)
+        self._callback = None if callback is None else callback_identity(callback)
+
+    def key(self, kwargs: dict[str, Any]) -> str:
+        """Hash the command path, callback identity, resolved kwargs and watched file contents."""
+        fingerprints = {dest: _file_digest(kwargs.get(dest)) for dest in self.config.files}
+        payload = repr((self._path, self._callback, sorted(kwargs.items()), sorted(fingerprints.items())))
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.directory / f"{key}.pkl"
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        """Return the stored entry, or None on a miss or expired entry."""
+        entry_path = self._entry_path(key)
+        try:
+            with open(entry_path, "rb") as f:
+                entry = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+        if self.config.ttl is not None and time.time() - entry["created"] > self.config.ttl:
+            try:
+                entry_path.unlink()
+            except OSError:
+                pass
+            return None
+        try:
+            os.utime(entry_path)
+        except OSError:
+            pass
+        return entry
+
+    def put(self, key: str, value: Any, stdout: str) -> bool:
+        """Store an entry and evict; returns False when ``value`` cannot be pickled."""
+        entry = {"value": value, "stdout": stdout, "created": time.time()}
+        try:
+            data = pickle.dumps(entry, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            return False
+        atomic_write_bytes(self._entry_path(key), data)
+        self.evict()
+        return True
+
+    def evict(self):
+        """Drop expired entries, then least-recently-used ones over the limits."""
+        try:
+            files = [p for p in self.directory.iterdir() if p.suffix == ".pkl"]
+        except OSError:
+            return
+        now = time.time()
+        entries = []
+        for p in files:
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, p))
+        entries.sort(reverse=True)
+        kept = 0
+        total = 0
+        for mtime, size, p in entries:
+            # mtime never precedes creation, so this only drops entries that
+            # are certainly expired; get() checks the stored creation time.
+            expired = self.config.ttl is not None and now - mtime > self.config.ttl
+            over_count = self.config.max_entries is not None and kept >= self.config.max_entries
+            over_size = self.config.max_bytes is not None and kept > 0 and total + size > self.config.max_bytes
+            if expired or over_count or over_size:
+                try:
+                    p.unlink()
+                except OSError:
+                    pass
+                continue
+            kept += 1
+            total += size
+
+    def clear(self):
+        """Remove every entry for this command."""
+        try:
+            for p in self.directory.iterdir():
+                p.unlink()
+        except OSError:
+            pass
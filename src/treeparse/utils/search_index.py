@@ -0,0 +1,159 @@
+"""Inverted index over a cli tree for help search."""
+
+from __future__ import annotations
+
+import json
+import re
+from bisect import bisect_left
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from pydantic import BaseModel
+
+from .helpers import atomic_write_bytes
+
+if TYPE_CHECKING:
+    from ..models.cli import cli
+
+FIELDS = ("name", "help", "docstring", "option", "argument")
+_token = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> list[str]:
+    """Lower-case alphanumeric words of ``text``."""
+    return _token.findall(text.lower())
+
+
+class search_hit(BaseModel):
+    """A group, command or chain matching every term of a search."""
+
+    path: list[str]
+    kind: str
+    fields: list[str]
+    """Which of ``name``/``help``/``docstring``/``option``/``argument`` matched."""
+
+
+class search_index:
+    """Token -> node postings for every group, command and chain below the root.
+
+    Nodes are numbered in help order (children sorted by ``sort_key``); each
+    posting is ``node * len(FIELDS) + field``. Query terms match tokens by
+    prefix, and a node is a hit when every term matches one of its fields.
+    """
+
+    def __init__(self, paths: list[list[str]], kinds: list[str], postings: dict[str, list[int]]):
+        self.paths = paths
+        self.kinds = kinds
+        self.postings = postings
+        self._vocabulary = sorted(postings)
+
+    @classmethod
+    def build(cls, root: "cli") -> "search_index":
+        paths: list[list[str]] = []
+        kinds: list[str] = []
+        postings: dict[str, set[int]] = {}
+
+        def add(node_id: int, field: str, text: str | None):
+            if not text:
+                return
+            code = node_id * len(FIELDS) + FIELDS.index(field)
+            for token in tokenize(text):
+                postings.setdefault(token, set()).add(code)
+
+        def visit(node, path: list[str]):
+            for child in sorted(node.subgroups + node.commands, key=lambda x: x.sort_key):
+                child_path = path + [child.display_name]
+                node_id = len(paths)
+                paths.append(child_path)
+                kinds.append(type(child).__name__)
+                add(node_id, "name", child.display_name)
+                add(node_id, "help", child.help)
+                steps = getattr(child, "chained_commands", None)
+                callbacks = [s.callback for s in steps] if steps is not None else [getattr(child, "callback", None)]
+                for cb in callbacks:
+                    if cb is not None:
+                        add(node_id, "docstring", root.metadata.doc(cb))
+                for step in steps or []:
+                    add(node_id, "name", step.name)
+                    add(node_id, "help", step.help)
+                options = child.options if hasattr(child, "options") else child.effective_options
+                for opt in options:
+                    add(node_id, "option", " ".join(opt.flags))
+                    add(node_id, "option", opt.help)
+                arguments = child.arguments if hasattr(child, "arguments") else child.effective_arguments
+                for arg in arguments:
+                    add(node_id, "argument", arg.name)
+                    add(node_id, "argument", arg.help)
+                if hasattr(child, "subgroups"):
+                    visit(child, child_path)
+
+        visit(root, [])
+        return cls(paths, kinds, {t: sorted(codes) for t, codes in postings.items()})
+
+    @classmethod
+    def for_tree(cls, root: "cli", directory: Path | None) -> "search_index":
+        """The index for ``root``: from its memo, else ``directory``, else built and saved.
+
+        Disk entries are keyed by ``cli._disk_token()``, so finding one does
+        not walk the tree.
+        """
+        memory = root._memo("search")
+        index = memory.get("index")
+        if index is not None:
+            return index
+        token = None if directory is None else root._disk_token()
+        disk_path = None if token is None else Path(directory) / "search" / f"{token}.json"
+        if disk_path is not None and disk_path.exists():
+            try:
+                index = cls.from_dict(json.loads(disk_path.read_text(encoding="utf-8")))
+            except (OSError, ValueError, KeyError):
+                index = None
+        if index is None:
+            index = cls.build(root)
+            if disk_path is not None:
+                atomic_write_bytes(disk_path, json.dumps(index.to_dict()).encode("utf-8"))
+        memory["index"] = index
+        return index
+
+    def to_dict(self) -> dict:
+        return {"paths": self.paths, "kinds": self.kinds, "postings": self.postings}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "search_index":
+        return cls(data["paths"], data["kinds"], data["postings"])
+
+    def _matches(self, term: str) -> dict[int, int]:
+        """Node -> bitmask of matched fields for one term (prefix match on tokens)."""
+        found: dict[int, int] = {}
+        i = bisect_left(self._vocabulary, term)
+        while i < len(self._vocabulary) and self._vocabulary[i].startswith(term):
+            for code in self.postings[self._vocabulary[i]]:
+                node_id, field = divmod(code, len(FIELDS))
+                found[node_id] = found.get(node_id, 0) | (1 << field)
+            i += 1
+        return found
+
+    def search(self, query: str, within: list[str] | None = None) -> list[search_hit]:
+        """Nodes matching every term of ``query``, in help order, optionally under the path ``within``."""
+        terms = tokenize(query)
+        if not terms:
+            return []
+        hits: dict[int, int] | None = None
+        for term in sorted(set(terms), key=len, reverse=True):
+            found = self._matches(term)
+            if hits is None:
+                hits = found
+            else:
+                hits = {n: mask | found[n] for n, mask in hits.items() if n in found}
+            if not hits:
+                return []
+        prefix = list(within or [])
+        return [
+            search_hit(
+                path=self.paths[n],
+                kind=self.kinds[n],
+                fields=[f for i, f in enumerate(FIELDS) if mask & (1 << i)],
+            )
+            for n, mask in sorted(hits.items())
+            if self.paths[n][: len(prefix)] == prefix and len(self.paths[n]) > len(prefix)
+        ]
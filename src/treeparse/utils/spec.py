@@ -0,0 +1,185 @@
+"""Serialize a cli tree to a JSON/YAML spec and rebuild it with lazily imported callbacks."""
+
+from __future__ import annotations
+
+import builtins
+import json
+from enum import Enum, EnumMeta
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable
+
+from pydantic import BaseModel
+
+from ..models.argument import argument
+from ..models.chain import chain
+from ..models.command import command
+from ..models.group import group
+from ..models.option import option
+from ..models.resource import resource
+from .helpers import load_yaml_config
+from .metadata import import_path, lazy_callback, metadata_store, resolve_import_path
+from .tracking import register_file
+
+if TYPE_CHECKING:
+    from ..models.cli import cli
+
+SPEC_VERSION = 1
+_NODE_LISTS = ("subgroups", "commands", "chained_commands")
+_PARAM_LISTS = {"options": option, "arguments": argument}
+_CALLABLES = ("callback", "factory", "close")
+# Derived from ``theme`` when a cli is built.
+_DERIVED = {"colors"}
+
+
+def _type_spec(t: Any) -> str:
+    """Builtin types by name (``"int"``), anything else by import path."""
+    if getattr(builtins, getattr(t, "__name__", ""), None) is t:
+        return t.__name__
+    return import_path(t)
+
+
+def _resolve_type(name: str) -> Any:
+    return resolve_import_path(name) if ":" in name else getattr(builtins, name)
+
+
+def _value_spec(value: Any) -> Any:
+    """JSON form of a default or choice: enum members by name, other non-JSON values as ``str``."""
+    if isinstance(value, Enum):
+        return value.name
+    if isinstance(value, (list, tuple)):
+        return [_value_spec(v) for v in value]
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+def _resolve_value(value: Any, arg_type: Any) -> Any:
+    if isinstance(arg_type, EnumMeta):
+        if isinstance(value, list):
+            return [arg_type[v] for v in value]
+        return arg_type[value] if isinstance(value, str) else value
+    return value
+
+
+def _callable_spec(fn: Callable[..., Any], metadata: metadata_store, callbacks: dict[str, Any]) -> str:
+    path = import_path(fn)
+    meta = metadata.get(fn)
+    if meta.key is not None:
+        callbacks[meta.key] = meta.to_dict()
+    return path
+
+
+def _param_spec(item: option | argument) -> dict[str, Any]:
+    d = item.model_dump(exclude={"arg_type", "default", "choices"}, exclude_defaults=True)
+    if not getattr(item, "flag", False) and item.arg_type is not str:
+        d["arg_type"] = _type_spec(item.arg_type)
+    if item.default is not None:
+        d["default"] = _value_spec(item.default)
+    if item.choices is not None:
+        d["choices"] = [_value_spec(c) for c in item.choices]
+    return d
+
+
+def _model_spec(obj: BaseModel, metadata: metadata_store, callbacks: dict[str, Any]) -> dict[str, Any]:
+    """Fields of a node or resource that differ from their defaults, children and callables included."""
+    scalars = set()
+    d: dict[str, Any] = {}
+    for name in type(obj).model_fields:
+        value = getattr(obj, name)
+        if name in _DERIVED:
+            continue
+        if name in _NODE_LISTS:
+            if value:
+                d[name] = [node_spec(c, metadata, callbacks) for c in value]
+        elif name in _PARAM_LISTS:
+            if value:
+                d[name] = [_param_spec(p) for p in value]
+        elif name == "resources":
+            if value:
+                d[name] = [_model_spec(r, metadata, callbacks) for r in value]
+        elif name in _CALLABLES:
+            if value is not None:
+                d[name] = _callable_spec(value, metadata, callbacks)
+        else:
+            scalars.add(name)
+    d.update(obj.model_dump(mode="json", include=scalars, exclude_defaults=True))
+    return d
+
+
+def node_spec(node: Any, metadata: metadata_store, callbacks: dict[str, Any]) -> dict[str, Any]:
+    from ..models.cli import cli
+
+    # cli subclasses group, so it is checked first.
+    kind = next(
+        k
+        for k, cls in (("cli", cli), ("group", group), ("chain", chain), ("command", command))
+        if isinstance(node, cls)
+    )
+    return {"kind": kind, **_model_spec(node, metadata, callbacks)}
+
+
+def to_spec(root: "cli") -> dict[str, Any]:
+    """See ``cli.to_spec``."""
+    callbacks: dict[str, Any] = {}
+    tree = node_spec(root, root.metadata, callbacks)
+    version = root._resolve_version()
+    if version is not None:
+        tree["version"] = version
+    return {"treeparse_spec": SPEC_VERSION, "callbacks": callbacks, "tree": tree}
+
+
+def _build(d: dict[str, Any], classes: dict[str, type], lazy: bool) -> Any:
+    fields = {k: v for k, v in d.items() if k != "kind"}
+    for name in _NODE_LISTS:
+        if name in fields:
+            fields[name] = [_build(c, classes, lazy) for c in fields[name]]
+    for name, model in _PARAM_LISTS.items():
+        if name in fields:
+            fields[name] = [_build_param(p, model) for p in fields[name]]
+    if "resources" in fields:
+        fields["resources"] = [_build_resource(r, lazy) for r in fields["resources"]]
+    if "callback" in fields:
+        fields["callback"] = lazy_callback(fields["callback"]) if lazy else resolve_import_path(fields["callback"])
+    return classes[d["kind"]](**fields)
+
+
+def _build_param(d: dict[str, Any], model: type[BaseModel]) -> Any:
+    fields = dict(d)
+    if "arg_type" in fields:
+        fields["arg_type"] = _resolve_type(fields["arg_type"])
+    arg_type = fields.get("arg_type", str)
+    for name in ("default", "choices"):
+        if name in fields:
+            fields[name] = _resolve_value(fields[name], arg_type)
+    return model(**fields)
+
+
+def _build_resource(d: dict[str, Any], lazy: bool) -> resource:
+    fields = dict(d)
+    for name in ("factory", "close"):
+        if name in fields:
+            fields[name] = lazy_callback(fields[name]) if lazy else resolve_import_path(fields[name])
+    return resource(**fields)
+
+
+def load_spec(source: str | Path | dict[str, Any]) -> dict[str, Any]:
+    """A spec dict from a dict, or from a ``.json``/``.yml``/``.yaml`` file."""
+    if isinstance(source, dict):
+        return source
+    path = Path(source)
+    register_file(path)
+    if path.suffix in (".yml", ".yaml"):
+        return load_yaml_config(str(path))
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def from_spec(cli_cls: type["cli"], source: str | Path | dict[str, Any], validate: bool) -> "cli":
+    """See ``cli.from_spec``."""
+    spec = load_spec(source)
+    if spec.get("treeparse_spec") != SPEC_VERSION:
+        raise ValueError(f"not a treeparse spec (version {SPEC_VERSION}): {str(source)[:80]}")
+    classes = {"cli": cli_cls, "group": group, "command": command, "chain": chain}
+    root = _build(spec["tree"], classes, lazy=not validate)
+    root.metadata.update(spec.get("callbacks", {}))
+    root._skip_validation = not validate
+    return root
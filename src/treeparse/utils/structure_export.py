@@ -0,0 +1,370 @@
+"""Serialized ``--json`` structure (full or compact), cached per tree; chunked compact export."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+from collections import Counter
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable
+
+from pydantic import BaseModel
+
+from ..models.argument import argument
+from ..models.option import option
+from .helpers import atomic_write_bytes
+
+if TYPE_CHECKING:
+    from ..models.cli import cli
+
+# Serialized structures per cli (``cli._memo("json")``), keyed by (path, depth, compact); bounded LRU.
+_MEMORY_SIZE = 32
+# A streamed export larger than this is written out but not kept in memory.
+_MEMORY_MAX_BYTES = 4 << 20
+
+
+def _cache_slot(
+    root: "cli", directory: Path | None, path: list[str] | None, depth: int | None, compact: bool
+) -> tuple[tuple, Path | None]:
+    key = (tuple(path or ()), depth, compact)
+    token = None if directory is None else root._disk_token()
+    if token is None:
+        return key, None
+    digest = hashlib.sha256(json.dumps([token, *key]).encode()).hexdigest()
+    return key, Path(directory) / "json" / f"{digest}.json"
+
+
+def _cached(root: "cli", key: tuple, disk_path: Path | None) -> bytes | None:
+    data = root._memo("json").get(key)
+    if data is None and disk_path is not None:
+        try:
+            data = disk_path.read_bytes()
+        except OSError:
+            return None
+        _remember(root, key, data)
+    return data
+
+
+def _remember(root: "cli", key: tuple, data: bytes) -> None:
+    memory = root._memo("json")
+    memory[key] = data
+    memory.move_to_end(key)
+    while len(memory) > _MEMORY_SIZE:
+        memory.popitem(last=False)
+
+
+def structure_json(
+    root: "cli",
+    directory: Path | None = None,
+    path: list[str] | None = None,
+    depth: int | None = None,
+    compact: bool = False,
+) -> bytes:
+    """``json.dumps(root.structure_dict(path, depth), indent=2)`` plus a newline, as UTF-8.
+
+    With ``compact``, the minified ``compact_dict`` form instead. The bytes
+    are kept in memory by the cli and, with ``directory``, under
+    ``<directory>/json``, keyed by ``path``, ``depth``, format and (on disk)
+    ``cli._disk_token()``, so repeated exports of an unchanged tree skip the
+    traversal and serialization, in this process and later ones.
+    """
+    key, disk_path = _cache_slot(root, directory, path, depth, compact)
+    data = _cached(root, key, disk_path)
+    if data is None:
+        structure = root.structure_dict(list(key[0]), depth)
+        text = _dumps_compact(compact_dict(structure)) if compact else json.dumps(structure, indent=2)
+        data = (text + "\n").encode("utf-8")
+        if disk_path is not None:
+            atomic_write_bytes(disk_path, data)
+        _remember(root, key, data)
+    return data
+
+
+def write_structure_json(
+    root: "cli",
+    stream,
+    directory: Path | None = None,
+    path: list[str] | None = None,
+    depth: int | None = None,
+    compact: bool = False,
+) -> None:
+    """Write what ``structure_json`` returns to ``stream``, streaming a full export that is not cached.
+
+    A streamed export is written node by node and, with ``directory``, into
+    its disk cache entry at the same time; it is kept in memory only when
+    it is small, so writing a large tree does not hold all of it at once.
+    """
+    key, disk_path = _cache_slot(root, directory, path, depth, compact)
+    data = _cached(root, key, disk_path)
+    if data is not None or compact:
+        write_bytes(stream, data if data is not None else structure_json(root, directory, path, depth, compact))
+        return
+    sink = _tee_sink(stream, disk_path)
+    try:
+        stream_structure(root, sink.write, list(key[0]), depth, indent=2)
+        sink.write("\n")
+    except BaseException:
+        sink.abort()
+        raise
+    data = sink.close()
+    if data is not None:
+        _remember(root, key, data)
+
+
+class _tee_sink:
+    """Text sink writing UTF-8 to ``stream`` and an optional file, keeping a copy while it is small."""
+
+    def __init__(self, stream, disk_path: Path | None):
+        self._buffer = getattr(stream, "buffer", None)
+        self._stream = stream
+        if self._buffer is not None:
+            stream.flush()
+        self._kept: list[bytes] | None = []
+        self._size = 0
+        self._disk_path = disk_path
+        self._file = None
+        if disk_path is not None:
+            disk_path.parent.mkdir(parents=True, exist_ok=True)
+            fd, self._tmp = tempfile.mkstemp(dir=disk_path.parent, prefix=".tmp-")
+            self._file = os.fdopen(fd, "wb")
+
+    def write(self, text: str) -> None:
+        if self._buffer is None:
+            self._stream.write(text)
+            data = text.encode("utf-8") if self._file is not None or self._kept is not None else b""
+        else:
+            data = text.encode("utf-8")
+            self._buffer.write(data)
+        if self._file is not None:
+            self._file.write(data)
+        if self._kept is not None:
+            self._size += len(data)
+            if self._size > _MEMORY_MAX_BYTES:
+                self._kept = None
+            else:
+                self._kept.append(data)
+
+    def close(self) -> bytes | None:
+        """Finish the disk entry; the full output if it was kept."""
+        if self._buffer is not None:
+            self._buffer.flush()
+        if self._file is not None:
+            self._file.close()
+            os.replace(self._tmp, self._disk_path)
+        return None if self._kept is None else b"".join(self._kept)
+
+    def abort(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            try:
+                os.unlink(self._tmp)
+            except OSError:
+                pass
+
+
+def stream_structure(
+    root: "cli",
+    write: Callable[[str], Any],
+    path: list[str] | None = None,
+    depth: int | None = None,
+    indent: int | None = None,
+) -> None:
+    """Call ``write`` with successive pieces of ``json.dumps(root.structure_dict(path, depth), indent=indent)``.
+
+    Nodes are encoded one at a time from ``cli._structure_fields`` and
+    ``cli._structure_children``, the same pieces ``structure_dict`` is built
+    from; only the path from the root to the current node is held.
+    """
+    item_separator = ", " if indent is None else ","
+    # Scalars and empty containers look the same at any indent; only they take the C encoder.
+    encode_flat = json.JSONEncoder().encode
+    encode_indented = json.JSONEncoder(indent=indent).encode
+
+    def newline(level: int) -> str:
+        return "" if indent is None else "\n" + " " * (indent * level)
+
+    def encode(node, is_root: bool, level: int, nesting: int, scope: dict) -> None:
+        fields = root._structure_fields(node, is_root)
+        children = root._structure_children(node, level, depth)
+        pieces = ["{"]
+        for i, (key, value) in enumerate([*fields.items(), *children.items(), *scope.items()]):
+            if i:
+                pieces.append(item_separator)
+            pieces.append(newline(nesting + 1) + encode_flat(key) + ": ")
+            if key in ("subgroups", "commands") and value:
+                pieces.append("[")
+                write("".join(pieces))
+                for j, child in enumerate(value):
+                    write((item_separator if j else "") + newline(nesting + 2))
+                    encode(child, False, level + 1, nesting + 2, {})
+                pieces = [newline(nesting + 1) + "]"]
+                continue
+            if indent is None or not value or not isinstance(value, (list, dict)):
+                pieces.append(encode_flat(value))
+            else:
+                pieces.append(encode_indented(value).replace("\n", newline(nesting + 1)))
+        pieces.append(newline(nesting) + "}")
+        write("".join(pieces))
+
+    node, scope = root._structure_root(path)
+    encode(node, node is root, 0, 0, scope)
+
+
+# Fields that only affect ordering or help display; the compact form is already in help order.
+_DISPLAY_ONLY = {"sort_key", "show_type"}
+
+
+def _compact_param(d: dict[str, Any], model: type[BaseModel]) -> dict[str, Any]:
+    """``d`` without display-only fields and fields left at the model's default."""
+    out = {}
+    for k, v in d.items():
+        if k in _DISPLAY_ONLY or (k == "arg_type" and (v == "str" or d.get("flag"))):
+            continue
+        field = model.model_fields.get(k)
+        if field is not None and k != "arg_type" and v == field.default:
+            continue
+        out[k] = v
+    return out
+
+
+def _compact_node(d: dict[str, Any]) -> dict[str, Any]:
+    out: dict[str, Any] = {"name": d["name"], "type": d["type"]}
+    for key in ("path", "truncated"):
+        if key in d:
+            out[key] = d[key]
+    if d["help"]:
+        out["help"] = d["help"]
+    if d.get("docstring"):
+        out["docstring"] = d["docstring"]
+    for key, model in (
+        ("arguments", argument),
+        ("options", option),
+        ("inherited_arguments", argument),
+        ("inherited_options", option),
+    ):
+        if d.get(key):
+            out[key] = [_compact_param(item, model) for item in d[key]]
+    if d.get("chained"):
+        out["chained"] = [_compact_node(c) for c in d["chained"]]
+    for key in ("subgroups", "commands"):
+        if d.get(key):
+            out[key] = [_compact_node(c) for c in d[key]]
+    return out
+
+
+def _option_lists(node: dict[str, Any]):
+    """Every option list in a compact tree."""
+    for key in ("options", "inherited_options"):
+        if key in node:
+            yield node[key]
+    for key in ("chained", "subgroups", "commands"):
+        for child in node.get(key, []):
+            yield from _option_lists(child)
+
+
+def _spec_key(opt: dict[str, Any]) -> str:
+    return json.dumps(opt, sort_keys=True)
+
+
+def compact_dict(structure: dict[str, Any]) -> dict[str, Any]:
+    """Token-efficient form of a ``structure_dict`` result.
+
+    Empty lists, empty strings and fields at their defaults are omitted, as
+    are the callback name and ordering fields (nodes and parameters are
+    already in help order). Inherited options appear once, where they are
+    declared. An option defined identically on several nodes is listed
+    once under ``shared_options``, keyed by its first flag, and referenced
+    by that flag string elsewhere.
+    """
+    tree = _compact_node(structure)
+    counts = Counter(_spec_key(o) for opts in _option_lists(tree) for o in opts)
+    shared: dict[str, dict[str, Any]] = {}
+    names: dict[str, str] = {}
+    for spec, count in counts.most_common():
+        if count < 2:
+            break
+        opt = json.loads(spec)
+        name = opt["flags"][0]
+        if name not in shared:
+            shared[name] = opt
+            names[spec] = name
+    if shared:
+        for opts in _option_lists(tree):
+            opts[:] = [names.get(_spec_key(o), o) for o in opts]
+        tree["shared_options"] = shared
+    return tree
+
+
+def _dumps_compact(data: dict[str, Any]) -> str:
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+
+class compact_report(BaseModel):
+    """Outcome of ``cli.export_compact``: files written and the size of each format, in bytes."""
+
+    files: list[str]
+    """``index.json`` first, then one chunk per top-level group, relative to the export directory."""
+    json_bytes: int
+    """The full ``--json`` output."""
+    compact_bytes: int
+    """The whole tree in compact form, as one document (``--json-compact``)."""
+    index_bytes: int
+    largest_chunk_bytes: int
+
+
+INDEX = "index.json"
+
+
+def _chunk_name(group_name: str) -> str:
+    return group_name.replace(os.sep, "_").replace(" ", "_") + ".json"
+
+
+def export_compact(root: "cli", directory: str | Path) -> compact_report:
+    """Write the compact index and per-group chunks to ``directory``; see ``cli.export_compact``."""
+    directory = Path(directory)
+    try:
+        stale = set(json.loads((directory / INDEX).read_text(encoding="utf-8")).get("chunks", {}).values())
+    except (OSError, ValueError, AttributeError):
+        stale = set()
+    index = compact_dict(root.structure_dict(depth=1))
+    chunks: dict[str, str] = {}
+    files = {INDEX: b""}
+    # Chunk name -> the group written to it; the index's own name is reserved.
+    owners: dict[str, str | None] = {INDEX: None}
+    for child in index.get("subgroups", []):
+        name = _chunk_name(child["name"])
+        other = owners.setdefault(name, child["name"])
+        if other != child["name"]:
+            what = "the index" if other is None else f"the chunk of '{root.name} {other}'"
+            here = f"{root.name} {child['name']}"
+            raise ValueError(f"compact chunk of '{here}' would be written to {name}, like {what}; rename one of them")
+        child["chunk"] = name
+        chunks[child["name"]] = name
+        files[name] = _dumps_compact(compact_dict(root.structure_dict([child["name"]]))).encode("utf-8")
+    if chunks:
+        index["chunks"] = chunks
+    files[INDEX] = _dumps_compact(index).encode("utf-8")
+    for name, data in files.items():
+        atomic_write_bytes(directory / name, data)
+    for name in stale - set(files):
+        (directory / name).unlink(missing_ok=True)
+    return compact_report(
+        files=list(files),
+        json_bytes=len(structure_json(root)),
+        compact_bytes=len(structure_json(root, compact=True)),
+        index_bytes=len(files[INDEX]),
+        largest_chunk_bytes=max((len(files[n]) for n in chunks.values()), default=0),
+    )
+
+
+def write_bytes(stream, data: bytes) -> None:
+    """Write UTF-8 ``data`` to a text ``stream``, through its binary buffer when it has one."""
+    buffer = getattr(stream, "buffer", None)
+    if buffer is None:
+        stream.write(data.decode("utf-8"))
+        return
+    stream.flush()
+    buffer.write(data)
+    buffer.flush()
@@ -0,0 +1,201 @@
+"""In-place change tracking for tree models, and the source files a tree was built from."""
+
+from __future__ import annotations
+
+import importlib.util
+import os
+import sys
+import weakref
+from typing import Any, get_args, get_origin
+
+import pydantic
+from pydantic import BaseModel
+
+# Bumped on every in-place change to a tracked model or one of its lists.
+_revision = 0
+# Weak references to objects with an ``invalidate(objects)`` method (fingerprint memos), told about every change.
+_watchers: dict[int, weakref.ref] = {}
+# Files that tree models were constructed in, and modules their callbacks come from, in first-seen order.
+_files: dict[str, None] = {}
+_modules: dict[str, None] = {}
+# Names of each model class's list fields.
+_list_field_names: dict[type, frozenset[str]] = {}
+
+_INTERNAL = (
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))) + os.sep,
+    os.path.dirname(os.path.abspath(pydantic.__file__)) + os.sep,
+)
+
+
+def revision() -> int:
+    """Number of in-place changes made to tree models in this process so far."""
+    return _revision
+
+
+def watch(watcher: Any) -> None:
+    """Call ``watcher.invalidate([obj])`` whenever ``obj`` changes, for as long as ``watcher`` lives."""
+    key = id(watcher)
+    _watchers[key] = weakref.ref(watcher, lambda _: _watchers.pop(key, None))
+
+
+def changed(obj: Any) -> None:
+    """Record that ``obj`` (a tracked model or list) was modified in place."""
+    global _revision
+    _revision += 1
+    for ref in list(_watchers.values()):
+        watcher = ref()
+        if watcher is not None:
+            watcher.invalidate((obj,))
+
+
+class tracked_list(list):
+    """A model's list field that reports appends, removals and item assignments through ``changed``."""
+
+    __slots__ = ()
+
+    def _changed(self):
+        changed(self)
+
+    def append(self, value):
+        super().append(value)
+        self._changed()
+
+    def extend(self, values):
+        super().extend(values)
+        self._changed()
+
+    def insert(self, index, value):
+        super().insert(index, value)
+        self._changed()
+
+    def remove(self, value):
+        super().remove(value)
+        self._changed()
+
+    def pop(self, index=-1):
+        value = super().pop(index)
+        self._changed()
+        return value
+
+    def clear(self):
+        super().clear()
+        self._changed()
+
+    def sort(self, *args, **kwargs):
+        super().sort(*args, **kwargs)
+        self._changed()
+
+    def reverse(self):
+        super().reverse()
+        self._changed()
+
+    def __setitem__(self, index, value):
+        super().__setitem__(index, value)
+        self._changed()
+
+    def __delitem__(self, index):
+        super().__delitem__(index)
+        self._changed()
+
+    def __iadd__(self, values):
+        super().__iadd__(values)
+        self._changed()
+        return self
+
+    def __imul__(self, count):
+        super().__imul__(count)
+        self._changed()
+        return self
+
+
+def _list_fields(cls: type[BaseModel]) -> frozenset[str]:
+    """Fields of ``cls`` declared as lists (optionally ``| None``)."""
+    found = _list_field_names.get(cls)
+    if found is None:
+        found = _list_field_names[cls] = frozenset(
+            name
+            for name, field in cls.model_fields.items()
+            if get_origin(field.annotation) is list or any(get_origin(a) is list for a in get_args(field.annotation))
+        )
+    return found
+
+
+def construction_site() -> tuple[str, int]:
+    """File and line of the innermost caller outside treeparse and pydantic."""
+    frame = sys._getframe(1)
+    while frame.f_back is not None and frame.f_code.co_filename.startswith(_INTERNAL):
+        frame = frame.f_back
+    return frame.f_code.co_filename, frame.f_lineno
+
+
+class tracked_model(BaseModel):
+    """Base for tree models: assignments to fields and changes to list fields are reported through ``changed``.
+
+    Construction also records the file the model was built in and, for
+    models with a ``callback``, the callback's module, for ``source_stamp``.
+    """
+
+    def model_post_init(self, context: Any) -> None:
+        values = self.__dict__
+        for name in _list_fields(type(self)):
+            value = values.get(name)
+            if type(value) is list:
+                values[name] = tracked_list(value)
+        register_file(construction_site()[0])
+        callback = values.get("callback")
+        if callback is not None:
+            register_module(getattr(callback, "__module__", None))
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name[0] == "_":
+            super().__setattr__(name, value)
+            return
+        if type(value) is list and name in _list_fields(type(self)):
+            value = tracked_list(value)
+        super().__setattr__(name, value)
+        if name == "callback" and value is not None:
+            register_module(getattr(value, "__module__", None))
+        changed(self)
+
+
+def register_file(path: str | os.PathLike) -> None:
+    """Count ``path`` among the files the trees in this process are built from."""
+    _files[os.fspath(path)] = None
+
+
+def register_module(name: str | None) -> None:
+    """Count the file of module ``name`` among the sources, resolved when ``source_stamp`` is taken."""
+    if name:
+        _modules[name] = None
+
+
+def _module_file(name: str) -> str | None:
+    module = sys.modules.get(name)
+    if module is not None:
+        return getattr(module, "__file__", None)
+    try:
+        spec = importlib.util.find_spec(name)
+    except (ImportError, ValueError):
+        return None
+    return None if spec is None else spec.origin
+
+
+def source_stamp() -> list:
+    """``[path, mtime_ns, size]`` of every registered source file, in registration order.
+
+    Without in-place changes, a tree is a function of the files that built
+    it, so this identifies it for on-disk caches without walking it.
+    """
+    paths = dict(_files)
+    for name in _modules:
+        path = _module_file(name)
+        if path is not None:
+            paths.setdefault(path, None)
+    stamp = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+            stamp.append([path, st.st_mtime_ns, st.st_size])
+        except OSError:
+            stamp.append([path, None, None])
+    return stamp
@@ -0,0 +1,137 @@
+"""Tests for hashed choice lists, truncated choices in help and --help-choices."""
+
+import sys
+from enum import Enum
+
+import pytest
+
+from treeparse import argument, cli, command, option
+from treeparse.utils.choices import choice_index, format_choices
+
+ZONES = [f"z{i}" for i in range(5000)]
+
+
+class size(Enum):
+    small = 1
+    large = 2
+
+
+calls = []
+
+
+def pick(zone: str, mode: str, fit: size):
+    calls.append((zone, mode, fit))
+
+
+def test_choice_index_keeps_order_and_tracks_changes():
+    values = choice_index(["b", "a", "c"])
+    assert list(values) == ["b", "a", "c"]
+    assert "a" in values and "d" not in values
+    values.append("d")
+    assert "d" in values
+    values.remove("a")
+    assert "a" not in values
+    values[0] = "x"
+    assert "b" not in values and "x" in values
+    values *= 0
+    assert "x" not in values and values == []
+    values += ["y"]
+    assert "y" in values
+
+
+def test_choice_index_unhashable_values():
+    values = choice_index([[1], [2]])
+    assert [1] in values and [3] not in values
+    assert {1} not in choice_index([1, 2])
+
+
+def test_models_store_choice_index():
+    zone = argument(name="zone", arg_type=str, choices=ZONES)
+    assert isinstance(zone.choices, choice_index)
+    assert zone.model_dump()["choices"] == ZONES
+
+
+def test_format_choices():
+    assert format_choices(["a", "b"], 2) == "a|b"
+    assert format_choices(["a", "b"], None) == "a|b"
+    assert format_choices(ZONES, 3) == "z0|z1|z2|… (+4,997 more)"
+
+
+def test_help_truncates_long_choices(capsys):
+    cmd = command(
+        name="pick",
+        help="Pick a zone",
+        callback=pick,
+        arguments=[argument(name="zone", arg_type=str, choices=ZONES)],
+        options=[
+            option(flags=["--mode", "-m"], arg_type=str, default="a", choices=["a", "b"], help="Mode"),
+            option(flags=["--fit"], arg_type=size, default=size.small, help="Fit"),
+        ],
+    )
+    app = cli(name="app", commands=[cmd], help_choices=3)
+    sys.argv = ["app", "--help"]
+    with pytest.raises(SystemExit):
+        app.run()
+    out = capsys.readouterr().out
+    assert "<ZONE, str (z0|z1|z2|… (+4,997 more))>" in out
+    assert "z3" not in out
+    assert "(a|b)" in out
+    # The help column is not pushed out by the full list.
+    assert max(len(line) for line in out.splitlines()) <= 120
+
+
+def test_help_choices_lists_every_value(capsys):
+    cmd = command(
+        name="pick",
+        callback=pick,
+        arguments=[argument(name="zone", arg_type=str, choices=ZONES)],
+        options=[
+            option(flags=["--mode", "-m"], arg_type=str, default="a", choices=["a", "b"]),
+            option(flags=["--fit"], arg_type=size, default=size.small),
+        ],
+    )
+    app = cli(name="app", commands=[cmd])
+    for flag, expected in (("zone", ZONES), ("-m", ["a", "b"]), ("--fit", ["small", "large"])):
+        sys.argv = ["app", "pick", "--help-choices", flag]
+        with pytest.raises(SystemExit) as exc:
+            app.run()
+        assert exc.value.code == 0
+        assert capsys.readouterr().out.split() == expected
+
+
+def test_help_choices_unknown_name(capsys):
+    def pick():
+        pass
+
+    app = cli(name="app", commands=[command(name="pick", callback=pick)])
+    sys.argv = ["app", "pick", "--help-choices", "--nope"]
+    with pytest.raises(SystemExit) as exc:
+        app.run()
+    assert exc.value.code == 2
+    out = " ".join(capsys.readouterr().out.split())
+    assert "no option or argument '--nope' with choices in 'app pick'" in out
+
+
+def test_parsing_and_truncated_invalid_choice_error(capsys):
+    cmd = command(
+        name="pick",
+        callback=pick,
+        arguments=[argument(name="zone", arg_type=str, choices=ZONES)],
+        options=[
+            option(flags=["--mode", "-m"], arg_type=str, default="a", choices=["a", "b"]),
+            option(flags=["--fit"], arg_type=size, default=size.small),
+        ],
+    )
+    app = cli(name="app", commands=[cmd])
+    calls.clear()
+    sys.argv = ["app", "pick", "z4999", "-m", "b"]
+    app.run()
+    assert calls == [("z4999", "b", size.small)]
+    sys.argv = ["app", "pick", "nowhere"]
+    with pytest.raises(SystemExit) as exc:
+        app.run()
+    assert exc.value.code != 0
+    captured = capsys.readouterr()
+    out = captured.out + captured.err
+    assert "(+4,990 more)" in out
+    assert "'z10'" not in out
@@ -0,0 +1,58 @@
+"""Tests for compiled theme styles used by the rich help renderer."""
+
+import pytest
+from rich.console import Console
+from rich.style import Style
+
+from treeparse import argument, cli, command, group, option
+from treeparse.utils.color_config import color_config, color_theme
+from treeparse.utils.help_layout import help_layout
+from treeparse.utils.help_renderer import help_renderer
+
+
+class string_styles(help_renderer):
+    _styles = help_layout._styles
+
+
+def deploy(env: str, level: int):
+    """Deploy the current build."""
+
+
+def make_cli(**settings) -> cli:
+    deploy_cmd = command(
+        name="deploy",
+        help="Deploy it",
+        callback=deploy,
+        arguments=[argument(name="env", arg_type=str)],
+        options=[option(flags=["--level", "-l"], arg_type=int, default=1, help="Level")],
+    )
+    ops = group(name="ops", help="Operations", subgroups=[group(name="svc", help="Services", commands=[deploy_cmd])])
+    return cli(**{"name": "tool", "help": "Tool", "subgroups": [ops], **settings})
+
+
+@pytest.mark.parametrize("theme", list(color_theme))
+def test_compiled_matches_rich_resolution(theme):
+    console = Console()
+    normal, dimmed = color_config.from_theme(theme).compiled()
+    strings, dim_strings = color_config.from_theme(theme).style_strings()
+    for role, definition in strings.items():
+        assert normal[role] == console.get_style(definition, default=Style.null())
+        assert dimmed[role] == console.get_style(dim_strings[role], default=Style.null())
+
+
+def test_compiled_once_per_palette():
+    assert color_config().compiled() is color_config().compiled()
+    assert color_config().compiled() is not color_config(group="red").compiled()
+
+
+@pytest.mark.parametrize("theme", list(color_theme))
+@pytest.mark.parametrize("path", [[], ["ops", "svc", "deploy"]])
+def test_rendered_output_unchanged(theme, path, monkeypatch):
+    monkeypatch.setenv("FORCE_COLOR", "1")
+    app = make_cli(theme=theme, max_width=80)
+    outputs = []
+    for renderer in (string_styles, help_renderer):
+        r = renderer(app)
+        outputs.append("".join(r._render(path, True)))
+    assert outputs[0] == outputs[1]
+    assert "\x1b[" in outputs[1]
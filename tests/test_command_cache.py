@@ -0,0 +1,159 @@
+"""Tests for on-disk memoization of command results (command(cache=...))."""
+
+import sys
+import time
+
+from treeparse import argument, cache_config, cli, command, option
+from treeparse.utils.result_cache import result_cache
+
+
+def test_cache_true_coerces_to_config():
+    cmd = command(name="x", callback=lambda: None, cache=True)
+    assert isinstance(cmd.cache, cache_config)
+    assert command(name="x", callback=lambda: None, cache=False).cache is None
+
+
+def test_cache_hit_replays_output_without_callback(tmp_path, capsys):
+    calls = []
+
+    def report(name: str, level: int):
+        calls.append((name, level))
+        print(f"report {name} {level}")
+        return len(calls)
+
+    cmd = command(
+        name="report",
+        callback=report,
+        cache=True,
+        arguments=[argument(name="name", arg_type=str)],
+        options=[option(flags=["--level"], arg_type=int, default=1)],
+    )
+    app = cli(name="tool", commands=[cmd], cache_dir=tmp_path)
+    sys.argv = ["tool", "report", "a"]
+    app.run()
+    app.run()
+    assert capsys.readouterr().out == "report a 1\nreport a 1\n"
+    assert calls == [("a", 1)]
+
+
+def test_cache_key_includes_kwargs(tmp_path):
+    calls = []
+
+    def report(name: str, level: int):
+        calls.append((name, level))
+
+    cmd = command(
+        name="report",
+        callback=report,
+        cache=True,
+        arguments=[argument(name="name", arg_type=str)],
+        options=[option(flags=["--level"], arg_type=int, default=1)],
+    )
+    app = cli(name="tool", commands=[cmd], cache_dir=tmp_path)
+    for argv in (["report", "a"], ["report", "a", "--level", "2"], ["report", "b"], ["report", "a"]):
+        sys.argv = ["tool", *argv]
+        app.run()
+    assert calls == [("a", 1), ("a", 2), ("b", 1)]
+
+
+def test_no_cache_and_refresh_flags(tmp_path, capsys):
+    calls = []
+
+    def report(name: str):
+        calls.append(name)
+        print(f"report {name} {len(calls)}")
+
+    cmd = command(name="report", callback=report, cache=True, arguments=[argument(name="name", arg_type=str)])
+    app = cli(name="tool", commands=[cmd], cache_dir=tmp_path)
+    sys.argv = ["tool", "report", "a"]
+    app.run()
+    sys.argv = ["tool", "report", "a", "--no-cache"]
+    app.run()
+    assert len(calls) == 2
+    sys.argv = ["tool", "report", "a", "--refresh"]
+    app.run()
+    assert len(calls) == 3
+    capsys.readouterr()
+    sys.argv = ["tool", "report", "a"]
+    app.run()
+    assert len(calls) == 3
+    assert capsys.readouterr().out == "report a 3\n"
+
+
+def test_file_fingerprint_invalidates(tmp_path):
+    calls = []
+
+    def digest(path: str):
+        calls.append(path)
+
+    src = tmp_path / "input.txt"
+    src.write_text("one")
+    cmd = command(
+        name="digest",
+        callback=digest,
+        cache=cache_config(files=["path"]),
+        arguments=[argument(name="path", arg_type=str)],
+    )
+    app = cli(name="tool", commands=[cmd], cache_dir=tmp_path / "cache")
+    sys.argv = ["tool", "digest", str(src)]
+    app.run()
+    app.run()
+    assert len(calls) == 1
+    src.write_text("two")
+    app.run()
+    assert len(calls) == 2
+
+
+def test_ttl_expiry(tmp_path):
+    store = result_cache(cache_config(ttl=0.01), tmp_path, ["tool", "x"])
+    key = store.key({"a": 1})
+    store.put(key, 42, "out")
+    assert store.get(key)["value"] == 42
+    time.sleep(0.02)
+    assert store.get(key) is None
+
+
+def test_lru_eviction_by_count(tmp_path):
+    store = result_cache(cache_config(max_entries=2), tmp_path, ["tool", "x"])
+    keys = [store.key({"a": i}) for i in range(3)]
+    store.put(keys[0], 0, "")
+    store.put(keys[1], 1, "")
+    time.sleep(0.01)
+    assert store.get(keys[0]) is not None  # bump keys[0] to most recent
+    time.sleep(0.01)
+    store.put(keys[2], 2, "")
+    assert store.get(keys[1]) is None
+    assert store.get(keys[0]) is not None
+    assert store.get(keys[2]) is not None
+
+
+def test_size_eviction(tmp_path):
+    store = result_cache(cache_config(max_bytes=1500), tmp_path, ["tool", "x"])
+    first = store.key({"a": 1})
+    second = store.key({"a": 2})
+    store.put(first, "x" * 1000, "")
+    time.sleep(0.01)
+    store.put(second, "y" * 1000, "")
+    assert store.get(first) is None
+    assert store.get(second)["value"] == "y" * 1000
+
+
+def test_unpicklable_value_is_not_cached(tmp_path):
+    store = result_cache(cache_config(), tmp_path, ["tool", "x"])
+    key = store.key({})
+    assert store.put(key, lambda: None, "") is False
+    assert store.get(key) is None
+
+
+def test_editing_the_callback_invalidates_results(tmp_path, capsys):
+    def define(body):
+        namespace = {"__name__": "tasks"}
+        exec(f"def report(name: str):\n    print({body!r} + name)\n", namespace)
+        return namespace["report"]
+
+    sys.argv = ["tool", "report", "a"]
+    for body in ("old ", "old ", "new "):
+        cmd = command(name="report", callback=define(body), cache=True, arguments=[argument(name="name")])
+        cli(name="tool", cache_dir=tmp_path, commands=[cmd]).run()
+    assert capsys.readouterr().out == "old a\nold a\nnew a\n"
+    assert len(list((tmp_path / "results").rglob("*.pkl"))) == 2
@@ -0,0 +1,112 @@
+"""Tests for path-scoped config keys."""
+
+import sys
+import warnings
+
+import pytest
+
+from treeparse import argument, chain, cli, command, group, option
+from treeparse.utils import config_index as ci
+
+
+def deploy(env: str, level: int, region: str):
+    print(f"deploy {env} {level} {region}")
+
+
+def status(level: int, region: str):
+    print(f"status {level} {region}")
+
+
+def build(count: int):
+    print(f"build {count}")
+
+
+def ship():
+    print("ship")
+
+
+def make_cli(**settings) -> cli:
+    level = option(flags=["--level", "-l"], arg_type=int, default=1, help="Level")
+    deploy_cmd = command(
+        name="deploy", callback=deploy, arguments=[argument(name="env", arg_type=str)], options=[level]
+    )
+    release = chain(
+        name="release",
+        chained_commands=[
+            command(name="build", callback=build, options=[option(flags=["--count"], arg_type=int, default=1)]),
+            command(name="ship", callback=ship),
+        ],
+    )
+    ops = group(
+        name="ops",
+        options=[option(flags=["--region"], default="eu", choices=["eu", "us"], help="Region")],
+        subgroups=[group(name="svc", commands=[deploy_cmd])],
+        commands=[command(name="status", callback=status, options=[level.model_copy()]), release],
+    )
+    return cli(**{"name": "tool", "subgroups": [ops], **settings})
+
+
+def test_path_keys_give_same_dest_different_defaults(tmp_path, capsys):
+    config = tmp_path / "config.yml"
+    config.write_text("level: 2\nops.svc.deploy.level: 7\n")
+    app = make_cli(yml_config=config)
+    for argv in (["deploy", "prod"], ["deploy", "prod", "--level", "3"]):
+        sys.argv = ["tool", "ops", "svc", *argv]
+        app.run()
+    sys.argv = ["tool", "ops", "status"]
+    app.run()
+    assert capsys.readouterr().out.splitlines() == [
+        "deploy prod 7 eu",
+        "deploy prod 3 eu",
+        "status 2 eu",
+    ]
+
+
+def test_nested_mappings_and_group_scopes(tmp_path, capsys):
+    config = tmp_path / "config.yml"
+    config.write_text("ops:\n  level: 4\n  status:\n    level: 5\n    region: us\n")
+    app = make_cli(yml_config=config)
+    sys.argv = ["tool", "ops", "svc", "deploy", "prod"]
+    app.run()
+    sys.argv = ["tool", "ops", "status"]
+    app.run()
+    assert capsys.readouterr().out.splitlines() == ["deploy prod 4 eu", "status 5 us"]
+
+
+def test_chain_steps_are_addressed_under_their_chain(tmp_path, capsys):
+    config = tmp_path / "config.yml"
+    config.write_text("ops.release.build.count: 9\n")
+    sys.argv = ["tool", "ops", "release"]
+    make_cli(yml_config=config).run()
+    assert capsys.readouterr().out == "build 9\nship\n"
+
+
+def test_unknown_keys_warn(tmp_path):
+    config = tmp_path / "config.yml"
+    config.write_text("nope: 1\nops.nope: 1\nnope.level: 1\nops.status.tags: 1\nops.svc.deploy.count: 1\n")
+    sys.argv = ["tool", "ops", "status"]
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        make_cli(yml_config=config).run()
+    keys = [str(w.message).split("'")[1] for w in caught]
+    assert keys == ["nope", "ops.nope", "nope.level", "ops.status.tags", "ops.svc.deploy.count"]
+
+
+def test_known_scoped_keys():
+    index = ci.config_index(make_cli())
+    assert index.is_known("ops.svc.deploy.region")
+    assert index.is_known("ops.level")
+    assert index.is_known("ops.release.count")
+    assert not index.is_known("ops.status.count")
+
+
+def test_unknown_keys_warn_on_paths_without_options(tmp_path):
+    def ping():
+        print("ping")
+
+    config = tmp_path / "config.yml"
+    config.write_text("levle: 1\n")
+    app = cli(name="test", yml_config=config, commands=[command(name="ping", callback=ping)])
+    sys.argv = ["test", "ping"]
+    with pytest.warns(UserWarning, match="unrecognized key 'levle'"):
+        app.run()
@@ -0,0 +1,235 @@
+"""Tests for layered config sources and the per-invocation overlay."""
+
+import sys
+from enum import Enum
+
+import pytest
+
+from treeparse import argument, cli, command, group, option
+from treeparse.utils import config_layers
+
+
+def deploy(env: str, level: int, mode: str, region: str, verbose: bool):
+    print(f"deploy {env} {level} {mode} {region} {verbose}")
+
+
+def status(level: int, region: str, verbose: bool):
+    print(f"status {level} {region} {verbose}")
+
+
+def make_cli(**settings) -> cli:
+    ops = group(
+        name="ops",
+        options=[option(flags=["--region"], default="eu", choices=["eu", "us"])],
+        commands=[
+            command(
+                name="deploy",
+                callback=deploy,
+                arguments=[argument(name="env")],
+                options=[
+                    option(flags=["--level", "-l"], arg_type=int, default=1),
+                    option(flags=["--mode"], default="safe", choices=["fast", "safe"]),
+                ],
+            ),
+            command(name="status", callback=status, options=[option(flags=["--level"], arg_type=int, default=1)]),
+        ],
+    )
+    return cli(name="tool", options=[option(flags=["--verbose", "-v"], flag=True)], subgroups=[ops], **settings)
+
+
+@pytest.fixture
+def env(tmp_path, monkeypatch):
+    """A project directory below ``tmp_path`` as cwd, and ``tmp_path/home`` as the user config home."""
+    home = tmp_path / "home"
+    project = tmp_path / "repo" / "src"
+    project.mkdir(parents=True)
+    monkeypatch.setenv("XDG_CONFIG_HOME", str(home))
+    monkeypatch.delenv("TOOL_CONFIG", raising=False)
+    monkeypatch.chdir(project)
+    return tmp_path
+
+
+def write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+    return path
+
+
+def test_layers_in_precedence_order(env, monkeypatch, capsys):
+    user = write(env / "home" / "tool" / "config.yml", "level: 2\n")
+    pyproject = write(env / "repo" / "pyproject.toml", "[tool.tool]\nlevel = 3\n")
+    project = write(env / "repo" / ".tool.yml", "level: 4\n")
+    extra = write(env / "extra.yml", "level: 5\n")
+    monkeypatch.setenv("TOOL_CONFIG", str(extra))
+    base = write(env / "base.yml", "level: 6\nmode: fast\n")
+    app = make_cli(yml_config=base, layered_config=True)
+    labels = [layer.label for layer in config_layers.config_layers(app)]
+    assert labels == [
+        str(base),
+        "/etc/tool/config.yml",
+        str(user),
+        f"{pyproject} [tool.tool]",
+        str(project),
+        f"{extra} ($TOOL_CONFIG)",
+    ]
+    sys.argv = ["tool", "ops", "deploy", "prod"]
+    app.run()
+    for path in (extra, project, pyproject, user):
+        path.unlink()
+        monkeypatch.delenv("TOOL_CONFIG", raising=False)
+        app.run()
+    levels = [line.split()[2:4] for line in capsys.readouterr().out.splitlines()]
+    assert levels == [["5", "fast"], ["4", "fast"], ["3", "fast"], ["2", "fast"], ["6", "fast"]]
+
+
+def test_higher_layer_wins_over_more_specific_key(env, capsys):
+    write(env / "home" / "tool" / "config.yml", "ops.deploy.level: 7\nverbose: true\n")
+    write(env / "repo" / ".tool.yml", "level: 3\n")
+    sys.argv = ["tool", "ops", "deploy", "prod"]
+    make_cli(layered_config=True).run()
+    assert capsys.readouterr().out == "deploy prod 3 safe eu True\n"
+
+
+def test_command_line_beats_config_even_when_equal_to_default(env, capsys):
+    write(env / "repo" / ".tool.yml", "level: 7\nmode: fast\n")
+    app = make_cli(layered_config=True)
+    sys.argv = ["tool", "ops", "deploy", "prod", "--level", "1", "--mode", "safe"]
+    app.run()
+    sys.argv = ["tool", "ops", "deploy", "prod"]
+    app.run()
+    assert capsys.readouterr().out.splitlines() == [
+        "deploy prod 1 safe eu False",
+        "deploy prod 7 fast eu False",
+    ]
+
+
+def test_tree_and_parser_are_left_alone(env, capsys):
+    write(env / "repo" / ".tool.yml", "level: 7\n")
+    app = make_cli(layered_config=True)
+    sys.argv = ["tool", "ops", "status"]
+    app.run()
+    parser = app._parser
+    write(env / "repo" / ".tool.yml", "level: 8\n")
+    app.run()
+    assert capsys.readouterr().out.splitlines() == ["status 7 eu False", "status 8 eu False"]
+    assert app._parser is parser
+    assert app._get_node_from_path(["ops", "status"]).options[0].default == 1
+
+
+def test_layers_are_read_only_when_needed(env, monkeypatch):
+    write(env / "home" / "tool" / "config.yml", "level: 2\n")
+    every_option = "level: 3\nmode: fast\nregion: eu\nverbose: false\n"
+    write(env / "repo" / ".tool.yml", every_option)
+    reads = []
+    original = config_layers.config_layer.read
+
+    def counting(self, cache_dir):
+        reads.append(self.label)
+        return original(self, cache_dir)
+
+    monkeypatch.setattr(config_layers.config_layer, "read", counting)
+    app = make_cli(layered_config=True)
+    sys.argv = ["tool", "ops", "deploy", "prod"]
+    app.run()
+    assert reads == [str(env / "repo" / ".tool.yml")]
+    reads.clear()
+    sys.argv = ["tool", *"-v ops --region us deploy prod -l 4 --mode fast".split()]
+    app.run()
+    assert reads == []
+
+
+def test_help_shows_where_defaults_come_from(env, capsys):
+    project = write(env / "repo" / ".tool.yml", "level: 7\n")
+    app = make_cli(layered_config=True, max_width=400)
+
+    def help_text():
+        sys.argv = ["tool", "ops", "deploy", "--help"]
+        with pytest.raises(SystemExit):
+            app.run()
+        return "".join(capsys.readouterr().out.split())
+
+    assert f"(default:7,from{project})" in help_text()
+    assert "(default:safe)" in help_text()
+    write(project, "level: 9\n")
+    assert f"(default:9,from{project})" in help_text()
+
+
+def test_invalid_config_value(env, capsys):
+    project = write(env / "repo" / ".tool.yml", "level: lots\n")
+    sys.argv = ["tool", "ops", "status"]
+    with pytest.raises(SystemExit) as exc:
+        make_cli(layered_config=True).run()
+    assert exc.value.code == 1
+    assert f"invalid value 'lots' in config {project}" in " ".join(capsys.readouterr().out.split())
+
+
+def test_unparsable_discovered_files_are_skipped(env, capsys):
+    pyproject = write(env / "repo" / "pyproject.toml", "[tool.tool\nlevel = \n")
+    project = write(env / "repo" / ".tool.yml", "level: [3\n")
+    sys.argv = ["tool", "ops", "status"]
+    with pytest.warns(UserWarning) as record:
+        make_cli(layered_config=True).run()
+    assert capsys.readouterr().out == "status 1 eu False\n"
+    messages = [str(w.message) for w in record]
+    assert any(m.startswith(f"treeparse config: skipped {project}:") for m in messages)
+    assert any(m.startswith(f"treeparse config: skipped {pyproject} [tool.tool]:") for m in messages)
+
+
+def test_unparsable_named_file_is_an_error(env, capsys):
+    config = write(env / "config.yml", "level: [3\n")
+    sys.argv = ["tool", "ops", "status"]
+    with pytest.raises(SystemExit) as exc:
+        make_cli(yml_config=config).run()
+    assert exc.value.code == 1
+    assert f"Error: cannot read config {config}:" in " ".join(capsys.readouterr().out.split())
+
+
+def test_config_values_are_converted_like_argv(env, capsys):
+    class shade(Enum):
+        RED = "red"
+        BLUE = "blue"
+
+    def paint(shade: shade, coats: int):
+        print(f"paint {shade.name} {coats}")
+
+    config = write(env / "config.yml", "shade: BLUE\ncoats: '3'\n")
+    options = [
+        option(flags=["--shade"], arg_type=shade, default=shade.RED),
+        option(flags=["--coats"], arg_type=int, default=1),
+    ]
+    app = cli(name="test", yml_config=config, commands=[command(name="paint", callback=paint, options=options)])
+    sys.argv = ["test", "paint"]
+    app.run()
+    assert capsys.readouterr().out == "paint BLUE 3\n"
+
+
+def test_config_values_are_checked_against_choices(env, capsys):
+    def pick(mode: str, tags: list):
+        print(f"pick {mode} {tags}")
+
+    config = write(env / "config.yml", "mode: a\ntags: [x, zzz]\n")
+    app = cli(
+        name="test",
+        yml_config=config,
+        commands=[
+            command(
+                name="pick",
+                callback=pick,
+                options=[
+                    option(flags=["--mode"], choices=["a", "b"], default="a"),
+                    option(flags=["--tags"], nargs="*", choices=["x", "y"], default=[]),
+                ],
+            )
+        ],
+    )
+    sys.argv = ["test", "pick"]
+    with pytest.raises(SystemExit) as exc:
+        app.run()
+    assert exc.value.code == 1
+    assert f"Config value zzz not in choices ['x', 'y'] for option '--tags' in {config}" in " ".join(
+        capsys.readouterr().out.split()
+    )
+    write(config, "mode: zzz\n")
+    with pytest.raises(SystemExit):
+        app.run()
+    assert "Config value zzz not in choices ['a', 'b'] for option '--mode'" in capsys.readouterr().out
@@ -431,24 +431,29 @@ def test_yaml_config_applies_to_subgroup(tmp_path):
     yaml_file = tmp_path / "config.yml"
     yaml_file.write_text("verbose: true\n")
 
+    results = []
+
     def cb(verbose: bool):
-        pass
+        results.append(verbose)
 
     grp = group(name="ops")
     cmd = command(name="run", callback=cb, options=[option(flags=["--verbose"], arg_type=bool)])
     grp.commands.append(cmd)
     app = cli(name="test", subgroups=[grp], yml_config=yaml_file)
-    # _apply_yaml_config should walk into subgroups
-    config = {"verbose": True}
-    app._apply_yaml_config(config)
-    assert cmd.options[0].default is True
+    # config reaches options of commands in subgroups, without changing the tree
+    sys.argv = ["test", "ops", "run"]
+    app.run()
+    assert results == [True]
+    assert cmd.options[0].default is None
 
 
 def test_yaml_config_unknown_key_warns(tmp_path):
-    app = cli(name="test")
+    yaml_file = tmp_path / "config.yml"
+    yaml_file.write_text("unknown_key: 42\n")
+    app = cli(name="test", yml_config=yaml_file)
     with warnings.catch_warnings(record=True) as w:
         warnings.simplefilter("always")
-        app._apply_yaml_config({"unknown_key": 42})
+        app._overlay().lookup("", "verbose")
     assert any("unrecognized key 'unknown_key'" in str(warning.message) for warning in w)
 
 
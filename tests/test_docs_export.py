@@ -0,0 +1,127 @@
+"""Tests for Markdown/man page export."""
+
+import pytest
+
+from treeparse import argument, chain, cli, command, group, option
+from treeparse.utils import docs_export
+
+
+def deploy(env: str, level: int, region: str, dry_run: bool):
+    """Deploy the current build.
+
+    Rolls back on failure."""
+
+
+def build():
+    """Compile."""
+
+
+def status(region: str):
+    """Show status."""
+
+
+def make_cli(**settings) -> cli:
+    deploy_cmd = command(
+        name="deploy",
+        help="Deploy it",
+        callback=deploy,
+        arguments=[argument(name="env", arg_type=str)],
+        options=[option(flags=["--level", "-l"], arg_type=int, default=1, help="Level")],
+    )
+    svc = group(
+        name="svc",
+        help="Services",
+        options=[option(flags=["--dry-run"], flag=True, help="Dry run")],
+        commands=[deploy_cmd],
+    )
+    ops = group(
+        name="ops",
+        help="Operations",
+        options=[option(flags=["--region"], default="eu", choices=["eu", "us"], help="Region")],
+        subgroups=[svc],
+        commands=[
+            command(name="status", help="Status", callback=status),
+            chain(name="release", help="Build and ship", chained_commands=[command(name="build", callback=build)]),
+        ],
+    )
+    return cli(**{"name": "tool", "help": "Tool", "subgroups": [ops], **settings})
+
+
+def test_exports_every_node_in_both_formats(tmp_path):
+    app = make_cli(version="1.2")
+    deploy_cmd = app._get_node_from_path(["ops", "svc", "deploy"])
+    deploy_cmd.help = "Deploy | release"
+    deploy_cmd.arguments[0].choices = ["dev", "prod"]
+    app._get_node_from_path(["ops", "release"]).help = ".dotted help"
+    report = app.export_docs(tmp_path)
+    stems = ["tool", "tool-ops", "tool-ops-svc", "tool-ops-svc-deploy", "tool-ops-status", "tool-ops-release"]
+    assert report.written == sorted(f"{s}{ext}" for s in stems for ext in (".1", ".md"))
+    assert report.unchanged == 0
+    md = (tmp_path / "tool-ops-svc-deploy.md").read_text()
+    assert "# tool ops svc deploy" in md
+    assert "Rolls back on failure." in md
+    assert "tool ops svc deploy [OPTIONS] ENV" in md
+    assert "| `ENV` | str | (one of: dev\\|prod) |" in md
+    assert "| `--level, -l LEVEL` | int | Level (default: 1) |" in md
+    group_md = (tmp_path / "tool-ops-svc.md").read_text()
+    assert "- [`deploy`](tool-ops-svc-deploy.md) — Deploy | release" in group_md
+    assert "| `--dry-run` | flag | Dry run |" in group_md
+    man = (tmp_path / "tool-ops-svc-deploy.1").read_text()
+    assert man.startswith('.TH "TOOL-OPS-SVC-DEPLOY" "1" "" "tool 1.2" "tool manual"')
+    assert "\\fBtool\\-ops\\-svc\\fR(1)" in man
+    assert ".B \\-\\-dry\\-run" in (tmp_path / "tool-ops-svc.1").read_text()
+    assert "\\&.dotted help" in (tmp_path / "tool-ops-release.1").read_text()
+
+
+def test_rerun_rewrites_only_changed_pages(tmp_path):
+    make_cli().export_docs(tmp_path)
+    again = make_cli().export_docs(tmp_path)
+    assert again.written == [] and again.unchanged == 12
+    app = make_cli()
+    app._get_node_from_path(["ops", "status"]).help = "Show current status"
+    changed = app.export_docs(tmp_path)
+    # The command's own pages plus its group's, which lists the command's help.
+    assert changed.written == ["tool-ops-status.1", "tool-ops-status.md", "tool-ops.1", "tool-ops.md"]
+    (tmp_path / "tool.md").unlink()
+    assert app.export_docs(tmp_path).written == ["tool.md"]
+
+
+def test_removed_nodes_lose_their_pages(tmp_path):
+    app = make_cli()
+    app.export_docs(tmp_path)
+    ops = app._get_node_from_path(["ops"])
+    ops.commands = [c for c in ops.commands if c.name != "status"]
+    report = app.export_docs(tmp_path)
+    assert report.removed == ["tool-ops-status.1", "tool-ops-status.md"]
+    assert not (tmp_path / "tool-ops-status.md").exists()
+
+
+def test_single_format_and_unknown_format(tmp_path):
+    report = make_cli().export_docs(tmp_path, formats=("markdown",))
+    assert all(name.endswith(".md") for name in report.written)
+    with pytest.raises(ValueError, match="unknown docs format"):
+        make_cli().export_docs(tmp_path, formats=("html",))
+
+
+def test_parallel_export_matches_serial(tmp_path, monkeypatch):
+    monkeypatch.setattr(docs_export, "_PARALLEL_MIN", 1)
+    serial = make_cli().export_docs(tmp_path / "serial", jobs=1)
+    parallel = make_cli().export_docs(tmp_path / "parallel", jobs=2)
+    assert parallel.written == serial.written
+    for name in serial.written:
+        assert (tmp_path / "parallel" / name).read_text() == (tmp_path / "serial" / name).read_text()
+
+
+def test_colliding_page_names_raise(tmp_path):
+    app = cli(
+        name="tool",
+        subgroups=[
+            group(name="a-b", commands=[command(name="c", callback=build)]),
+            group(name="a", commands=[command(name="b-c", callback=build)]),
+        ],
+    )
+    with pytest.raises(
+        ValueError, match="docs pages of 'tool a-b c' and 'tool a b-c' would both be written to tool-a-b-c.md"
+    ):
+        app.export_docs(tmp_path)
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,245 @@
+"""Tests for options read from environment variables."""
+
+import os
+import sys
+from enum import Enum
+
+import pytest
+
+from treeparse import argument, chain, cli, command, group, option
+from treeparse.utils.config_index import config_index
+
+
+def deploy(env: str, level: int, mode: str, tags: list, region: str, verbose: bool, dry_run: bool):
+    """Deploy the current build."""
+    print(f"deploy {env} {level} {mode} {tags} {region} {verbose} {dry_run}")
+
+
+def status(level: int, region: str, verbose: bool):
+    """Show status."""
+    print(f"status {level} {region} {verbose}")
+
+
+def build(count: int):
+    """Compile sources."""
+    print(f"build {count}")
+
+
+def ship():
+    """Upload artifacts."""
+    print("ship")
+
+
+def make_cli(**settings) -> cli:
+    level = option(flags=["--level", "-l"], arg_type=int, default=1, help="Level")
+    svc = group(
+        name="svc",
+        help="Services",
+        options=[option(flags=["--dry-run"], flag=True, help="Dry run")],
+        commands=[
+            command(
+                name="deploy",
+                help="Deploy it",
+                callback=deploy,
+                arguments=[argument(name="env", arg_type=str)],
+                options=[
+                    level,
+                    option(flags=["--mode"], default="safe", choices=["fast", "safe"], help="Mode"),
+                    option(flags=["--tags"], nargs="*", default=[], help="Tags"),
+                ],
+            )
+        ],
+    )
+    release = chain(
+        name="release",
+        help="Build and ship",
+        chained_commands=[
+            command(name="build", callback=build, options=[option(flags=["--count"], arg_type=int, default=1)]),
+            command(name="ship", callback=ship),
+        ],
+    )
+    ops = group(
+        name="ops",
+        help="Operations",
+        options=[
+            option(flags=["--region"], default="eu", choices=["eu", "us"], help="Region"),
+            option(flags=["--local"], flag=True, inherit=False, help="Not inherited"),
+        ],
+        subgroups=[svc],
+        commands=[command(name="status", help="Status", callback=status, options=[level.model_copy()]), release],
+    )
+    return cli(
+        name="tool",
+        help="Tool",
+        options=[option(flags=["--verbose", "-v"], flag=True, help="Verbose")],
+        subgroups=[ops],
+        **settings,
+    )
+
+
+@pytest.fixture(autouse=True)
+def clean_env(monkeypatch):
+    for name in list(os.environ):
+        if name.startswith("TPX_ENV"):
+            monkeypatch.delenv(name)
+
+
+def test_explicit_envvar(monkeypatch, capsys):
+    def status(level: int):
+        print(f"status {level}")
+
+    opt = option(flags=["--level"], arg_type=int, default=1, envvar="TPX_ENV_STATUS")
+    app = cli(name="test", commands=[command(name="status", callback=status, options=[opt])])
+    assert config_index(app).envvars == {id(opt): ("TPX_ENV_STATUS",)}
+    sys.argv = ["test", "status"]
+    app.run()
+    monkeypatch.setenv("TPX_ENV_STATUS", "4")
+    app.run()
+    sys.argv = ["test", "status", "--level", "1"]
+    app.run()
+    monkeypatch.setenv("TPX_ENV_STATUS", "")
+    sys.argv = ["test", "status"]
+    app.run()
+    assert capsys.readouterr().out.splitlines() == ["status 1", "status 4", "status 1", "status 1"]
+
+
+def test_prefix_names_most_specific_first():
+    app = make_cli(envvar_prefix="TPX_ENV")
+    status_level = app._get_node_from_path(["ops", "status"]).options[0]
+    status_level.envvar = "TPX_ENV_STATUS"
+    index = config_index(app)
+    level = app._get_node_from_path(["ops", "svc", "deploy"]).options[0]
+    assert index.envvars[id(level)] == (
+        "TPX_ENV_OPS_SVC_DEPLOY_LEVEL",
+        "TPX_ENV_OPS_SVC_LEVEL",
+        "TPX_ENV_OPS_LEVEL",
+        "TPX_ENV_LEVEL",
+    )
+    count = app._get_node_from_path(["ops", "release"]).chained_commands[0].options[0]
+    assert index.envvars[id(count)][0] == "TPX_ENV_OPS_RELEASE_BUILD_COUNT"
+    assert index.envvars[id(status_level)] == ("TPX_ENV_STATUS",)
+
+
+def test_prefix_values_are_converted_like_argv(monkeypatch, capsys):
+    monkeypatch.setenv("TPX_ENV_LEVEL", "3")
+    monkeypatch.setenv("TPX_ENV_MODE", "fast")
+    monkeypatch.setenv("TPX_ENV_OPS_TAGS", "a b")
+    monkeypatch.setenv("TPX_ENV_REGION", "us")
+    monkeypatch.setenv("TPX_ENV_DRY_RUN", "yes")
+    monkeypatch.setenv("TPX_ENV_OPS_RELEASE_BUILD_COUNT", "9")
+    app = make_cli(envvar_prefix="TPX_ENV")
+    sys.argv = ["tool", "ops", "svc", "deploy", "prod"]
+    app.run()
+    monkeypatch.setenv("TPX_ENV_OPS_SVC_DEPLOY_LEVEL", "5")
+    sys.argv = ["tool", "ops", "--region", "eu", "svc", "deploy", "prod", "--mode", "safe"]
+    app.run()
+    sys.argv = ["tool", "ops", "release"]
+    app.run()
+    assert capsys.readouterr().out.splitlines() == [
+        "deploy prod 3 fast ['a', 'b'] us False True",
+        "deploy prod 5 safe ['a', 'b'] eu False True",
+        "build 9",
+        "ship",
+    ]
+
+
+def test_enum_values_are_converted_by_name(monkeypatch, capsys):
+    class shade(Enum):
+        RED = "red"
+        BLUE = "blue"
+
+    def paint(shade: shade):
+        print(f"paint {shade.name}")
+
+    opt = option(flags=["--shade"], arg_type=shade, default=shade.RED)
+    app = cli(name="test", envvar_prefix="TPX_ENV", commands=[command(name="paint", callback=paint, options=[opt])])
+    monkeypatch.setenv("TPX_ENV_SHADE", "BLUE")
+    sys.argv = ["test", "paint"]
+    app.run()
+    assert capsys.readouterr().out == "paint BLUE\n"
+    monkeypatch.setenv("TPX_ENV_SHADE", "GREEN")
+    with pytest.raises(SystemExit) as exc:
+        app.run()
+    assert exc.value.code == 1
+    assert "argument --shade: invalid value 'GREEN' in $TPX_ENV_SHADE" in " ".join(capsys.readouterr().out.split())
+
+
+@pytest.mark.parametrize(
+    "name, value, flag",
+    [("TPX_ENV_LEVEL", "lots", "--level"), ("TPX_ENV_MODE", "slow", "--mode"), ("TPX_ENV_REGION", "asia", "--region")],
+)
+def test_invalid_values(monkeypatch, capsys, name, value, flag):
+    monkeypatch.setenv(name, value)
+    sys.argv = ["tool", "ops", "svc", "deploy", "prod"]
+    with pytest.raises(SystemExit) as exc:
+        make_cli(envvar_prefix="TPX_ENV").run()
+    assert exc.value.code == 1
+    assert f"argument {flag}: invalid value '{value}' in ${name}" in " ".join(capsys.readouterr().out.split())
+
+
+def test_environment_beats_config(tmp_path, monkeypatch, capsys):
+    config = tmp_path / "config.yml"
+    config.write_text("level: 7\nmode: fast\n")
+    monkeypatch.setenv("TPX_ENV_LEVEL", "2")
+    sys.argv = ["tool", "ops", "svc", "deploy", "prod"]
+    make_cli(envvar_prefix="TPX_ENV", yml_config=config).run()
+    assert capsys.readouterr().out == "deploy prod 2 fast [] eu False False\n"
+
+
+def test_only_variables_on_the_dispatched_path_are_read(monkeypatch):
+    read = []
+
+    class recording(dict):
+        def get(self, key, default=None):
+            if key.startswith("TPX_ENV"):
+                read.append(key)
+            return super().get(key, default)
+
+    app = make_cli(envvar_prefix="TPX_ENV")
+    monkeypatch.setattr(os, "environ", recording(os.environ))
+    sys.argv = ["tool", "ops", "release"]
+    app.run()
+    assert read == [
+        "TPX_ENV_VERBOSE",
+        "TPX_ENV_OPS_REGION",
+        "TPX_ENV_REGION",
+        "TPX_ENV_OPS_LOCAL",
+        "TPX_ENV_LOCAL",
+        "TPX_ENV_OPS_RELEASE_BUILD_COUNT",
+        "TPX_ENV_OPS_RELEASE_COUNT",
+        "TPX_ENV_OPS_COUNT",
+        "TPX_ENV_COUNT",
+    ]
+
+
+def test_help_shows_environment_source(monkeypatch, capsys):
+    app = make_cli(envvar_prefix="TPX_ENV", max_width=400)
+
+    def help_text():
+        sys.argv = ["tool", "ops", "svc", "deploy", "--help"]
+        with pytest.raises(SystemExit):
+            app.run()
+        return "".join(capsys.readouterr().out.split())
+
+    assert "(default:1)" in help_text()
+    monkeypatch.setenv("TPX_ENV_OPS_SVC_DEPLOY_LEVEL", "6")
+    assert "(default:6,from$TPX_ENV_OPS_SVC_DEPLOY_LEVEL)" in help_text()
+
+
+def test_required_option_from_environment(monkeypatch, capsys):
+    seen = []
+
+    def show(level: int):
+        seen.append(level)
+
+    opt = option(flags=["--level", "-l"], arg_type=int, required=True, envvar="TPX_ENV_REQUIRED")
+    app = cli(name="test", commands=[command(name="show", callback=show, options=[opt])])
+    sys.argv = ["test", "show"]
+    monkeypatch.setenv("TPX_ENV_REQUIRED", "5")
+    app.run()
+    assert seen == [5]
+    monkeypatch.delenv("TPX_ENV_REQUIRED")
+    with pytest.raises(SystemExit) as exc:
+        app.run()
+    assert exc.value.code == 1
+    assert "the following arguments are required: --level/-l" in capsys.readouterr().out
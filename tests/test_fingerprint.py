@@ -0,0 +1,171 @@
+"""Tests for the memoized tree fingerprint."""
+
+import pytest
+
+from treeparse import argument, chain, cli, command, group, option
+from treeparse.utils import fingerprint as fp
+from treeparse.utils.color_config import color_theme
+
+
+def deploy(env: str, level: int = 1):
+    """Deploy a service."""
+
+
+def build():
+    """Compile everything."""
+
+
+def ship():
+    """Upload the build."""
+
+
+def status():
+    pass
+
+
+def rebuild(count: int):
+    """Compile everything from scratch."""
+
+
+def make_cli(deploy_help: str = "Deploy") -> cli:
+    deploy_cmd = command(
+        name="deploy",
+        help=deploy_help,
+        callback=deploy,
+        arguments=[argument(name="env", arg_type=str, choices=["dev", "prod"])],
+        options=[option(flags=["--level", "-l"], arg_type=int, default=1, help="Level")],
+    )
+    release = chain(
+        name="release", chained_commands=[command(name="build", callback=build), command(name="ship", callback=ship)]
+    )
+    svc = group(name="svc", help="Services", commands=[deploy_cmd])
+    ops = group(
+        name="ops",
+        help="Operations",
+        subgroups=[svc],
+        commands=[command(name="status", callback=status), release],
+        options=[option(flags=["--region"], choices=["eu", "us"], default="eu", help="Region")],
+    )
+    return cli(name="tool", help="Tool", subgroups=[ops])
+
+
+def find(app, *path):
+    return app._get_node_from_path(list(path))
+
+
+@pytest.fixture
+def count_payloads(monkeypatch):
+    calls = []
+    original = fp._local_payload
+
+    def counting(node, metadata):
+        calls.append(node.name)
+        return original(node, metadata)
+
+    monkeypatch.setattr(fp, "_local_payload", counting)
+    return calls
+
+
+def test_fingerprint_is_stable_across_builds():
+    assert make_cli().fingerprint() == make_cli().fingerprint()
+
+
+def _set(path, field, value):
+    def change(app):
+        setattr(find(app, *path), field, value)
+
+    return change
+
+
+def _set_param(path, kind, field, value):
+    def change(app):
+        setattr(getattr(find(app, *path), kind)[0], field, value)
+
+    return change
+
+
+def _add_option(app):
+    find(app, "ops").options.append(option(flags=["--zone"]))
+
+
+def _add_flag(app):
+    find(app, "ops", "svc", "deploy").options[0].flags.append("--lvl")
+
+
+def _add_choice(app):
+    find(app, "ops").options[0].choices.append("ap")
+
+
+def _add_command(app):
+    find(app, "ops", "svc").commands.append(command(name="undo", callback=rebuild))
+
+
+def _change_callback(app):
+    find(app, "ops", "release").chained_commands[0].callback = rebuild
+
+
+@pytest.mark.parametrize(
+    "change",
+    [
+        _set(["ops", "svc", "deploy"], "help", "Ship it"),
+        _set(["ops", "svc", "deploy"], "name", "ship"),
+        _set(["ops", "svc", "deploy"], "sort_key", 3),
+        _set(["ops", "svc"], "fold", True),
+        _set_param(["ops"], "options", "help", "Where"),
+        _set_param(["ops", "svc", "deploy"], "options", "default", 2),
+        _set_param(["ops", "svc", "deploy"], "options", "flags", ["--lvl"]),
+        _set_param(["ops", "svc", "deploy"], "options", "arg_type", float),
+        _set_param(["ops", "svc", "deploy"], "arguments", "choices", ["dev"]),
+        _add_option,
+        _add_flag,
+        _add_choice,
+        _add_command,
+        _change_callback,
+    ],
+)
+def test_in_place_changes_change_the_fingerprint(change):
+    app = make_cli()
+    before = app.fingerprint()
+    change(app)
+    assert app.fingerprint() != before
+
+
+@pytest.mark.parametrize("field,value", [("theme", color_theme.MONOKAI), ("help", "Other tool"), ("help_choices", 3)])
+def test_root_changes_change_the_fingerprint(field, value):
+    app = make_cli()
+    before = app.fingerprint()
+    setattr(app, field, value)
+    assert app.fingerprint() != before
+
+
+def test_only_changed_subtrees_are_rehashed(count_payloads):
+    app = make_cli()
+    app.fingerprint()
+    assert sorted(count_payloads) == ["build", "deploy", "ops", "release", "ship", "status", "svc", "tool"]
+    count_payloads.clear()
+    app.fingerprint()
+    assert count_payloads == ["tool"]
+    count_payloads.clear()
+    find(app, "ops", "svc", "deploy").options[0].help = "How much"
+    app.fingerprint()
+    assert count_payloads == ["tool", "ops", "svc", "deploy"]
+
+
+def test_changed_tree_matches_a_fresh_build():
+    app = make_cli()
+    app.fingerprint()
+    find(app, "ops", "svc", "deploy").help = "Ship it"
+    assert app.fingerprint() == make_cli(deploy_help="Ship it").fingerprint()
+
+
+def test_invalidate_rehashes_on_request(count_payloads):
+    app = make_cli()
+    app.fingerprint()
+    count_payloads.clear()
+    app.invalidate_fingerprint(find(app, "ops", "svc"))
+    app.fingerprint()
+    assert count_payloads == ["tool", "ops", "svc"]
+    count_payloads.clear()
+    app.invalidate_fingerprint()
+    app.fingerprint()
+    assert len(count_payloads) == 8
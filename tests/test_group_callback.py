@@ -0,0 +1,98 @@
+"""Tests for group-level setup hooks (group(callback=...))."""
+
+import pytest
+
+from treeparse import argument, chain, cli, cli_runner, command, group, option
+
+
+def project_app(opened):
+    def open_project(project_dir: str):
+        opened.append(project_dir)
+        return {"dir": project_dir}
+
+    def build(target: str, project):
+        print(f"build {target} in {project['dir']}")
+
+    def test(project):
+        print(f"test in {project['dir']}")
+
+    b = command(name="build", callback=build, arguments=[argument(name="target", arg_type=str)])
+    t = command(name="test", callback=test)
+    grp = group(
+        name="project",
+        callback=open_project,
+        options=[option(flags=["--project-dir"], arg_type=str, default=".", inherit=False)],
+        commands=[b, t, chain(name="ci", chained_commands=[b, t])],
+    )
+    return cli(name="tool", subgroups=[grp])
+
+
+def test_hook_result_injected_into_leaf():
+    opened = []
+    result = cli_runner(project_app(opened)).invoke(["project", "--project-dir", "/src", "build", "app"])
+    assert result.exit_code == 0
+    assert result.output == "build app in /src"
+    assert opened == ["/src"]
+
+
+def test_hook_runs_once_per_chain():
+    opened = []
+    result = cli_runner(project_app(opened)).invoke(["project", "ci", "lib"])
+    assert result.exit_code == 0
+    assert result.output.splitlines() == ["build lib in .", "test in ."]
+    assert opened == ["."]
+
+
+def test_nested_hooks_and_custom_context_name():
+    calls = []
+
+    def root_hook():
+        calls.append("root")
+        return "cfg"
+
+    def inner_hook(settings):
+        calls.append("inner")
+        return f"{settings}+db"
+
+    def leaf(settings, store):
+        print(settings, store)
+
+    inner = group(
+        name="data",
+        callback=inner_hook,
+        context="store",
+        commands=[command(name="show", callback=leaf)],
+    )
+    app = cli(name="tool", callback=root_hook, context="settings", subgroups=[inner])
+    result = cli_runner(app).invoke(["data", "show"])
+    assert result.exit_code == 0
+    assert result.output == "cfg cfg+db"
+    assert calls == ["root", "inner"]
+
+
+def test_hook_not_run_on_other_paths():
+    calls = []
+
+    def hook():
+        calls.append("hook")
+
+    def noop():
+        pass
+
+    grp = group(name="a", callback=hook, commands=[command(name="x", callback=noop)])
+    app = cli(name="tool", subgroups=[grp], commands=[command(name="y", callback=noop)])
+    cli_runner(app).invoke(["y"])
+    assert calls == []
+
+
+def test_hook_unknown_parameter_rejected():
+    def hook(missing):
+        pass
+
+    def noop():
+        pass
+
+    grp = group(name="a", callback=hook, commands=[command(name="x", callback=noop)])
+    app = cli(name="tool", subgroups=[grp])
+    with pytest.raises(ValueError, match="callback parameter"):
+        app._validate()
@@ -0,0 +1,110 @@
+"""Tests for the rendered-help cache."""
+
+import sys
+
+import pytest
+
+from treeparse import argument, cli, command, group
+from treeparse.utils import fingerprint
+from treeparse.utils.plain_renderer import plain_renderer
+
+
+def deploy(env: str):
+    """Deploy a service."""
+
+
+def make_cli(**settings) -> cli:
+    ops = group(
+        name="ops",
+        help="Operations",
+        commands=[command(name="deploy", callback=deploy, arguments=[argument(name="env")])],
+    )
+    return cli(**{"name": "tool", "help": "Tool", "subgroups": [ops], **settings})
+
+
+@pytest.fixture
+def count_renders(monkeypatch):
+    """Renders and fingerprinted nodes, so a cache hit can be told from a traversal."""
+    calls = []
+    original_render = plain_renderer._render
+    original_payload = fingerprint._local_payload
+
+    def counting_render(self, path, verbose):
+        calls.append((tuple(path), verbose))
+        return original_render(self, path, verbose)
+
+    def counting_payload(node, metadata):
+        calls.append(("fingerprint", node.name))
+        return original_payload(node, metadata)
+
+    monkeypatch.setattr(plain_renderer, "_render", counting_render)
+    monkeypatch.setattr(fingerprint, "_local_payload", counting_payload)
+    return calls
+
+
+def run_help(app, *argv):
+    sys.argv = ["tool", *argv]
+    with pytest.raises(SystemExit):
+        app.run()
+
+
+def test_repeated_help_is_served_from_memory(count_renders, capsys):
+    app = make_cli()
+    run_help(app, "--help")
+    first = capsys.readouterr().out
+    run_help(app, "--help")
+    assert capsys.readouterr().out == first
+    assert "deploy <ENV, str>" in first
+    assert count_renders == [((), False)]
+
+
+def test_key_covers_path_and_verbosity(count_renders):
+    app = make_cli()
+    for argv in (["--help"], ["ops", "--help"], ["--hv"], ["ops", "--help"]):
+        run_help(app, *argv)
+    assert count_renders == [((), False), (("ops",), False), ((), True)]
+
+
+def test_in_place_changes_are_rendered(count_renders, capsys):
+    app = make_cli()
+    run_help(app, "--help")
+    app.subgroups[0].help = "Changed"
+    run_help(app, "--help")
+    assert "Changed" in capsys.readouterr().out
+    app.show_types = False
+    run_help(app, "--help")
+    assert "<ENV, str>" not in capsys.readouterr().out
+    assert count_renders == [((), False)] * 3
+
+
+def test_disk_cache_survives_a_new_process(tmp_path, count_renders, capsys):
+    run_help(make_cli(cache_dir=tmp_path), "--help")
+    first = capsys.readouterr().out
+    assert list((tmp_path / "help").iterdir())
+    run_help(make_cli(cache_dir=tmp_path), "--help")
+    assert capsys.readouterr().out == first
+    assert count_renders == [((), False)]
+
+
+def test_disk_cache_is_skipped_after_an_in_place_change(tmp_path, capsys):
+    app = make_cli(cache_dir=tmp_path)
+    run_help(app, "--help")
+    capsys.readouterr()
+    app.help = "Changed"
+    run_help(app, "--help")
+    assert "Changed" in capsys.readouterr().out
+    run_help(make_cli(cache_dir=tmp_path), "--help")
+    assert "Changed" not in capsys.readouterr().out
+
+
+def test_fingerprint_tracks_docstrings():
+    def make(doc):
+        def x():
+            pass
+
+        x.__doc__ = doc
+        return x
+
+    fp_a = cli(name="t", commands=[command(name="x", callback=make("One."))]).fingerprint()
+    fp_b = cli(name="t", commands=[command(name="x", callback=make("Two."))]).fingerprint()
+    assert fp_a != fp_b
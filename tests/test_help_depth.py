@@ -0,0 +1,188 @@
+"""Tests for depth-limited, budgeted and paged help."""
+
+import io
+import sys
+
+import pytest
+
+from treeparse import argument, cli, command, group, option
+from treeparse.utils import help_renderer as rich_help
+from treeparse.utils.pager import pager_writer
+
+
+def deploy(env: str, level: int, dry_run: bool):
+    """Deploy the current build."""
+
+
+def status():
+    """Show status."""
+
+
+def make_cli(**settings) -> cli:
+    deploy_cmd = command(
+        name="deploy",
+        help="Deploy it",
+        callback=deploy,
+        arguments=[argument(name="env", arg_type=str)],
+        options=[option(flags=["--level", "-l"], arg_type=int, default=1, help="Level")],
+    )
+    svc = group(
+        name="svc",
+        help="Services",
+        options=[option(flags=["--dry-run"], flag=True, help="Dry run")],
+        commands=[deploy_cmd],
+    )
+    ops = group(name="ops", help="Operations", subgroups=[svc], commands=[command(name="status", callback=status)])
+    return cli(**{"name": "tool", "help": "Tool", "subgroups": [ops], **settings})
+
+
+def test_depth_folds_groups_at_the_limit(capsys):
+    sys.argv = ["tool", "--help-depth", "1"]
+    with pytest.raises(SystemExit) as exc:
+        make_cli().run()
+    assert exc.value.code == 0
+    out = capsys.readouterr().out
+    assert "ops [...]" in out
+    assert "status" not in out
+
+
+def test_depth_is_relative_to_selected_group_and_accepts_equals_form(capsys):
+    app = make_cli()
+    sys.argv = ["tool", "ops", "--help-depth=1"]
+    with pytest.raises(SystemExit):
+        app.run()
+    out = capsys.readouterr().out
+    assert "svc [...]" in out
+    assert "status" in out
+    assert "--dry-run" not in out
+    sys.argv = ["tool", "ops", "--help-depth", "2"]
+    with pytest.raises(SystemExit):
+        app.run()
+    out = capsys.readouterr().out
+    assert "deploy <ENV, str>" in out
+    assert "--dry-run" in out
+
+
+def test_cli_help_depth_default(capsys):
+    sys.argv = ["tool", "--help"]
+    with pytest.raises(SystemExit):
+        make_cli(help_depth=2).run()
+    out = capsys.readouterr().out
+    assert "svc [...]" in out
+    assert "--dry-run" not in out
+
+
+@pytest.mark.parametrize("value", ["0", "x"])
+def test_invalid_depth(capsys, value):
+    sys.argv = ["tool", "--help-depth", value]
+    with pytest.raises(SystemExit) as exc:
+        make_cli().run()
+    assert exc.value.code == 2
+    assert "--help-depth" in capsys.readouterr().out
+
+
+def test_missing_depth_value():
+    sys.argv = ["tool", "--help-depth"]
+    with pytest.raises(SystemExit) as exc:
+        make_cli().run()
+    assert exc.value.code == 2
+
+
+def test_budget_folds_deepest_levels_and_says_so(capsys):
+    sys.argv = ["tool", "--help"]
+    with pytest.raises(SystemExit):
+        make_cli(help_budget=5).run()
+    out = capsys.readouterr().out
+    assert "svc [...]" in out
+    assert "Showing 2 levels" in out
+    with pytest.raises(SystemExit):
+        make_cli(help_budget=None).run()
+    out = capsys.readouterr().out
+    assert "--dry-run" in out
+    assert "Showing" not in out
+
+
+def test_budget_always_shows_one_level(capsys):
+    sys.argv = ["tool", "--help"]
+    with pytest.raises(SystemExit):
+        make_cli(help_budget=0).run()
+    out = capsys.readouterr().out
+    assert "ops [...]" in out
+    assert "Showing 1 level;" in out
+
+
+def test_explicit_depth_overrides_budget(capsys):
+    sys.argv = ["tool", "--help-depth", "3"]
+    with pytest.raises(SystemExit):
+        make_cli(help_budget=5).run()
+    out = capsys.readouterr().out
+    assert "deploy <ENV, str>" in out
+    assert "Showing" not in out
+
+
+def step():
+    pass
+
+
+def test_rich_help_is_streamed_in_row_batches(monkeypatch):
+    monkeypatch.setattr(rich_help, "_ROW_BATCH", 4)
+    ops = group(
+        name="ops", help="Operations", commands=[command(name=f"c{i}", help="Step", callback=step) for i in range(10)]
+    )
+    app = cli(name="tool", help="Tool", subgroups=[ops], show_types=False)
+    chunks = list(rich_help.help_renderer(app)._render([], False))
+    # Usage, description, then the 12 tree rows in three batches.
+    assert len(chunks) == 5
+    assert [chunk.count("\n") for chunk in chunks[2:5]] == [4, 4, 4]
+    assert "c9" in chunks[4]
+
+
+class fake_tty(io.StringIO):
+    def isatty(self):
+        return True
+
+
+@pytest.fixture
+def pager_to(tmp_path, monkeypatch):
+    target = tmp_path / "paged.txt"
+    script = f"import sys; open({str(target)!r}, 'w').write(sys.stdin.read())"
+    monkeypatch.setenv("TREEPARSE_PAGER", f"{sys.executable} -c {script!r}")
+    monkeypatch.setattr("shutil.get_terminal_size", lambda *a: __import__("os").terminal_size((80, 5)))
+    return target
+
+
+def test_pager_used_when_output_outgrows_terminal(pager_to):
+    stream = fake_tty()
+    writer = pager_writer(stream)
+    for i in range(8):
+        writer.write(f"line {i}\n")
+    writer.close()
+    assert stream.getvalue() == ""
+    assert pager_to.read_text() == "".join(f"line {i}\n" for i in range(8))
+
+
+def test_short_output_and_pipes_bypass_pager(pager_to):
+    stream = fake_tty()
+    writer = pager_writer(stream)
+    writer.write("one\ntwo\n")
+    writer.close()
+    assert stream.getvalue() == "one\ntwo\n"
+    piped = io.StringIO()
+    writer = pager_writer(piped)
+    writer.write("x\n" * 10)
+    writer.close()
+    assert piped.getvalue() == "x\n" * 10
+    assert not pager_to.exists()
+
+
+def test_pager_disabled(pager_to, monkeypatch):
+    stream = fake_tty()
+    writer = pager_writer(stream, enabled=False)
+    writer.write("x\n" * 10)
+    writer.close()
+    monkeypatch.setenv("TREEPARSE_PAGER", "cat")
+    writer = pager_writer(stream)
+    writer.write("y\n" * 10)
+    writer.close()
+    assert stream.getvalue() == "x\n" * 10 + "y\n" * 10
+    assert not pager_to.exists()
@@ -0,0 +1,134 @@
+"""Tests for help search and its inverted index."""
+
+import sys
+
+import pytest
+
+from treeparse import argument, chain, cli, command, group, option
+from treeparse.utils import search_index as si
+
+
+def deploy(env: str, level: int, dry_run: bool):
+    """Deploy the current build."""
+
+
+def status(level: int):
+    """Show status."""
+
+
+def build():
+    """Compile sources."""
+
+
+def ship():
+    """Upload artifacts."""
+
+
+def make_cli(**settings) -> cli:
+    level = option(flags=["--level", "-l"], arg_type=int, default=1, help="Level")
+    svc = group(
+        name="svc",
+        help="Services",
+        options=[option(flags=["--dry-run"], flag=True, help="Dry run")],
+        commands=[command(name="deploy", callback=deploy, arguments=[argument(name="env")], options=[level])],
+    )
+    release = chain(
+        name="release",
+        help="Build and ship",
+        chained_commands=[command(name="build", callback=build), command(name="ship", callback=ship)],
+    )
+    ops = group(
+        name="ops",
+        help="Operations",
+        subgroups=[svc],
+        commands=[command(name="status", help="Status", callback=status, options=[level]), release],
+    )
+    return cli(name="tool", help="Tool", subgroups=[ops], **settings)
+
+
+def paths(hits):
+    return [h.path for h in hits]
+
+
+def test_search_fields():
+    app = make_cli()
+    assert paths(app.search("deploy")) == [["ops", "svc", "deploy"]]
+    assert app.search("current")[0].fields == ["docstring"]
+    assert app.search("dry")[0].fields == ["option"]
+    assert app.search("env")[0].fields == ["argument"]
+    assert paths(app.search("upload")) == [["ops", "release"]]
+    assert paths(app.search("services")) == [["ops", "svc"]]
+
+
+def test_terms_are_anded_prefixes_and_case_insensitive():
+    app = make_cli()
+    assert paths(app.search("LEVEL sho")) == [["ops", "status"]]
+    assert app.search("deploy upload") == []
+    assert app.search("  ") == []
+
+
+def test_search_within_path():
+    app = make_cli()
+    assert paths(app.search("level")) == [["ops", "svc", "deploy"], ["ops", "status"]]
+    assert paths(app.search("level", path=["ops", "svc"])) == [["ops", "svc", "deploy"]]
+
+
+def test_index_is_built_once_per_cli(monkeypatch):
+    app = make_cli()
+    app.search("deploy")
+    monkeypatch.setattr(si.search_index, "build", classmethod(lambda cls, root: pytest.fail("index rebuilt")))
+    assert paths(app.search("status")) == [["ops", "status"]]
+
+
+def test_index_is_rebuilt_after_an_in_place_change():
+    app = make_cli()
+    assert app.search("rollback") == []
+    app.subgroups[0].help = "Operations and rollback"
+    assert paths(app.search("rollback")) == [["ops"]]
+
+
+def test_index_is_cached_on_disk(tmp_path, monkeypatch):
+    make_cli(cache_dir=tmp_path).search("deploy")
+    files = list((tmp_path / "search").iterdir())
+    assert len(files) == 1
+    monkeypatch.setattr(si.search_index, "build", classmethod(lambda cls, root: pytest.fail("index rebuilt")))
+    monkeypatch.setattr(cli, "fingerprint", lambda self: pytest.fail("tree hashed"))
+    assert paths(make_cli(cache_dir=tmp_path).search("deploy")) == [["ops", "svc", "deploy"]]
+
+
+def test_index_stays_in_memory_without_cache_dir(tmp_path, monkeypatch):
+    monkeypatch.delenv("TREEPARSE_CACHE_DIR", raising=False)
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "xdg"))
+    monkeypatch.setenv("HOME", str(tmp_path / "home"))
+    assert paths(make_cli().search("deploy")) == [["ops", "svc", "deploy"]]
+    assert not (tmp_path / "xdg").exists() and not (tmp_path / "home").exists()
+
+
+def test_help_search_prints_pruned_tree(capsys):
+    sys.argv = ["tool", "--help-search", "dry"]
+    with pytest.raises(SystemExit) as exc:
+        make_cli().run()
+    assert exc.value.code == 0
+    out = capsys.readouterr().out
+    assert "svc" in out
+    assert "--dry-run" in out
+    assert "deploy" not in out
+    assert "status" not in out
+    assert "release" not in out
+    assert out.rstrip().endswith("1 match for 'dry'")
+
+
+def test_help_search_scoped_and_empty(capsys):
+    app = make_cli()
+    sys.argv = ["tool", "ops", "svc", "--help-search=level"]
+    with pytest.raises(SystemExit):
+        app.run()
+    out = capsys.readouterr().out
+    assert "deploy" in out
+    assert "status" not in out
+    assert out.rstrip().endswith("1 match for 'level'")
+    sys.argv = ["tool", "--help-search", "zzz"]
+    with pytest.raises(SystemExit) as exc:
+        app.run()
+    assert exc.value.code == 0
+    assert capsys.readouterr().out.rstrip().endswith("0 matches for 'zzz'")
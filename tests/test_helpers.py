@@ -2,7 +2,9 @@ import os
 import tempfile
 
 import pytest
+import yaml
 
+from treeparse.utils import helpers
 from treeparse.utils.helpers import load_yaml_config
 
 
@@ -37,3 +39,49 @@ def test_load_yaml_config_empty():
         assert result == {}
     finally:
         os.unlink(config_path)
+
+
+@pytest.fixture
+def count_parses(monkeypatch):
+    calls = []
+    original = yaml.load
+
+    def counting(stream, Loader):
+        calls.append(Loader)
+        return original(stream, Loader=Loader)
+
+    monkeypatch.setattr(helpers.yaml, "load", counting)
+    return calls
+
+
+def test_load_yaml_config_uses_libyaml_when_available(tmp_path, count_parses):
+    path = tmp_path / "config.yml"
+    path.write_text("level: 3\n")
+    assert load_yaml_config(str(path)) == {"level": 3}
+    assert count_parses == [getattr(yaml, "CSafeLoader", yaml.SafeLoader)]
+
+
+def test_load_yaml_config_is_parsed_once_per_stat(tmp_path, count_parses):
+    path = tmp_path / "config.yml"
+    path.write_text("level: 3\n")
+    load_yaml_config(str(path))
+    assert load_yaml_config(str(path)) == {"level": 3}
+    assert len(count_parses) == 1
+    path.write_text("level: 42\n")
+    assert load_yaml_config(str(path)) == {"level": 42}
+    assert len(count_parses) == 2
+
+
+def test_load_yaml_config_disk_cache(tmp_path, count_parses):
+    path = tmp_path / "config.yml"
+    path.write_text("when: 2024-01-02\nitems: [1, 2]\n")
+    cache_dir = tmp_path / "cache"
+    first = load_yaml_config(str(path), cache_dir)
+    (entry,) = (cache_dir / "config").iterdir()
+    helpers._configs.clear()
+    assert load_yaml_config(str(path), cache_dir) == first
+    assert len(count_parses) == 1
+    helpers._configs.clear()
+    entry.write_bytes(b"not a pickle")
+    assert load_yaml_config(str(path), cache_dir) == first
+    assert len(count_parses) == 2
@@ -0,0 +1,111 @@
+"""Tests for the cached, pre-serialized --json export."""
+
+import io
+import json
+import sys
+
+import pytest
+
+from treeparse import argument, cli, command, group
+from treeparse.utils import fingerprint, structure_export
+
+
+def deploy(env: str):
+    """Deploy a service."""
+
+
+def make_cli(**settings) -> cli:
+    ops = group(
+        name="ops",
+        help="Operations",
+        commands=[command(name="deploy", callback=deploy, arguments=[argument(name="env")])],
+    )
+    return cli(**{"name": "tool", "help": "Tool", "subgroups": [ops], **settings})
+
+
+@pytest.fixture
+def count_walks(monkeypatch):
+    """Nodes visited by an export or a fingerprint, so a cache hit can be told from a traversal."""
+    calls = []
+    original_root = cli._structure_root
+    original_payload = fingerprint._local_payload
+
+    def counting_root(self, path):
+        calls.append(("export", self.name))
+        return original_root(self, path)
+
+    def counting_payload(node, metadata):
+        calls.append(("fingerprint", node.name))
+        return original_payload(node, metadata)
+
+    monkeypatch.setattr(cli, "_structure_root", counting_root)
+    monkeypatch.setattr(fingerprint, "_local_payload", counting_payload)
+    return calls
+
+
+def run_json(app, capsys) -> str:
+    sys.argv = ["tool", "--json"]
+    with pytest.raises(SystemExit) as exc:
+        app.run()
+    assert exc.value.code == 0
+    return capsys.readouterr().out
+
+
+def test_output_matches_structure_dict(capsys):
+    app = make_cli()
+    out = run_json(app, capsys)
+    assert out == json.dumps(app.structure_dict(), indent=2) + "\n"
+    assert structure_export.structure_json(app) == out.encode("utf-8")
+
+
+def test_repeated_json_skips_traversal(count_walks, capsys):
+    app = make_cli()
+    first = run_json(app, capsys)
+    assert count_walks == [("export", "tool")]
+    sys.argv = ["tool", "-j"]
+    with pytest.raises(SystemExit):
+        app.run()
+    assert capsys.readouterr().out == first
+    assert count_walks == [("export", "tool")]
+
+
+def test_in_place_changes_are_exported(count_walks, capsys):
+    app = make_cli()
+    run_json(app, capsys)
+    app.subgroups[0].help = "Changed"
+    assert json.loads(run_json(app, capsys))["subgroups"][0]["help"] == "Changed"
+    app.subgroups[0].commands[0].arguments[0].help = "Target"
+    assert "Target" in run_json(app, capsys)
+    assert [kind for kind, _ in count_walks] == ["export"] * 3
+
+
+def test_disk_cache_survives_a_new_process(count_walks, tmp_path, capsys):
+    first = run_json(make_cli(cache_dir=tmp_path), capsys)
+    assert len(list((tmp_path / "json").iterdir())) == 1
+    count_walks.clear()
+    assert run_json(make_cli(cache_dir=tmp_path), capsys) == first
+    assert count_walks == []
+
+
+def test_disk_key_follows_structure_version(tmp_path, capsys):
+    run_json(make_cli(cache_dir=tmp_path, structure_version="1"), capsys)
+    changed = make_cli(cache_dir=tmp_path, structure_version="2", help="Other")
+    assert json.loads(run_json(changed, capsys))["help"] == "Other"
+    assert len(list((tmp_path / "json").iterdir())) == 2
+
+
+def test_disk_cache_is_skipped_after_an_in_place_change(tmp_path, capsys):
+    app = make_cli(cache_dir=tmp_path)
+    run_json(app, capsys)
+    app.help = "Changed"
+    assert json.loads(run_json(app, capsys))["help"] == "Changed"
+    assert len(list((tmp_path / "json").iterdir())) == 1
+    assert json.loads(run_json(make_cli(cache_dir=tmp_path), capsys))["help"] == "Tool"
+
+
+def test_write_bytes_uses_binary_buffer():
+    raw = io.BytesIO()
+    stream = io.TextIOWrapper(raw, encoding="utf-8")
+    stream.write("before ")
+    structure_export.write_bytes(stream, '{"é": 1}\n'.encode("utf-8"))
+    assert raw.getvalue() == 'before {"é": 1}\n'.encode("utf-8")
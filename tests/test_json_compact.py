@@ -0,0 +1,135 @@
+"""Tests for the compact structure format and the chunked compact export."""
+
+import json
+import sys
+
+import pytest
+
+from treeparse import chain, cli, command, group, option
+
+
+def deploy(level: int, verbose: bool):
+    """Deploy the current build."""
+
+
+def status(level: int, verbose: bool):
+    """Show status."""
+
+
+def build(count: int):
+    """Compile sources."""
+
+
+def ship():
+    """Upload artifacts."""
+
+
+def purge():
+    """Purge the cache."""
+
+
+def make_cli() -> cli:
+    level = option(flags=["--level", "-l"], arg_type=int, default=1, help="Level")
+    svc = group(name="svc", help="Services", commands=[command(name="deploy", callback=deploy, options=[level])])
+    release = chain(
+        name="release",
+        help="Build and ship",
+        chained_commands=[
+            command(name="build", callback=build, options=[option(flags=["--count"], arg_type=int, default=1)]),
+            command(name="ship", callback=ship),
+        ],
+    )
+    ops = group(
+        name="ops",
+        help="Operations",
+        subgroups=[svc],
+        commands=[command(name="status", help="Status", callback=status, options=[level.model_copy()]), release],
+    )
+    return cli(
+        name="tool",
+        help="Tool",
+        options=[option(flags=["--verbose", "-v"], flag=True, help="Verbose")],
+        subgroups=[ops],
+    )
+
+
+def cache_group(name: str = "cache") -> group:
+    return group(name=name, help="Cache", commands=[command(name="purge", callback=purge)])
+
+
+def test_compact_omits_defaults_and_shares_options():
+    data = make_cli().compact_dict()
+    assert data["shared_options"] == {
+        "--level": {"flags": ["--level", "-l"], "help": "Level", "default": 1, "arg_type": "int"}
+    }
+    ops = data["subgroups"][0]
+    assert ops["commands"][0] == {
+        "name": "status",
+        "type": "command",
+        "help": "Status",
+        "docstring": "Show status.",
+        "options": ["--level"],
+    }
+    assert ops["subgroups"][0]["commands"][0]["options"][0] == "--level"
+    # Used once, so kept inline; flags carry no arg_type.
+    assert data["options"] == [{"flags": ["--verbose", "-v"], "help": "Verbose", "flag": True}]
+    assert ops["commands"][1]["chained"][0]["options"] == [{"flags": ["--count"], "default": 1, "arg_type": "int"}]
+
+
+def test_json_compact_flag_is_minified_and_scoped(capsys):
+    app = make_cli()
+    sys.argv = ["tool", "--json-compact"]
+    with pytest.raises(SystemExit):
+        app.run()
+    output = capsys.readouterr().out.rstrip("\n")
+    assert json.loads(output) == app.compact_dict()
+    assert "\n" not in output and ", " not in output
+    sys.argv = ["tool", "--json"]
+    with pytest.raises(SystemExit):
+        app.run()
+    assert len(output) < len(capsys.readouterr().out) / 2
+    sys.argv = ["tool", "ops", "--json-compact"]
+    with pytest.raises(SystemExit):
+        app.run()
+    scoped = json.loads(capsys.readouterr().out)
+    assert scoped["path"] == ["ops"]
+    assert scoped["inherited_options"] == [{"flags": ["--verbose", "-v"], "help": "Verbose", "flag": True}]
+
+
+def test_export_compact_writes_index_and_chunks(tmp_path):
+    app = make_cli()
+    app.subgroups.append(cache_group())
+    report = app.export_compact(tmp_path)
+    assert report.files == ["index.json", "ops.json", "cache.json"]
+    assert report.compact_bytes < report.json_bytes
+    assert report.index_bytes == (tmp_path / "index.json").stat().st_size
+    index = json.loads((tmp_path / "index.json").read_text())
+    assert index["chunks"] == {"ops": "ops.json", "cache": "cache.json"}
+    assert index["subgroups"][1] == {
+        "name": "cache",
+        "type": "group",
+        "truncated": True,
+        "help": "Cache",
+        "chunk": "cache.json",
+    }
+    chunk = json.loads((tmp_path / "ops.json").read_text())
+    assert chunk == app.compact_dict(["ops"])
+    assert [c["name"] for c in chunk["commands"]] == ["status", "release"]
+
+
+def test_export_compact_removes_stale_chunks(tmp_path):
+    app = make_cli()
+    app.subgroups.append(cache_group())
+    app.export_compact(tmp_path)
+    report = make_cli().export_compact(tmp_path)
+    assert report.files == ["index.json", "ops.json"]
+    assert not (tmp_path / "cache.json").exists()
+
+
+@pytest.mark.parametrize("names", [["index"], ["a b", "a_b"]])
+def test_export_compact_rejects_colliding_chunk_names(tmp_path, names):
+    app = make_cli()
+    app.subgroups.extend(cache_group(name) for name in names)
+    with pytest.raises(ValueError, match=rf"would be written to {names[-1]}\.json"):
+        app.export_compact(tmp_path)
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,167 @@
+"""Tests for path-scoped and depth-limited --json output."""
+
+import json
+import sys
+
+import pytest
+
+from treeparse import argument, cli, command, group, option
+from treeparse.utils import fingerprint
+
+
+def deploy(env: str, verbose: bool, region: str, dry_run: bool):
+    """Deploy the current build."""
+
+
+def status(verbose: bool, region: str):
+    """Show status."""
+
+
+def add(id: str, name: str, verbose: bool):
+    """Add a user."""
+
+
+def make_cli() -> cli:
+    svc = group(
+        name="svc",
+        help="Services",
+        options=[option(flags=["--dry-run"], flag=True, help="Dry run")],
+        commands=[command(name="deploy", callback=deploy, arguments=[argument(name="env")])],
+    )
+    ops = group(
+        name="ops",
+        help="Operations",
+        options=[option(flags=["--region"], default="eu", choices=["eu", "us"], help="Region")],
+        subgroups=[svc],
+        commands=[command(name="status", callback=status)],
+    )
+    user = group(
+        name="user",
+        help="Users",
+        arguments=[argument(name="id")],
+        commands=[command(name="add", callback=add, arguments=[argument(name="name")])],
+    )
+    return cli(
+        name="tool",
+        help="Tool",
+        options=[option(flags=["--verbose", "-v"], flag=True, help="Verbose")],
+        subgroups=[ops, user],
+    )
+
+
+def test_scoped_group_with_inherited_options(capsys):
+    sys.argv = ["tool", "ops", "svc", "--json"]
+    with pytest.raises(SystemExit) as exc:
+        make_cli().run()
+    assert exc.value.code == 0
+    data = json.loads(capsys.readouterr().out)
+    assert data["type"] == "group" and data["name"] == "svc"
+    assert data["path"] == ["ops", "svc"]
+    assert [c["name"] for c in data["commands"]] == ["deploy"]
+    assert [o["flags"] for o in data["options"]] == [["--dry-run"]]
+    assert [o["flags"] for o in data["inherited_options"]] == [["--verbose", "-v"], ["--region"]]
+    assert data["inherited_arguments"] == []
+
+
+def test_scoped_command_ignores_positional_values(capsys):
+    sys.argv = ["tool", "ops", "svc", "deploy", "prod", "-j"]
+    with pytest.raises(SystemExit):
+        make_cli().run()
+    data = json.loads(capsys.readouterr().out)
+    assert data["type"] == "command" and data["path"] == ["ops", "svc", "deploy"]
+    assert [a["name"] for a in data["arguments"]] == ["env"]
+    assert "--dry-run" in [o["flags"][0] for o in data["inherited_options"]]
+
+
+def test_group_argument_values_are_not_path_words(capsys):
+    app = make_cli()
+    sys.argv = ["tool", "user", "123", "add", "--json"]
+    with pytest.raises(SystemExit) as exc:
+        app.run()
+    assert exc.value.code == 0
+    data = json.loads(capsys.readouterr().out)
+    assert data["path"] == ["user", "add"]
+    assert [a["name"] for a in data["inherited_arguments"]] == ["id"]
+    sys.argv = ["tool", "user", "add", "add", "-h"]
+    with pytest.raises(SystemExit) as exc:
+        app.run()
+    assert exc.value.code == 0
+    assert capsys.readouterr().out.startswith("Usage: tool user add ...")
+
+
+def test_scoped_export_does_not_hash_the_tree(monkeypatch, capsys):
+    monkeypatch.setattr(fingerprint, "_local_payload", lambda node, metadata: pytest.fail("tree hashed"))
+    sys.argv = ["tool", "ops", "svc", "--json"]
+    with pytest.raises(SystemExit) as exc:
+        make_cli().run()
+    assert exc.value.code == 0
+    assert json.loads(capsys.readouterr().out)["name"] == "svc"
+
+
+def test_option_values_are_not_path_words(capsys):
+    app = make_cli()
+    sys.argv = ["tool", "-v", "ops", "--region", "us", "svc", "--json"]
+    with pytest.raises(SystemExit):
+        app.run()
+    assert json.loads(capsys.readouterr().out)["path"] == ["ops", "svc"]
+    sys.argv = ["tool", "ops", "--region=us", "status", "-j"]
+    with pytest.raises(SystemExit):
+        app.run()
+    assert json.loads(capsys.readouterr().out)["path"] == ["ops", "status"]
+    sys.argv = ["tool", "ops", "--region", "us", "status", "--help"]
+    with pytest.raises(SystemExit) as exc:
+        app.run()
+    assert exc.value.code == 0
+    assert capsys.readouterr().out.startswith("Usage: tool ops status ...")
+
+
+def test_root_output_unchanged(capsys):
+    app = make_cli()
+    sys.argv = ["tool", "--json"]
+    with pytest.raises(SystemExit):
+        app.run()
+    assert json.loads(capsys.readouterr().out) == app.structure_dict()
+    assert "path" not in app.structure_dict()
+
+
+def test_depth_limit_marks_truncated_groups(capsys):
+    app = make_cli()
+    sys.argv = ["tool", "--json-depth", "1"]
+    with pytest.raises(SystemExit):
+        app.run()
+    ops = json.loads(capsys.readouterr().out)["subgroups"][0]
+    assert ops["truncated"] is True
+    assert "subgroups" not in ops and "commands" not in ops
+    sys.argv = ["tool", "ops", "--json-depth=1"]
+    with pytest.raises(SystemExit):
+        app.run()
+    data = json.loads(capsys.readouterr().out)
+    assert data["subgroups"][0]["truncated"] is True
+    assert data["commands"][0]["name"] == "status"
+    assert "truncated" not in data["commands"][0]
+
+
+def test_depth_limit_output_is_smaller(capsys):
+    app = make_cli()
+    sys.argv = ["tool", "--json"]
+    with pytest.raises(SystemExit):
+        app.run()
+    full = capsys.readouterr().out
+    sys.argv = ["tool", "--json", "--json-depth", "1"]
+    with pytest.raises(SystemExit):
+        app.run()
+    assert len(capsys.readouterr().out) < len(full)
+
+
+def test_unknown_path_and_bad_depth(capsys):
+    app = make_cli()
+    sys.argv = ["tool", "ops", "nope", "--json"]
+    with pytest.raises(SystemExit) as exc:
+        app.run()
+    assert exc.value.code == 2
+    assert "no group or command 'nope' in 'tool ops'" in " ".join(capsys.readouterr().out.split())
+    sys.argv = ["tool", "--json-depth", "0"]
+    with pytest.raises(SystemExit) as exc:
+        app.run()
+    assert exc.value.code == 2
+    assert "--json-depth: expected a positive integer" in " ".join(capsys.readouterr().out.split())
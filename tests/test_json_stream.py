@@ -0,0 +1,121 @@
+"""Tests for the streaming structure encoder."""
+
+import io
+import json
+import sys
+
+import pytest
+
+from treeparse import argument, chain, cli, command, group, option
+from treeparse.utils import structure_export
+
+
+def fetch(url: str, retries: int, timeout: float, verbose: bool):
+    """Fetch a URL — «quoted» unicode."""
+
+
+def tidy(verbose: bool):
+    """Tidy up.
+
+    Second paragraph."""
+
+
+def sweep():
+    """Sweep."""
+
+
+def deploy(env: str, level: int):
+    """Deploy the current build."""
+
+
+def status():
+    """Show status."""
+
+
+def make_cli(**settings) -> cli:
+    deploy_cmd = command(
+        name="deploy",
+        help="Deploy it",
+        callback=deploy,
+        arguments=[argument(name="env", arg_type=str)],
+        options=[option(flags=["--level", "-l"], arg_type=int, default=1, help="Level")],
+    )
+    svc = group(name="svc", help="Services", commands=[deploy_cmd])
+    ops = group(
+        name="ops",
+        help="Operations",
+        options=[option(flags=["--region"], default="eu", choices=["eu", "us"], help="Region", inherit=False)],
+        subgroups=[svc],
+        commands=[command(name="status", help="Status", callback=status)],
+    )
+    return cli(**{"name": "tool", "help": "Tool", "subgroups": [ops], **settings})
+
+
+@pytest.mark.parametrize("indent", [None, 2, 4])
+@pytest.mark.parametrize(
+    "path,depth",
+    [
+        (None, None),
+        (None, 1),
+        (["ops"], 2),
+        (["ops", "svc", "deploy"], None),
+        (["net"], None),
+        (["net", "fetch"], None),
+    ],
+)
+def test_stream_matches_json_dumps(indent, path, depth):
+    # Quotes, unicode, floats, int choices, empty groups and multi-paragraph docstrings.
+    net = group(
+        name="net",
+        help="Network",
+        options=[option(flags=["--timeout"], arg_type=float, default=1.5, help="Seconds")],
+        subgroups=[group(name="empty", help="Nothing here")],
+        commands=[
+            command(
+                name="fetch",
+                help='Fetch "it"',
+                callback=fetch,
+                arguments=[argument(name="url", arg_type=str, nargs="?", default="x")],
+                options=[option(flags=["--retries", "-r"], arg_type=int, default=2, choices=[1, 2, 3])],
+                sort_key=1,
+            ),
+            chain(name="all", help="Both", chained_commands=[command(name="sweep", callback=sweep)]),
+        ],
+    )
+    app = make_cli(commands=[command(name="tidy", callback=tidy)])
+    app.subgroups.append(net)
+    out = io.StringIO()
+    app.write_json(out, path, depth, indent=indent)
+    assert out.getvalue() == json.dumps(app.structure_dict(path, depth), indent=indent)
+
+
+def test_flat_cli_with_callback():
+    app = cli(name="solo", callback=tidy, options=[option(flags=["--verbose"], flag=True)])
+    out = io.StringIO()
+    app.write_json(out)
+    assert out.getvalue() == json.dumps(app.structure_dict())
+
+
+def test_output_is_written_node_by_node():
+    pieces = []
+    structure_export.stream_structure(make_cli(), pieces.append, indent=2)
+    assert len(pieces) > 5
+    assert max(len(p) for p in pieces) < len("".join(pieces)) / 2
+
+
+def test_large_streamed_export_is_not_kept_in_memory(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(structure_export, "_MEMORY_MAX_BYTES", 100)
+    app = make_cli()
+    expected = json.dumps(app.structure_dict(), indent=2) + "\n"
+    sys.argv = ["tool", "--json"]
+    with pytest.raises(SystemExit):
+        app.run()
+    assert capsys.readouterr().out == expected
+    assert app._memo("json") == {}
+    cached = make_cli(cache_dir=tmp_path)
+    with pytest.raises(SystemExit):
+        cached.run()
+    assert capsys.readouterr().out == expected
+    (entry,) = (tmp_path / "json").iterdir()
+    assert entry.read_text() == expected
+    assert cached._memo("json") == {}
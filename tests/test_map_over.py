@@ -0,0 +1,106 @@
+"""Tests for fan-out over nargs values (command(map_over=...))."""
+
+import sys
+import threading
+import time
+
+import pytest
+
+from treeparse import argument, cli, command, option
+
+threads = []
+
+
+def process(path: str, suffix: str):
+    threads.append(threading.get_ident())
+    time.sleep(0.02 * (3 - int(path[-1])))
+    print(f"{path}{suffix}")
+    if path.startswith("fail"):
+        sys.exit(4)
+    if path.startswith("boom"):
+        raise RuntimeError("bad item")
+    return path.upper()
+
+
+@pytest.mark.parametrize("executor", ["inline", "process"])
+def test_output_in_input_order(executor, capsys):
+    cmd = command(
+        name="process",
+        callback=process,
+        map_over="path",
+        executor=executor,
+        arguments=[argument(name="path", arg_type=str, nargs="+")],
+        options=[option(flags=["--suffix"], arg_type=str, default="!")],
+    )
+    app = cli(name="tool", commands=[cmd])
+    sys.argv = ["tool", "process", "a0", "b1", "c2"]
+    try:
+        app.run()
+    finally:
+        app.close()
+    assert capsys.readouterr().out.splitlines() == ["a0!", "b1!", "c2!"]
+
+
+def test_jobs_bound_thread_concurrency():
+    cmd = command(
+        name="process",
+        callback=process,
+        map_over="path",
+        jobs=3,
+        arguments=[argument(name="path", arg_type=str, nargs="+")],
+        options=[option(flags=["--suffix"], arg_type=str, default="!")],
+    )
+    app = cli(name="tool", commands=[cmd])
+    threads.clear()
+    sys.argv = ["tool", "process", "a0", "b1", "c2"]
+    app.run()
+    assert len(set(threads)) > 1
+    threads.clear()
+    sys.argv = ["tool", "process", "a0", "b1", "--jobs", "1"]
+    app.run()
+    assert len(set(threads)) == 1
+
+
+@pytest.mark.parametrize("executor", ["inline", "process"])
+def test_exit_code_aggregated(executor, capsys):
+    cmd = command(
+        name="process",
+        callback=process,
+        map_over="path",
+        executor=executor,
+        arguments=[argument(name="path", arg_type=str, nargs="+")],
+        options=[option(flags=["--suffix"], arg_type=str, default="!")],
+    )
+    app = cli(name="tool", commands=[cmd])
+    sys.argv = ["tool", "process", "a0", "fail1", "c2"]
+    try:
+        with pytest.raises(SystemExit) as exc:
+            app.run()
+    finally:
+        app.close()
+    assert exc.value.code == 4
+    assert capsys.readouterr().out.splitlines() == ["a0!", "fail1!", "c2!"]
+
+
+def test_exception_propagates_after_all_items(capsys):
+    cmd = command(
+        name="process",
+        callback=process,
+        map_over="path",
+        arguments=[argument(name="path", arg_type=str, nargs="+")],
+        options=[option(flags=["--suffix"], arg_type=str, default="!")],
+    )
+    app = cli(name="tool", commands=[cmd])
+    sys.argv = ["tool", "process", "boom0", "b1"]
+    with pytest.raises(RuntimeError, match="bad item"):
+        app.run()
+    assert capsys.readouterr().out.splitlines() == ["boom0!", "b1!"]
+
+
+def test_map_over_must_name_list_dest():
+    def cb(name: str):
+        pass
+
+    cmd = command(name="x", callback=cb, map_over="name", arguments=[argument(name="name", arg_type=str)])
+    with pytest.raises(ValueError, match="map_over"):
+        cmd.validate()
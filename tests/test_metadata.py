@@ -0,0 +1,122 @@
+"""Tests for the per-tree callback metadata store."""
+
+import functools
+import inspect
+import json
+
+import pytest
+
+from treeparse import argument, chain, cli, command, group
+from treeparse.utils.metadata import metadata_store
+
+
+def greet(name: str):
+    """Say hello."""
+
+
+def deploy(env: str):
+    """Deploy the build."""
+
+
+def traced(fn):
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        return fn(*args, **kwargs)
+
+    return wrapper
+
+
+@pytest.fixture
+def counting(monkeypatch):
+    calls = {"getdoc": 0, "signature": 0}
+    getdoc, signature = inspect.getdoc, inspect.signature
+
+    def counted_getdoc(obj):
+        calls["getdoc"] += 1
+        return getdoc(obj)
+
+    def counted_signature(obj, *args, **kwargs):
+        calls["signature"] += 1
+        return signature(obj, *args, **kwargs)
+
+    monkeypatch.setattr(inspect, "getdoc", counted_getdoc)
+    monkeypatch.setattr(inspect, "signature", counted_signature)
+    return calls
+
+
+def test_shared_callback_introspected_once(counting, capsys):
+    hello = command(name="hello", callback=greet, arguments=[argument(name="name", arg_type=str)])
+    again = command(name="again", callback=greet, arguments=[argument(name="name", arg_type=str)])
+    ship = command(name="ship", callback=deploy, arguments=[argument(name="env", arg_type=str)])
+    both = chain(name="both", chained_commands=[hello, ship])
+    app = cli(name="app", commands=[hello, both], subgroups=[group(name="more", commands=[again])], max_width=80)
+    counting.update(getdoc=0, signature=0)
+    app.build_parser()
+    app.print_help([], verbose=True)
+    app.structure_dict()
+    app.print_help(["both"], verbose=True)
+    capsys.readouterr()
+    # One entry per distinct callback, however many commands and renders use it.
+    assert len(app.metadata) == 2
+    assert counting == {"getdoc": 2, "signature": 2}
+
+
+def test_metadata_follows_wrappers():
+    meta = metadata_store().get(traced(greet))
+    assert meta.name == "greet"
+    assert meta.doc == "Say hello."
+    assert meta.params == ("name",)
+    assert meta.key == f"{__name__}:greet"
+    assert not meta.is_async
+
+
+def test_save_and_load_skip_introspection(tmp_path, counting, capsys):
+    hello = command(name="hello", callback=greet, arguments=[argument(name="name", arg_type=str)])
+    ship = command(name="ship", callback=deploy, arguments=[argument(name="env", arg_type=str)])
+    app = cli(name="app", commands=[hello, ship])
+    app.structure_dict()
+    path = tmp_path / "meta.json"
+    app.metadata.save(path)
+    data = json.loads(path.read_text())
+    assert data[f"{__name__}:deploy"] == {
+        "name": "deploy",
+        "doc": "Deploy the build.",
+        "params": ["env"],
+        "is_async": False,
+    }
+
+    fresh = cli(name="app", commands=[hello.model_copy(), ship.model_copy()])
+    fresh.metadata.load(path)
+    before = dict(counting)
+    assert fresh.structure_dict()["commands"][0]["docstring"] == "Say hello."
+    fresh.print_help([], verbose=True)
+    capsys.readouterr()
+    assert counting == before
+
+
+def test_loaded_entries_keep_validation(tmp_path):
+    app = cli(name="app", commands=[command(name="hello", callback=greet)])
+    path = tmp_path / "meta.json"
+    app.metadata.update({f"{__name__}:greet": {"name": "greet", "doc": "", "params": ["name"], "is_async": False}})
+    app.metadata.save(path)
+    broken = cli(
+        name="app",
+        commands=[command(name="hello", callback=greet, arguments=[argument(name="name", arg_type=int)])],
+    )
+    broken.metadata.load(path)
+    with pytest.raises(ValueError, match="type mismatch|Type mismatch"):
+        broken.build_parser()
+
+
+def test_local_functions_are_not_keyed():
+    def local(x: int):
+        """Local."""
+
+    store = metadata_store()
+    store.update({f"{__name__}:{local.__qualname__}": {"name": "other", "doc": "", "params": [], "is_async": False}})
+    meta = store.get(local)
+    assert meta.key is None
+    assert meta.doc == "Local."
+    assert store.to_dict() == {
+        f"{__name__}:{local.__qualname__}": {"name": "other", "doc": "", "params": [], "is_async": False}
+    }
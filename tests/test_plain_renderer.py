@@ -0,0 +1,160 @@
+"""Tests for the rich-free plain-text help renderer."""
+
+import contextlib
+import io
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+from treeparse import argument, chain, cli, command, group, option
+from treeparse.utils.help_renderer import help_renderer
+from treeparse.utils.plain_renderer import plain_output, plain_renderer, wrap
+
+
+def upload(target: str, force: bool):
+    """Upload the build.
+
+    Uploads\tartifacts and restarts services."""
+
+
+def deploy(env: str, level: int, mode: str, tags: list, region: str, dry_run: bool):
+    """Deploy the current build."""
+
+
+def status(region: str):
+    """Show status."""
+
+
+def build(count: int):
+    """Compile sources."""
+
+
+def make_cli(**settings) -> cli:
+    deploy_cmd = command(
+        name="deploy",
+        help="Deploy it",
+        callback=deploy,
+        arguments=[argument(name="env", arg_type=str)],
+        options=[
+            option(flags=["--level", "-l"], arg_type=int, default=1, help="Level"),
+            option(flags=["--mode"], default="safe", choices=["fast", "safe"], help="Mode"),
+            option(flags=["--tags"], nargs="*", default=[], help="Tags"),
+        ],
+    )
+    svc = group(
+        name="svc",
+        help="Services",
+        options=[option(flags=["--dry-run"], flag=True, help="Dry run")],
+        commands=[deploy_cmd],
+    )
+    release = chain(
+        name="release",
+        help="Build and ship",
+        chained_commands=[
+            command(name="build", callback=build, options=[option(flags=["--count"], arg_type=int, default=1)])
+        ],
+    )
+    ops = group(
+        name="ops",
+        help="Operations",
+        options=[option(flags=["--region"], default="eu", choices=["eu", "us"], help="Region")],
+        subgroups=[svc],
+        commands=[command(name="status", help="Status", callback=status), release],
+    )
+    return cli(**{"name": "tool", "help": "Tool", "subgroups": [ops], **settings})
+
+
+def rich_text(app, path, verbose=False):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return "".join(help_renderer(app)._render(path, verbose))
+
+
+@pytest.mark.parametrize("max_width", [24, 40, 80, 120])
+@pytest.mark.parametrize("line_connect", [False, True])
+@pytest.mark.parametrize("path", [[], ["ops"], ["ops", "svc", "deploy"], ["edge"], ["edge", "upload"], ["ops", "nope"]])
+@pytest.mark.parametrize("verbose", [False, True])
+def test_matches_rich_non_tty_output(max_width, line_connect, path, verbose):
+    # Markup, wide characters, tabs, long words and folded groups.
+    edge = group(
+        name="edge",
+        help="Operations on 本番 environments " * 3,
+        commands=[
+            command(
+                name="upload",
+                help="Upload to a target " + "x" * 50,
+                callback=upload,
+                arguments=[argument(name="target", arg_type=str)],
+                options=[option(flags=["--force", "-f"], flag=True, help="Skip [bold]checks[/bold]")],
+            )
+        ],
+        subgroups=[group(name="archive", help="Folded", fold=True)],
+    )
+    app = make_cli(max_width=max_width, line_connect=line_connect)
+    app.help = "A [red]tool[/red] with a long description " * 4
+    app.subgroups.append(edge)
+    plain = "".join(plain_renderer(app)._render(path, verbose))
+    assert plain == rich_text(app, path, verbose)
+
+
+def test_streams_one_line_at_a_time():
+    lines = plain_renderer(make_cli())._render([], False)
+    assert next(lines).startswith("Usage: tool ...")
+    assert all(chunk.count("\n") == 1 for chunk in lines)
+
+
+def test_wrap_folds_long_words_and_keeps_blank_lines():
+    assert wrap("ab cdefgh\n\nij", 4) == ["ab ", "cdef", "gh", "", "ij"]
+    assert wrap("日本語テキスト", 5) == ["日本", "語テ", "キス", "ト"]
+
+
+def test_selection(monkeypatch):
+    tty = io.StringIO()
+    tty.isatty = lambda: True
+    monkeypatch.delenv("NO_COLOR", raising=False)
+    monkeypatch.delenv("FORCE_COLOR", raising=False)
+    assert plain_output(io.StringIO())
+    assert not plain_output(tty)
+    monkeypatch.setenv("NO_COLOR", "1")
+    assert plain_output(tty)
+    monkeypatch.delenv("NO_COLOR")
+    monkeypatch.setenv("FORCE_COLOR", "1")
+    assert not plain_output(io.StringIO())
+
+
+def test_run_help_uses_plain_renderer(monkeypatch, capsys):
+    monkeypatch.delenv("FORCE_COLOR", raising=False)
+    sys.argv = ["tool", "ops", "--help"]
+    with pytest.raises(SystemExit) as exc:
+        make_cli().run()
+    assert exc.value.code == 0
+    out = capsys.readouterr().out
+    assert "\x1b[" not in out
+    assert out == rich_text(make_cli(), ["ops"])
+
+
+def test_piped_help_does_not_import_rich(tmp_path):
+    script = tmp_path / "app.py"
+    script.write_text(
+        textwrap.dedent(
+            """
+            import sys
+            from treeparse import cli, command
+
+            def hello():
+                pass
+
+            app = cli(name="app", help="Demo", commands=[command(name="hello", callback=hello)])
+            try:
+                app.run()
+            except SystemExit:
+                pass
+            sys.stderr.write(str(sorted(m for m in sys.modules if m.split(".")[0] == "rich")))
+            """
+        )
+    )
+    env = {"PATH": "", "PYTHONPATH": ":".join(sys.path)}
+    proc = subprocess.run([sys.executable, str(script), "--help"], capture_output=True, text=True, env=env, check=True)
+    assert "hello" in proc.stdout
+    assert proc.stderr == "[]"
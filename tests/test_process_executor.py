@@ -0,0 +1,108 @@
+"""Tests for command(executor="process")."""
+
+import multiprocessing
+import os
+import sys
+import threading
+
+import pytest
+
+from treeparse import argument, chain, cli, command
+from treeparse.utils.executor import mp_context
+
+
+def where(n: int):
+    print(f"pid {os.getpid()} n={n}")
+    return n * 2
+
+
+def test_runs_in_worker_and_streams_stdout(capsys):
+    cmd = command(name="where", callback=where, executor="process", arguments=[argument(name="n", arg_type=int)])
+    app = cli(name="tool", commands=[cmd])
+    sys.argv = ["tool", "where", "3"]
+    try:
+        app.run()
+    finally:
+        app.close()
+    out = capsys.readouterr().out
+    assert out.endswith("n=3\n")
+    assert f"pid {os.getpid()} " not in out
+
+
+def test_pool_is_reused_until_close():
+    cmd = command(name="where", callback=where, executor="process", arguments=[argument(name="n", arg_type=int)])
+    app = cli(name="tool", commands=[cmd])
+    sys.argv = ["tool", "where", "1"]
+    app.run()
+    pool = app._process_pool
+    app.run()
+    assert app._process_pool is pool
+    app.close()
+    assert app._process_pool is None
+
+
+def test_exit_code_propagates():
+    def fail(code: int):
+        sys.exit(code)
+
+    cmd = command(name="fail", callback=fail, executor="process", arguments=[argument(name="code", arg_type=int)])
+    app = cli(name="tool", commands=[cmd])
+    sys.argv = ["tool", "fail", "3"]
+    with pytest.raises(SystemExit) as exc:
+        app.run()
+    app.close()
+    assert exc.value.code == 3
+
+
+def test_exception_propagates():
+    def boom():
+        raise RuntimeError("worker boom")
+
+    app = cli(name="tool", commands=[command(name="boom", callback=boom, executor="process")])
+    sys.argv = ["tool", "boom"]
+    with pytest.raises(RuntimeError, match="worker boom"):
+        app.run()
+    app.close()
+
+
+def test_chain_step_in_worker(capsys):
+    def step(label: str):
+        print(f"step {label} {os.getpid()}")
+
+    step_cmd = command(name="step", callback=step, executor="process", arguments=[argument(name="label", arg_type=str)])
+    app = cli(name="tool", commands=[chain(name="pipe", chained_commands=[step_cmd])])
+    sys.argv = ["tool", "pipe", "x"]
+    app.run()
+    app.close()
+    out = capsys.readouterr().out
+    assert out.startswith("step x ")
+    assert not out.endswith(f"{os.getpid()}\n")
+
+
+def double(n: int):
+    print(f"n={n}")
+    return n * 2
+
+
+def test_threaded_process_does_not_fork(capsys, recwarn):
+    stop = threading.Event()
+    thread = threading.Thread(target=stop.wait)
+    thread.start()
+    cmd = command(name="double", callback=double, executor="process", arguments=[argument(name="n", arg_type=int)])
+    app = cli(name="tool", commands=[cmd])
+    sys.argv = ["tool", "double", "4"]
+    try:
+        app.run()
+    finally:
+        app.close()
+        stop.set()
+        thread.join()
+    assert capsys.readouterr().out.endswith("n=4\n")
+    assert not [w for w in recwarn if "fork" in str(w.message)]
+
+
+def test_fork_is_linux_only(monkeypatch):
+    monkeypatch.setattr(sys, "platform", "darwin")
+    assert mp_context().get_start_method() == multiprocessing.get_context().get_start_method()
+    monkeypatch.setattr(sys, "platform", "linux")
+    assert mp_context().get_start_method() == "fork"
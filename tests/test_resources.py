@@ -0,0 +1,125 @@
+"""Tests for resource injection with scoped lifetimes."""
+
+import sys
+
+import pytest
+
+from treeparse import argument, chain, cli, command, group, option, resource
+
+
+class conn:
+    def __init__(self, log, url="mem"):
+        self.url = url
+        self.closed = False
+        self.log = log
+        log.append(("open", url))
+
+    def close(self):
+        self.closed = True
+        self.log.append(("close", self.url))
+
+
+@pytest.mark.parametrize("scope, opened", [("invocation", 2), ("chain", 1), ("process", 1)])
+def test_scope_across_chain_steps(scope, opened):
+    log, seen = [], []
+
+    def step1(x: int, db):
+        seen.append(db)
+
+    def step2(y: str, db):
+        seen.append(db)
+
+    pipe = chain(
+        name="pipe",
+        chained_commands=[
+            command(name="step1", callback=step1, arguments=[argument(name="x", arg_type=int)]),
+            command(name="step2", callback=step2, arguments=[argument(name="y", arg_type=str)]),
+        ],
+    )
+    app = cli(name="tool", commands=[pipe], resources=[resource(name="db", factory=lambda: conn(log), scope=scope)])
+    sys.argv = ["tool", "pipe", "1", "a"]
+    app.run()
+    assert len(seen) == 2 and len({id(db) for db in seen}) == opened
+    assert all(db.closed for db in seen) is (scope != "process")
+    app.close()
+    assert all(db.closed for db in seen)
+    assert log.count(("open", "mem")) == log.count(("close", "mem")) == opened
+
+
+def test_process_scope_reused_until_close():
+    log, seen = [], []
+
+    def query(sql: str, db):
+        seen.append(db)
+
+    cmd = command(name="query", callback=query, arguments=[argument(name="sql", arg_type=str)])
+    app = cli(name="tool", commands=[cmd], resources=[resource(name="db", factory=lambda: conn(log), scope="process")])
+    sys.argv = ["tool", "query", "select 1"]
+    app.run()
+    app.run()
+    assert len(seen) == 2 and seen[0] is seen[1]
+    assert not seen[0].closed
+    app.close()
+    assert seen[0].closed
+    assert log == [("open", "mem"), ("close", "mem")]
+
+
+def test_factory_receives_options_and_custom_close(capsys):
+    closed = []
+
+    def show(db):
+        print(db)
+
+    grp = group(
+        name="data",
+        options=[option(flags=["--url"], arg_type=str, default="sqlite://", inherit=False)],
+        resources=[resource(name="db", factory=lambda url: f"conn:{url}", close=closed.append)],
+        commands=[command(name="show", callback=show)],
+    )
+    app = cli(name="tool", subgroups=[grp])
+    sys.argv = ["tool", "data", "--url", "pg://x", "show"]
+    app.run()
+    assert capsys.readouterr().out == "conn:pg://x\n"
+    assert closed == ["conn:pg://x"]
+
+
+def test_resource_visible_only_below_declaring_group():
+    def uses(db):
+        pass
+
+    grp = group(name="a", commands=[command(name="x", callback=uses)])
+    other = group(
+        name="b",
+        resources=[resource(name="db", factory=object)],
+        commands=[command(name="y", callback=uses)],
+    )
+    app = cli(name="tool", subgroups=[grp, other])
+    with pytest.raises(ValueError, match="parameter name mismatch"):
+        app._validate()
+    grp.resources.append(resource(name="db", factory=object))
+    app._validate()
+
+
+def test_resource_name_clash_with_option():
+    def cb(db: str):
+        pass
+
+    cmd = command(name="x", callback=cb, options=[option(flags=["--db"], arg_type=str)])
+    app = cli(name="tool", commands=[cmd], resources=[resource(name="db", factory=object)])
+    with pytest.raises(ValueError, match="clash"):
+        app._validate()
+
+
+def test_flat_cli_resources(capsys):
+    def main(name: str, greeting):
+        print(f"{greeting} {name}")
+
+    app = cli(
+        name="hi",
+        callback=main,
+        arguments=[argument(name="name", arg_type=str)],
+        resources=[resource(name="greeting", factory=lambda: "hello")],
+    )
+    sys.argv = ["hi", "bob"]
+    app.run()
+    assert capsys.readouterr().out == "hello bob\n"
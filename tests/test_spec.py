@@ -0,0 +1,172 @@
+"""Tests for building a cli from a JSON/YAML spec."""
+
+import json
+import sys
+import textwrap
+from enum import Enum
+
+import pytest
+import yaml
+
+from treeparse import argument, chain, cli, command, group, option, resource
+from treeparse.utils.metadata import lazy_callback
+
+
+class color(Enum):
+    RED = "red"
+    BLUE = "blue"
+
+
+def paint(target: str, shade: color, verbose: bool, session):
+    """Paint a target."""
+    print(f"{target} {shade.name} {session}")
+
+
+def step():
+    """One step."""
+    print("step")
+
+
+def open_session():
+    return "session"
+
+
+def deploy(env: str, level: int, region: str):
+    """Deploy the current build."""
+
+
+def status(region: str):
+    """Show status."""
+
+
+def make_cli() -> cli:
+    deploy_cmd = command(
+        name="deploy",
+        callback=deploy,
+        arguments=[argument(name="env", arg_type=str)],
+        options=[option(flags=["--level", "-l"], arg_type=int, default=1, help="Level")],
+    )
+    ops = group(
+        name="ops",
+        help="Operations",
+        options=[option(flags=["--region"], default="eu", choices=["eu", "us"], help="Region")],
+        subgroups=[group(name="svc", help="Services", commands=[deploy_cmd])],
+        commands=[command(name="status", callback=status)],
+    )
+    return cli(name="tool", help="Tool", subgroups=[ops])
+
+
+LAZY_MODULE = """
+    IMPORTED = True
+
+
+    def hello(name: str):
+        '''Say hello.'''
+        print(f"hello {name}")
+"""
+
+
+@pytest.fixture
+def lazy_module(tmp_path, monkeypatch):
+    (tmp_path / "spec_lazy_mod.py").write_text(textwrap.dedent(LAZY_MODULE))
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, "spec_lazy_mod", raising=False)
+    yield "spec_lazy_mod"
+    sys.modules.pop("spec_lazy_mod", None)
+
+
+def test_round_trip_keeps_structure():
+    app = make_cli()
+    spec = json.loads(json.dumps(app.to_spec()))
+    rebuilt = cli.from_spec(spec)
+    assert rebuilt.structure_dict() == app.structure_dict()
+    assert rebuilt.fingerprint() == app.fingerprint()
+    assert spec["tree"]["subgroups"][0]["options"][0]["choices"] == ["eu", "us"]
+    deploy = app._get_node_from_path(["ops", "svc", "deploy"]).callback
+    assert spec["callbacks"][f"{deploy.__module__}:deploy"]["doc"] == "Deploy the current build."
+
+
+def test_rebuilt_cli_runs_with_resources_and_enums(capsys):
+    paint_cmd = command(
+        name="paint",
+        callback=paint,
+        arguments=[argument(name="target", arg_type=str)],
+        options=[option(flags=["--shade"], arg_type=color, default=color.RED, choices=list(color))],
+        sort_key=2,
+    )
+    art = group(
+        name="art",
+        resources=[resource(name="session", factory=open_session, scope="chain")],
+        commands=[paint_cmd, chain(name="steps", chained_commands=[command(name="step", callback=step)])],
+    )
+    app = cli(name="tool", options=[option(flags=["--verbose", "-v"], flag=True)], subgroups=[art])
+    spec = app.to_spec()
+    assert spec["tree"]["subgroups"][0]["commands"][0]["options"][0]["default"] == "RED"
+    rebuilt = cli.from_spec(spec)
+    sys.argv = ["tool", "art", "paint", "wall", "--shade", "BLUE"]
+    rebuilt.run()
+    assert capsys.readouterr().out == "wall BLUE session\n"
+    sys.argv = ["tool", "art", "steps"]
+    rebuilt.run()
+    assert capsys.readouterr().out == "step\n"
+
+
+def test_callbacks_are_imported_on_first_call(lazy_module, capsys):
+    spec = {
+        "treeparse_spec": 1,
+        "callbacks": {
+            f"{lazy_module}:hello": {"name": "hello", "doc": "Say hello.", "params": ["name"], "is_async": False}
+        },
+        "tree": {
+            "kind": "cli",
+            "name": "lazy",
+            "commands": [
+                {
+                    "kind": "command",
+                    "name": "hello",
+                    "callback": f"{lazy_module}:hello",
+                    "arguments": [{"name": "name"}],
+                }
+            ],
+        },
+    }
+    app = cli.from_spec(spec)
+    assert isinstance(app.commands[0].callback, lazy_callback)
+    sys.argv = ["lazy", "--hv"]
+    with pytest.raises(SystemExit):
+        app.run()
+    assert "Say hello." in capsys.readouterr().out
+    sys.argv = ["lazy", "--json"]
+    with pytest.raises(SystemExit):
+        app.run()
+    assert json.loads(capsys.readouterr().out)["commands"][0]["docstring"] == "Say hello."
+    assert lazy_module not in sys.modules
+    sys.argv = ["lazy", "hello", "world"]
+    app.run()
+    assert capsys.readouterr().out == "hello world\n"
+    assert lazy_module in sys.modules
+
+
+@pytest.mark.parametrize("suffix", [".json", ".yaml"])
+def test_from_spec_file(tmp_path, suffix):
+    app = make_cli()
+    path = tmp_path / f"tool{suffix}"
+    dump = json.dumps if suffix == ".json" else yaml.safe_dump
+    path.write_text(dump(app.to_spec()))
+    assert cli.from_spec(path).structure_dict() == app.structure_dict()
+
+
+def test_validate_checks_callbacks():
+    spec = make_cli().to_spec()
+    spec["tree"]["subgroups"][0]["commands"][0]["callback"] = f"{__name__}:step"
+    cli.from_spec(spec).build_parser()
+    with pytest.raises(ValueError):
+        cli.from_spec(spec, validate=True).build_parser()
+
+
+def test_unimportable_callback_and_bad_version():
+    app = cli(name="tool", commands=[command(name="x", callback=lambda: None)])
+    with pytest.raises(ValueError, match="import path"):
+        app.to_spec()
+    with pytest.raises(ValueError, match="not a treeparse spec"):
+        cli.from_spec({"treeparse_spec": 99, "tree": {}})
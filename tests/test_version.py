@@ -0,0 +1,89 @@
+"""Tests for cached package version resolution."""
+
+import importlib
+import importlib.metadata
+import os
+import sys
+
+import pytest
+
+from treeparse import cli, cli_runner, command
+from treeparse.utils import helpers
+
+cli_module = importlib.import_module("treeparse.models.cli")
+
+
+def noop():
+    pass
+
+
+@pytest.fixture
+def scans(monkeypatch):
+    monkeypatch.setattr(helpers, "_versions", {})
+    calls = []
+
+    def fake_version(name):
+        calls.append(name)
+        if name == "missing-dist":
+            raise importlib.metadata.PackageNotFoundError(name)
+        return "9.9.9"
+
+    monkeypatch.setattr(importlib.metadata, "version", fake_version)
+    return calls
+
+
+def test_explicit_version_never_scans(monkeypatch):
+    def fail(*args):
+        raise AssertionError("metadata scanned")
+
+    monkeypatch.setattr(cli_module, "package_version", fail)
+    app = cli(name="tool", version="1.0", commands=[command(name="go", callback=noop)])
+    assert "--version, -V" in cli_runner(app).invoke(["--help"]).output
+    assert cli_runner(app).invoke(["--version"]).output.strip() == "1.0"
+
+
+def test_json_and_search_never_scan(scans):
+    app = cli(name="tool", commands=[command(name="go", callback=noop)])
+    app.fingerprint()
+    assert cli_runner(app).invoke(["--json"]).exit_code == 0
+    app.search("go")
+    assert scans == []
+
+
+def test_resolved_once_per_process(scans):
+    app = cli(name="some-dist", commands=[command(name="go", callback=noop)], max_width=80)
+    runner = cli_runner(app)
+    assert "--version, -V" in runner.invoke(["--help"]).output
+    assert runner.invoke(["go", "--help"]).exit_code == 0
+    assert runner.invoke(["--version"]).output.strip() == "9.9.9"
+    assert helpers.package_version("missing-dist") is None
+    assert helpers.package_version("missing-dist") is None
+    assert scans == ["some-dist", "missing-dist"]
+
+
+def test_recorded_on_disk_until_site_packages_change(scans, tmp_path, monkeypatch):
+    site = tmp_path / "lib" / "site-packages"
+    site.mkdir(parents=True)
+    scripts = tmp_path / "scripts"
+    scripts.mkdir()
+    monkeypatch.setattr(sys, "path", ["", str(scripts), str(site)])
+    assert helpers.package_version("some-dist", tmp_path / "cache") == "9.9.9"
+    records = list((tmp_path / "cache" / "version").iterdir())
+    assert [p.name for p in records] == ["some-dist.json"]
+
+    # A new process: nothing in memory, answer read from disk, even though
+    # the script directory changed.
+    helpers._versions.clear()
+    (scripts / "run.py").write_text("")
+    os.utime(scripts, ns=(2, 2))
+    assert helpers.package_version("some-dist", tmp_path / "cache") == "9.9.9"
+    assert scans == ["some-dist"]
+
+    # Installing into site-packages changes its mtime and forces a rescan,
+    # which overwrites the record.
+    helpers._versions.clear()
+    (site / "new_pkg-1.0.dist-info").mkdir()
+    os.utime(site, ns=(1, 1))
+    assert helpers.package_version("some-dist", tmp_path / "cache") == "9.9.9"
+    assert scans == ["some-dist", "some-dist"]
+    assert list((tmp_path / "cache" / "version").iterdir()) == records